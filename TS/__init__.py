@@ -3,28 +3,45 @@ Description for Package
 """
 
 from .log_manager import LogManager
+from .clock import Clock, RealClock, VirtualClock
 from .date_converter import DateConverter
 from .strategy_bnh import StrategyBuyAndHold
 from .strategy_bns import StrategyBuyAndSell
 from .upbit_data_provider import UpbitDataProvider
 from .upbit_trader import UpbitTrader
+from .multi_market_trader import MultiMarketTrader
 from .analyzer import Analyzer
 from .operator import Operator
 from .controller import Controller
 from .upbit_api import UpbitAPI
+from .simulation_data_provider import SimulationDataProvider
+from .simulation_trader import SimulationTrader
+from .simulator import Simulator
+from .records import AccountInfo, AccountSnapshot, CandleInfo, TradingRequest, TradingResult
 
 __all__ = [
     "StrategyBuyAndHold",
-    "StrategyBuyAndHold",
+    "StrategyBuyAndSell",
     "UpbitDataProvider",
     "UpbitAPI",
     "DateConverter",
+    "Clock",
+    "RealClock",
+    "VirtualClock",
     "UpbitTrader",
+    "MultiMarketTrader",
     "LogManager",
     "Controller",
     "Analyzer",
     "Operator",
     "Simulator",
+    "SimulationDataProvider",
+    "SimulationTrader",
+    "CandleInfo",
+    "TradingRequest",
+    "TradingResult",
+    "AccountInfo",
+    "AccountSnapshot",
 
 ]
 
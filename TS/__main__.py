@@ -4,20 +4,68 @@
     1: execute single simulation
     2: controller for real trading
 
+[batch]
+    --batch 옵션으로 시뮬레이션 job 리스트 JSON 파일을 주면 프로세스 풀에서 동시에 실행한다.
+    job은 Simulator 인자 딕셔너리 (budget, strategy, from_dash_to, term, count, seed, tag, risk_count)
+
 Example) python -m TS --mode 0
 Example) python -m TS --mode 1
 Example) python -m TS --budget 50000 --from_dash_to 201220.170000-201220.180000 --term 1 --strategy 0
+Example) python -m TS --batch jobs.json --workers 4
 """
 
 import argparse
+import json
+import sys
 
 from .controller import Controller
+from .log_manager import LogManager
+from .simulator import Simulator, load_batch_file, run_batch
+
+parser = argparse.ArgumentParser(prog="python -m TS")
+parser.add_argument("--mode", help="0: interactive simulation, 1: single simulation, 2: real trading", type=int, default=None)
+parser.add_argument("--budget", help="simulation budget", type=float, default=50000)
+parser.add_argument("--from_dash_to", help="simulation period (Ex. 201220.170000-201220.180000)", default=None)
+parser.add_argument("--term", help="simulation tick interval (seconds)", type=float, default=None)
+parser.add_argument("--strategy", help="0: buy and sell, 1: buy and hold", type=int, default=0)
+parser.add_argument("--count", help="synthetic data count when from_dash_to is not given", type=int, default=1000)
+parser.add_argument("--seed", help="synthetic data random seed", type=int, default=None)
+parser.add_argument("--tag", help="simulation report name", default=None)
+parser.add_argument("--risk_count", help="bootstrap sample count for risk report, 0 to skip", type=int, default=0)
+parser.add_argument("--batch", help="JSON file with a list of simulation jobs", default=None)
+parser.add_argument("--workers", help="process count for batch, default is CPU count", type=int, default=None)
+args = parser.parse_args()
 
-# parser = argparse.ArgumentParser()
-# parser.add_argument("--term", help="simulation tick interval (seconds)", default=2)
-# args = parser.parse_args()
+# 시뮬레이션 옵션이 주어지면 시뮬레이션으로 실행
+mode = args.mode
+if mode is None:
+    mode = 1 if args.from_dash_to is not None or args.batch is not None else 2
 
+if args.batch is not None:
+    reports = run_batch(load_batch_file(args.batch), args.workers)
+    print(json.dumps(reports, indent=2, ensure_ascii=False))
+    sys.exit(1 if any("error" in report for report in reports) else 0)
 
-TS_controller = Controller()
-TS_controller.main()
+if mode in (0, 1):
+    # 대화형 모드에서는 진행 상황을 보여주기 위해 틱 사이에 대기
+    term = args.term
+    if term is None:
+        term = 2 if mode == 0 else 0
+    if mode == 1:
+        LogManager.set_stream_level(30)
 
+    simulator = Simulator(
+        budget=args.budget,
+        strategy=args.strategy,
+        from_dash_to=args.from_dash_to,
+        term=term,
+        count=args.count,
+        seed=args.seed,
+        tag=args.tag,
+        risk_count=args.risk_count)
+    report = simulator.run()
+    report["filename"] = simulator.save_report(report)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+else:
+    TS_controller = Controller()
+    TS_controller.main()
@@ -0,0 +1,164 @@
+import threading
+import time
+
+from .date_converter import DateConverter
+from .log_manager import LogManager
+from .metrics import MetricsRegistry
+from .records import AccountSnapshot
+
+
+class AccountReconciler:
+    """
+    거래소의 계좌와 체결 대기 주문을 백그라운드에서 주기적으로 조회해서
+    하나의 AccountSnapshot으로 제공하고 로컬 장부와의 차이를 보고하는 클래스
+
+    snapshot은 변경할 수 없는 record를 통째로 교체하므로 읽는 쪽은 잠금 없이 self.snapshot을 사용한다.
+    체결 대기 주문이 있거나 장부의 주문이 아직 확인되지 않았으면 min_interval로 자주 조회하고,
+    그렇지 않거나 조회에 실패하면 조회 간격을 두 배씩 늘려서 max_interval까지 늘린다.
+    notify()를 호출하면 바로 다시 조회한다.
+
+    upbit_api: 조회에 사용할 UpbitAPI, market이 설정되어 있어야 한다
+    ledger_func: 로컬 장부를 반환하는 함수 {"balance": 현금, "asset": (평균 매입 가격, 수량), "uuids": 주문 uuid 리스트}
+    drift:
+    {
+        "balance": 장부 현금이 거래소 현금(주문 가능 + 묶인 금액)보다 많은 금액, 정상이면 0
+        "asset": 거래소 보유 수량 - 장부 보유 수량
+        "unknown_orders": 거래소에만 있는 체결 대기 주문 uuid 리스트
+        "missing_orders": 장부에만 있는 주문 uuid 리스트, 체결 확인 전 잠시 나타날 수 있다
+    }
+    """
+
+    MIN_INTERVAL = 1
+    MAX_INTERVAL = 30
+    VOLUME_TOLERANCE = 1e-8
+
+    def __init__(self, upbit_api, ledger_func=None, min_interval=None, max_interval=None):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.upbit_api = upbit_api
+        self.currency = upbit_api.market.split("-")[1]
+        self.ledger_func = ledger_func
+        self.min_interval = self.MIN_INTERVAL if min_interval is None else min_interval
+        self.max_interval = self.MAX_INTERVAL if max_interval is None else max_interval
+        self.interval = self.min_interval
+        self.snapshot = None
+        self.version = 0
+        self.is_running = False
+        self.thread = None
+        self.wakeup = threading.Event()
+        self.drift_gauge = MetricsRegistry.gauge(
+            "ts_account_drift", "Difference between the local ledger and the exchange account")
+
+    def start(self):
+        """ 백그라운드 조회를 시작한다 """
+        if self.thread is not None:
+            return
+
+        self.is_running = True
+        self.thread = threading.Thread(target=self._reconcile_loop, name="AccountReconciler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """ 백그라운드 조회를 멈춘다 """
+        if self.thread is None:
+            return
+
+        self.is_running = False
+        self.wakeup.set()
+        self.thread.join()
+        self.thread = None
+
+    def notify(self):
+        """ 주문 접수, 체결 등으로 계좌가 바뀌었을 때 호출, 조회 간격을 줄이고 바로 조회한다 """
+        self.interval = self.min_interval
+        self.wakeup.set()
+
+    def get_snapshot(self):
+        """ 마지막으로 조회한 AccountSnapshot, 아직 조회하지 못했으면 None """
+        return self.snapshot
+
+    def refresh(self):
+        """
+        계좌와 체결 대기 주문을 조회해서 새로운 snapshot을 만든다.
+
+        returns: 새로운 AccountSnapshot, 조회에 실패하면 None
+        """
+        accounts = self.upbit_api.get_accounts()
+        open_orders = self.upbit_api.get_open_orders()
+        if accounts is None or open_orders is None:
+            self.logger.warning("account reconciliation fail")
+            return None
+
+        balance = 0.0
+        locked = 0.0
+        asset = {}
+        for account in accounts:
+            if account["currency"] == "KRW":
+                balance = float(account["balance"])
+                locked = float(account["locked"])
+            else:
+                asset[account["currency"]] = (
+                    float(account["avg_buy_price"]), float(account["balance"]), float(account["locked"]))
+
+        uuids = tuple(order["uuid"] for order in open_orders)
+        drift = None
+        if self.ledger_func is not None:
+            drift = self._get_drift(self.ledger_func(), balance + locked, asset.get(self.currency), uuids)
+
+        self.version += 1
+        now = DateConverter.now_timestamp()
+        snapshot = AccountSnapshot(
+            version=self.version,
+            balance=balance,
+            locked=locked,
+            asset=asset,
+            open_orders=uuids,
+            drift=drift,
+            date_time=DateConverter.from_timestamp(now),
+            timestamp=now)
+        self._report_drift(drift)
+        self.snapshot = snapshot
+        return snapshot
+
+    def _get_drift(self, ledger, exchange_balance, exchange_asset, open_uuids):
+        exchange_volume = 0.0 if exchange_asset is None else exchange_asset[1] + exchange_asset[2]
+        asset_drift = round(exchange_volume - ledger["asset"][1], 8)
+        ledger_uuids = set(ledger["uuids"])
+        return {
+            "balance": max(round(ledger["balance"] - exchange_balance), 0),
+            "asset": asset_drift if abs(asset_drift) > self.VOLUME_TOLERANCE else 0.0,
+            "unknown_orders": [order_uuid for order_uuid in open_uuids if order_uuid not in ledger_uuids],
+            "missing_orders": [order_uuid for order_uuid in ledger_uuids if order_uuid not in open_uuids]}
+
+    def _report_drift(self, drift):
+        if drift is None:
+            return
+
+        self.drift_gauge.set(drift["balance"], kind="balance")
+        self.drift_gauge.set(drift["asset"], kind="asset")
+        self.drift_gauge.set(len(drift["unknown_orders"]), kind="unknown_orders")
+        last_drift = None if self.snapshot is None else self.snapshot.drift
+        is_changed = last_drift is None or any(
+            drift[key] != last_drift[key] for key in ("balance", "asset", "unknown_orders"))
+        # 체결 확인 전인 주문이 있으면 수량 차이가 잠시 생길 수 있으므로 확인된 뒤에 보고한다
+        is_pending = len(drift["missing_orders"]) > 0
+        if is_changed and is_pending is False and (
+            drift["balance"] > 0 or drift["asset"] != 0 or drift["unknown_orders"]):
+            self.logger.warning(f"ledger drift is detected {drift}")
+
+    @staticmethod
+    def _is_settled(snapshot):
+        """ 체결 대기 주문과 체결 확인 전인 주문이 없으면 자주 조회할 필요가 없다 """
+        if len(snapshot.open_orders) > 0:
+            return False
+        return snapshot.drift is None or len(snapshot.drift["missing_orders"]) == 0
+
+    def _reconcile_loop(self):
+        while self.is_running:
+            self.wakeup.clear()
+            start = time.monotonic()
+            snapshot = self.refresh()
+            if snapshot is None or self._is_settled(snapshot):
+                self.interval = min(self.interval * 2, self.max_interval)
+            else:
+                self.interval = self.min_interval
+            self.wakeup.wait(max(self.interval - (time.monotonic() - start), 0))
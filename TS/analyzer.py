@@ -1,10 +1,11 @@
-import copy
 import os
+import sys
 import matplotlib
 import pandas as pd
 
-from datetime import datetime
+from .date_converter import DateConverter
 from .log_manager import LogManager
+from .records import AccountInfo, CandleInfo, Record, TradingRequest, TradingResult
 
 
 class Analyzer:
@@ -18,6 +19,7 @@ class Analyzer:
         asset_info_list: 특정 시점에 기록된 자산 데이터(잔고, 보유 자산, 종목별 딕셔너리) 목록
         score_list: 특정 시점에 기록된 수익률 데이터 목록
         get_asset_info_func: 현재 자산 정보를 요청하기 위한 콜백
+        get_account_snapshot_func: 거래소 계좌 AccountSnapshot을 요청하기 위한 콜백, 없으면 보고서에서 생략
 
     kind: 제공 정보 종류
     0: 거래 데이터
@@ -30,6 +32,7 @@ class Analyzer:
     OUTPUT_FOLDER = "output/"
     RECORD_INTERVAL = 60
     SMA = (5, 20)
+    MEMORY_SAMPLE_COUNT = 50
 
     def __init__(self):
         self.request_list = []
@@ -39,6 +42,7 @@ class Analyzer:
         self.score_list = []
         
         self.get_asset_info_func = None
+        self.get_account_snapshot_func = None
         self.logger = LogManager.get_logger(__class__.__name__)
 
         # 결과 저장 폴더 생성 
@@ -52,35 +56,42 @@ class Analyzer:
         """
         self.get_asset_info_func = get_asset_info_func
 
+    def set_account_snapshot_func(self, get_account_snapshot_func):
+        """
+        거래소 계좌 조회 결과를 보고서에 함께 기록하기 위한 콜백을 설정한다.
+        """
+        self.get_account_snapshot_func = get_account_snapshot_func
+
     def put_trading_info(self, info):
         """
         거래 데이터를 저장한다. 
         """
 
-        new = copy.deepcopy(info)
-        new["kind"] = 0
-        self.info_list.append(new)
+        self.info_list.append(CandleInfo.from_dict(info))
         self.make_periodic_record() 
 
+    def put_backfill(self, info_list):
+        """
+        나중에 채워진 과거 거래 데이터를 저장한다. 변경 사항 기록을 위해 목록 끝에 추가한다.
+        """
+        self.info_list.extend(CandleInfo.from_dict(info) for info in info_list)
+
     def put_requests(self, requests):
         """
         거래 요청 정보를 저장한다. 
         """
 
         for request in requests:
-            new = copy.deepcopy(request)
+            new = TradingRequest.from_dict(request)
 
-            if request["type"] == "cancel":
-                new["price"] = 0
-                new["amount"] = 0
+            if new["type"] == "cancel":
+                if new["price"] != 0 or new["amount"] != 0:
+                    new = new._replace(price=0, amount=0)
             else:
                 # 매수 및 매도 주문 중 주문 가격 및 수량이 0 이하면 저장 하지 않는다. 
-                if float(request["price"]) <=0 or float(request["amount"]) <= 0:
+                if new["price"] <= 0 or new["amount"] <= 0:
                     continue
 
-                new["price"] = float(new["price"])
-                new["amount"] = float(new["amount"])
-            new["kind"] = 1
             self.request_list.append(new)
 
     def put_result(self, result):
@@ -96,11 +107,7 @@ class Analyzer:
             self.logger.warning("Invalid result")
             return
         
-        new = copy.deepcopy(result)
-        new["price"] = float(new["price"])
-        new['amount'] = float(new['amount'])
-        new['kind'] = 2
-        self.result_list.append(new)
+        self.result_list.append(TradingResult.from_dict(result))
         self.update_asset_info() 
 
     def update_asset_info(self):
@@ -118,9 +125,12 @@ class Analyzer:
             self.logger.warning("get_asset_info_func is None")
             return
         
-        asset_info = self.get_asset_info_func()
-        new = copy.deepcopy(asset_info)
-        new["balance"] = float(new["balance"])
+        # 현재가를 알 수 없으면 이번 기록은 건너뛴다, 체결 callback을 전달하는 스레드가 멈추지 않아야 한다
+        try:
+            new = AccountInfo.from_dict(self.get_asset_info_func())
+        except UserWarning as msg:
+            self.logger.warning(f"asset info is not updated {msg}")
+            return
         self.asset_info_list.append(new)
         self.make_score_record(new)
 
@@ -137,11 +147,17 @@ class Analyzer:
         """
         주기적으로 수익률을 기록한다. 
         """
-        now = datetime.now()
-        last = datetime.strptime(self.asset_info_list[-1]["date_time"], self.ISO_DATEFORMAT)
-        delta = now - last
+        if len(self.asset_info_list) == 0:
+            self.update_asset_info()
+            return
+
+        now = DateConverter.now_timestamp()
+        last_info = self.asset_info_list[-1]
+        last = last_info.get("timestamp")
+        if last is None:
+            last = DateConverter.to_timestamp(last_info["date_time"])
 
-        if delta.total_seconds() > self.RECORD_INTERVAL:
+        if now - last > self.RECORD_INTERVAL:
             self.update_asset_info()
 
     def make_score_record(self, new_info):
@@ -251,6 +267,10 @@ class Analyzer:
             self.logger.info(f"Gap                      {last_value - start_value:10}")
             self.logger.info(f"Cumulative return        {last_return:10}")
             self.logger.info(f"Price change ratio       {change_ratio}")
+            snapshot = None if self.get_account_snapshot_func is None else self.get_account_snapshot_func()
+            if snapshot is not None:
+                self.logger.info(
+                    f"Exchange account v{snapshot['version']:<6} {snapshot['balance']} KRW, drift {snapshot.get('drift')}")
             return summary  
 
         except (IndexError, AttributeError):
@@ -262,6 +282,75 @@ class Analyzer:
         """ 거래 결과 목록을 반환 """
         return self.result_list
 
+    def get_state(self):
+        """ 복구를 위한 전체 상태를 반환 """
+        return {name: list(item_list) for name, item_list in self.__get_lists().items()}
+
+    def set_state(self, state):
+        """ get_state로 저장한 상태를 복구 """
+        for name, item_list in self.__get_lists().items():
+            item_list[:] = state.get(name, [])
+
+    def get_new_items(self, counts):
+        """
+        counts(목록별 데이터 개수) 이후에 추가된 데이터를 목록별로 반환
+        make_start_point 등으로 목록이 초기화된 경우 전체를 반환한다.
+        """
+        new_items = {}
+        for name, item_list in self.__get_lists().items():
+            count = counts.get(name, 0)
+            if len(item_list) < count:
+                count = 0
+            if len(item_list) > count:
+                new_items[name] = item_list[count:]
+        return new_items
+
+    def put_new_items(self, new_items):
+        """ get_new_items로 가져온 데이터를 목록에 추가 """
+        lists = self.__get_lists()
+        for name, items in new_items.items():
+            lists[name].extend(items)
+
+    def get_item_counts(self):
+        """ 저장 중인 목록별 데이터 개수 """
+        return {name: len(item_list) for name, item_list in self.__get_lists().items()}
+
+    def get_memory_usage(self):
+        """
+        저장 중인 목록별 대략적인 메모리 사용량(byte)
+        최근 데이터 일부의 크기를 재서 전체 개수만큼 곱한 추정 값
+        """
+        usage = {}
+        for name, item_list in self.__get_lists().items():
+            count = len(item_list)
+            samples = item_list[-self.MEMORY_SAMPLE_COUNT:]
+            sample_size = sum(self.__get_deep_size(item) for item in samples)
+            usage[name] = sys.getsizeof(item_list)
+            if len(samples) > 0:
+                usage[name] += sample_size * count // len(samples)
+        return usage
+
+    def __get_lists(self):
+        return {
+            "info": self.info_list,
+            "request": self.request_list,
+            "result": self.result_list,
+            "asset_info": self.asset_info_list,
+            "score": self.score_list}
+
+    def __get_deep_size(self, item):
+        size = sys.getsizeof(item)
+        if isinstance(item, dict):
+            for key, value in item.items():
+                size += sys.getsizeof(key) + self.__get_deep_size(value)
+        elif isinstance(item, (list, tuple)):
+            for value in item:
+                size += self.__get_deep_size(value)
+        elif isinstance(item, Record):
+            for name in item.__slots__:
+                size += self.__get_deep_size(getattr(item, name))
+        return size
+
     def __get_start_property_value(self):
         return round(self.__get_property_total_value(0))
     
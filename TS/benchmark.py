@@ -0,0 +1,412 @@
+"""
+TS 성능 측정 도구
+
+가상 데이터로 핵심 루프의 각 구성 요소를 측정하고
+결과를 JSON 기준값(baseline)으로 저장하거나 기준값과 비교한다.
+
+Example) python -m TS.benchmark run
+Example) python -m TS.benchmark run --output output/benchmark-base.json
+Example) python -m TS.benchmark run --filter analyzer --baseline output/benchmark-base.json
+Example) python -m TS.benchmark compare output/benchmark-base.json output/benchmark-new.json --threshold 0.1
+"""
+
+import argparse
+import contextlib
+import json
+import logging
+import os
+import platform
+import sys
+import time
+
+from datetime import datetime
+from .analyzer import Analyzer
+from .date_converter import DateConverter
+from .operator import Operator
+from .simulation_data_provider import SimulationDataProvider
+from .simulation_trader import SimulationTrader
+from .strategy_bnh import StrategyBuyAndHold
+from .strategy_bns import StrategyBuyAndSell
+from .tracer import Tracer
+from .worker import Worker
+
+BENCHMARKS = {}
+OUTPUT_FOLDER = "output/"
+DEFAULT_THRESHOLD = 0.1
+
+
+def benchmark(name):
+    """
+    측정 항목 등록용 데코레이터
+
+    등록되는 함수는 (측정할 함수, 측정할 함수가 수행하는 연산 횟수)를 반환하며
+    반복 측정마다 새로 호출되어 상태를 초기화한다.
+    """
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def make_datetime_strs(count, start="2022-10-01T09:00:00"):
+    """ 1분 간격의 KST 시간 문자열 리스트 생성 """
+    start_timestamp = DateConverter.to_timestamp(start)
+    return [DateConverter.from_timestamp(start_timestamp + i * 60) for i in range(count)]
+
+
+def make_account_info(price=29000000.0):
+    """ 가상 계좌 정보 생성 """
+    return {
+        "balance": 1000000.0,
+        "asset": {"BTC": (28000000.0, 0.01)},
+        "quote": {"BTC": price},
+        "date_time": datetime.now().strftime(DateConverter.ISO_DATEFORMAT),
+        "timestamp": DateConverter.now_timestamp()}
+
+
+def make_result(index, date_time="2022-10-01T09:00:00", state="done"):
+    """ 가상 거래 결과 생성 """
+    return {
+        "request": {"id": str(index), "type": "buy", "price": 10000, "amount": 0.0003, "date_time": date_time},
+        "type": "buy",
+        "price": 29000000.0,
+        "amount": 0.0003,
+        "msg": "success",
+        "state": state,
+        "date_time": date_time}
+
+
+def make_analyzer():
+    analyzer = Analyzer()
+    analyzer.initialize(make_account_info)
+    analyzer.make_start_point()
+    return analyzer
+
+
+@benchmark("analyzer.put_trading_info")
+def bench_analyzer_put_trading_info(count=2000):
+    analyzer = make_analyzer()
+    info_list = SimulationDataProvider.make_synthetic_info_list(count, seed=0)
+
+    def run():
+        for info in info_list:
+            analyzer.put_trading_info(info)
+    return run, count
+
+
+@benchmark("analyzer.put_result")
+def bench_analyzer_put_result(count=1000):
+    analyzer = make_analyzer()
+    results = [make_result(index) for index in range(count)]
+
+    def run():
+        for result in results:
+            analyzer.put_result(result)
+    return run, count
+
+
+@benchmark("analyzer.make_score_record")
+def bench_analyzer_make_score_record(count=2000):
+    analyzer = make_analyzer()
+    asset_info = make_account_info(29500000.0)
+
+    def run():
+        for _ in range(count):
+            analyzer.make_score_record(asset_info)
+    return run, count
+
+
+@benchmark("strategy_bns.update_trading_info")
+def bench_bns_update_trading_info(count=5000):
+    strategy = StrategyBuyAndSell()
+    strategy.initialize(1000000)
+    info_list = SimulationDataProvider.make_synthetic_info_list(count, seed=0)
+
+    def run():
+        for info in info_list:
+            strategy.update_trading_info(info)
+    return run, count
+
+
+@benchmark("strategy_bns.get_request")
+def bench_bns_get_request(count=2000):
+    strategy = StrategyBuyAndSell()
+    strategy.initialize(1000000)
+    for info in SimulationDataProvider.make_synthetic_info_list(100, start_price=30000000.0, volatility=0, seed=0):
+        strategy.update_trading_info(info)
+    for index in range(100):
+        strategy.result.append(make_result(index))
+    strategy.last_buy_id = "99"
+
+    # 매도 조건을 만족하는 상태에서 결과 목록을 탐색하는 경로를 측정
+    def run():
+        for _ in range(count):
+            strategy.hold = True
+            strategy.get_request()
+    return run, count
+
+
+@benchmark("strategy_bnh.update_trading_info")
+def bench_bnh_update_trading_info(count=5000):
+    strategy = StrategyBuyAndHold()
+    strategy.initialize(1000000)
+    info_list = SimulationDataProvider.make_synthetic_info_list(count, seed=0)
+
+    def run():
+        for info in info_list:
+            strategy.update_trading_info(info)
+    return run, count
+
+
+@benchmark("strategy_bnh.get_request")
+def bench_bnh_get_request(count=2000):
+    strategy = StrategyBuyAndHold()
+    strategy.initialize(1000000)
+    for info in SimulationDataProvider.make_synthetic_info_list(100, seed=0):
+        strategy.update_trading_info(info)
+    for index in range(5):
+        strategy.waiting_requests[str(index)] = make_result(index, state="requested")
+
+    def run():
+        for _ in range(count):
+            strategy.get_request()
+    return run, count
+
+
+@benchmark("worker.post_task")
+def bench_worker_post_task(count=10000):
+    worker = Worker("Benchmark-Worker")
+    worker.start()
+    task = {"runnable": lambda task: None}
+
+    def run():
+        for _ in range(count):
+            worker.post_task(task)
+        worker.stop()
+    return run, count
+
+
+@benchmark("date_converter.strptime")
+def bench_strptime(count=5000):
+    datetime_strs = make_datetime_strs(count)
+
+    def run():
+        for datetime_str in datetime_strs:
+            datetime.strptime(datetime_str, DateConverter.ISO_DATEFORMAT).timestamp()
+    return run, count
+
+
+@benchmark("date_converter.to_timestamp")
+def bench_to_timestamp(count=5000):
+    datetime_strs = make_datetime_strs(count)
+
+    def run():
+        for datetime_str in datetime_strs:
+            DateConverter.to_timestamp(datetime_str)
+    return run, count
+
+
+@benchmark("date_converter.to_timestamp_array")
+def bench_to_timestamp_array(count=5000):
+    datetime_strs = make_datetime_strs(count)
+
+    def run():
+        DateConverter.to_timestamp_array(datetime_strs)
+    return run, count
+
+
+@benchmark("date_converter.from_timestamp_array")
+def bench_from_timestamp_array(count=5000):
+    timestamps = DateConverter.to_timestamp_array(make_datetime_strs(count))
+
+    def run():
+        DateConverter.from_timestamp_array(timestamps)
+    return run, count
+
+
+@benchmark("operator.iteration")
+def bench_operator_iteration(count=1000):
+    data_provider = SimulationDataProvider(
+        SimulationDataProvider.make_synthetic_info_list(count + 1, seed=0))
+    operator = Operator()
+    operator.initialize(
+        data_provider,
+        StrategyBuyAndSell(),
+        SimulationTrader(data_provider.get_last_price),
+        Analyzer(),
+        budget=1000000)
+    data_provider.get_info()
+    operator.analyzer.make_start_point()
+
+    def run():
+        for _ in range(count):
+            operator.step()
+    return run, count
+
+
+@benchmark("tracer.span_disabled")
+def bench_tracer_span_disabled(count=100000):
+    Tracer.enable(False)
+
+    def run():
+        for _ in range(count):
+            with Tracer.span("benchmark"):
+                pass
+    return run, count
+
+
+@benchmark("tracer.span_enabled")
+def bench_tracer_span_enabled(count=100000):
+    Tracer.enable(True)
+    trace = Tracer.start_trace()
+
+    def run():
+        try:
+            for _ in range(count):
+                with Tracer.span("benchmark", trace):
+                    pass
+        finally:
+            Tracer.enable(False)
+            Tracer.reset()
+    return run, count
+
+
+@contextlib.contextmanager
+def quiet():
+    """ 측정 중 로그와 표준 출력을 끈다 """
+    logging.disable(logging.CRITICAL)
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+def run_benchmarks(name_filter=None, repeat=5, with_log=False):
+    """
+    등록된 항목을 측정한다. 각 항목은 repeat 번 측정 후 가장 빠른 값을 사용한다.
+
+    returns:
+    {
+        "created": 측정 시간,
+        "python": 파이썬 버전,
+        "platform": 플랫폼 정보,
+        "results": {항목 이름: {"ns_per_op": 연산 1회 평균 시간(ns), "ops": 연산 횟수, "repeat": 반복 횟수}}
+    }
+    """
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if name_filter is not None and name_filter not in name:
+            continue
+
+        best = None
+        with contextlib.nullcontext() if with_log else quiet():
+            for _ in range(repeat):
+                run, ops = setup()
+                start = time.perf_counter()
+                run()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+
+        results[name] = {"ns_per_op": best / ops * 1e9, "ops": ops, "repeat": repeat}
+
+    return {
+        "created": datetime.now().strftime(DateConverter.ISO_DATEFORMAT),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results}
+
+
+def save_report(report, filename):
+    """ 측정 결과를 JSON 파일로 저장 """
+    folder = os.path.dirname(filename)
+    if folder and os.path.isdir(folder) is False:
+        os.makedirs(folder)
+
+    with open(filename, "w", encoding="utf-8") as report_file:
+        json.dump(report, report_file, indent=2)
+
+
+def load_report(filename):
+    """ JSON 파일에서 측정 결과를 읽는다 """
+    with open(filename, encoding="utf-8") as report_file:
+        return json.load(report_file)
+
+
+def compare_reports(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """
+    두 측정 결과를 비교해서 threshold 비율 이상 느려진 항목을 찾는다.
+
+    returns: [(항목 이름, 기준 ns, 현재 ns, 변화율, 성능 저하 여부)]
+    """
+    rows = []
+    for name, result in current["results"].items():
+        if name not in baseline["results"]:
+            continue
+        base_ns = baseline["results"][name]["ns_per_op"]
+        current_ns = result["ns_per_op"]
+        change = current_ns / base_ns - 1 if base_ns > 0 else 0
+        rows.append((name, base_ns, current_ns, change, change > threshold))
+    return rows
+
+
+def print_report(report):
+    for name, result in report["results"].items():
+        print(f"{name:40} {result['ns_per_op']:14.1f} ns/op")
+
+
+def print_comparison(rows, threshold):
+    print(f"{'benchmark':40} {'baseline':>14} {'current':>14} {'change':>8}")
+    for name, base_ns, current_ns, change, is_regression in rows:
+        mark = "  REGRESSION" if is_regression else ""
+        print(f"{name:40} {base_ns:14.1f} {current_ns:14.1f} {change * 100:7.1f}%{mark}")
+
+    regressions = [row for row in rows if row[4]]
+    print(f"{len(regressions)} regression(s) over {threshold * 100:.0f}%")
+    return len(regressions) == 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m TS.benchmark")
+    subparsers = parser.add_subparsers(dest="command")
+
+    run_parser = subparsers.add_parser("run", help="run benchmarks")
+    run_parser.add_argument("--filter", help="run benchmarks whose name contains the text", default=None)
+    run_parser.add_argument("--repeat", help="repeat count per benchmark", type=int, default=5)
+    run_parser.add_argument("--output", help="JSON file to save the result", default=None)
+    run_parser.add_argument("--baseline", help="JSON baseline to compare with", default=None)
+    run_parser.add_argument("--threshold", help="regression threshold ratio", type=float, default=DEFAULT_THRESHOLD)
+    run_parser.add_argument("--with_log", help="keep logging and print while measuring", action="store_true")
+
+    compare_parser = subparsers.add_parser("compare", help="compare two saved results")
+    compare_parser.add_argument("baseline", help="JSON baseline")
+    compare_parser.add_argument("current", help="JSON result to check")
+    compare_parser.add_argument("--threshold", help="regression threshold ratio", type=float, default=DEFAULT_THRESHOLD)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "compare":
+        is_passed = print_comparison(
+            compare_reports(load_report(args.baseline), load_report(args.current), args.threshold), args.threshold)
+        return 0 if is_passed else 1
+
+    if args.command is None:
+        args = run_parser.parse_args([])
+
+    report = run_benchmarks(args.filter, args.repeat, args.with_log)
+    print_report(report)
+
+    output = args.output
+    if output is None:
+        output = OUTPUT_FOLDER + f"benchmark-{datetime.now().strftime('%y%m%d.%H%M%S')}.json"
+    save_report(report, output)
+    print(f"saved to {output}")
+
+    if args.baseline is not None:
+        is_passed = print_comparison(compare_reports(load_report(args.baseline), report, args.threshold), args.threshold)
+        return 0 if is_passed else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+from .date_converter import DateConverter
+from .records import CandleInfo
+
+
+class CandleAggregator:
+    """
+    체결 정보를 받아서 여러 주기의 캔들을 직접 만드는 클래스
+
+    체결마다 각 주기의 진행 중인 캔들만 갱신하므로 주기가 여러 개여도 체결 조회는 한 번이면 된다.
+    다음 주기의 체결이 들어오거나 close_until로 시간이 지나면 캔들을 완성하고 listener에 알린다.
+    체결이 없던 주기의 캔들은 만들지 않는다.
+
+    market: 거래 시장 종류
+    intervals: 캔들 주기(초) 리스트
+    listener: 캔들이 완성되면 호출할 함수 listener(interval, candle_info)
+    bars: 주기별 진행 중인 캔들 [시작 시간, 시가, 고가, 저가, 종가, 누적 거래 금액, 누적 거래량]
+    closed_until: 주기별 마지막으로 완성된 캔들의 끝 시간, 이전 시간의 체결은 늦게 도착한 것으로 처리
+    late_count: 늦게 도착해서 반영하지 않은 체결 개수, 체결 하나를 한 번만 센다
+    """
+
+    def __init__(self, market="KRW-BTC", intervals=(60,), listener=None):
+        self.market = market
+        self.intervals = sorted(set(int(interval) for interval in intervals))
+        self.listener = listener
+        self.bars = {interval: None for interval in self.intervals}
+        self.closed_until = {interval: 0 for interval in self.intervals}
+        self.late_count = 0
+
+    def put_tick(self, timestamp, price, volume):
+        """
+        체결 하나를 모든 주기의 캔들에 반영한다.
+        이미 완성되었거나 진행 중인 캔들보다 이전 시간의 체결은 반영하지 않고 late_count만 증가시킨다.
+
+        timestamp: 체결 시간 epoch 초
+        """
+        is_late = False
+        for interval in self.intervals:
+            start = int(timestamp) // interval * interval
+            bar = self.bars[interval]
+            # 체결이 없던 주기 때문에 closed_until보다 진행 중인 캔들의 시작 시간이 더 늦을 수 있다
+            if start < self.closed_until[interval] or (bar is not None and start < bar[0]):
+                is_late = True
+                continue
+
+            if bar is None or start > bar[0]:
+                if bar is not None:
+                    self._close(interval, bar)
+                self.bars[interval] = [start, price, price, price, price, price * volume, volume]
+                continue
+
+            if price > bar[2]:
+                bar[2] = price
+            if price < bar[3]:
+                bar[3] = price
+            bar[4] = price
+            bar[5] += price * volume
+            bar[6] += volume
+
+        if is_late:
+            self.late_count += 1
+
+    def close_until(self, timestamp):
+        """ 체결이 없더라도 timestamp 까지 끝난 주기의 캔들을 완성한다 """
+        for interval in self.intervals:
+            bar = self.bars[interval]
+            if bar is not None and bar[0] + interval <= timestamp:
+                self._close(interval, bar)
+                self.bars[interval] = None
+
+    def get_bar(self, interval=None):
+        """ 진행 중인 캔들 정보, 없으면 None """
+        interval = self.intervals[0] if interval is None else interval
+        bar = self.bars[interval]
+        return None if bar is None else self._to_candle_info(bar)
+
+    def _close(self, interval, bar):
+        self.closed_until[interval] = bar[0] + interval
+        if self.listener is not None:
+            self.listener(interval, self._to_candle_info(bar))
+
+    def _to_candle_info(self, bar):
+        return CandleInfo(
+            market=self.market,
+            date_time=DateConverter.from_timestamp(bar[0]),
+            opening_price=bar[1],
+            high_price=bar[2],
+            low_price=bar[3],
+            closing_price=bar[4],
+            acc_price=bar[5],
+            acc_volume=bar[6],
+            timestamp=bar[0])
@@ -0,0 +1,86 @@
+import os
+import pickle
+
+from .candle_pyramid import CandlePyramid
+from .log_manager import LogManager
+
+
+class CandleCache:
+    """
+    완성된 분 캔들 정보를 마켓별 파일로 저장해두는 클래스
+    다시 시작할 때 저장된 이후의 캔들만 서버에서 조회하기 위해 사용한다.
+
+    folder: 캐시 파일 저장 폴더
+    max_count: 마켓별 최대 저장 캔들 개수, 오래된 것부터 삭제
+    pyramids: 마켓별 상위 주기 캔들 CandlePyramid, get_pyramid로 처음 요청할 때 만든다
+    """
+
+    MAX_COUNT = 5000
+
+    def __init__(self, folder="output/candles/", max_count=None):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.folder = folder
+        self.max_count = self.MAX_COUNT if max_count is None else max_count
+        self.pyramids = {}
+
+        if os.path.isdir(folder) is False:
+            os.makedirs(folder)
+
+    def load(self, market):
+        """ 저장된 캔들 정보 리스트를 오래된 순서로 반환, 없으면 빈 리스트 """
+        path = self._get_path(market)
+        if os.path.isfile(path) is False:
+            return []
+
+        try:
+            with open(path, "rb") as cache_file:
+                return pickle.load(cache_file)
+        except (pickle.UnpicklingError, EOFError, ValueError) as msg:
+            self.logger.warning(f"broken candle cache {path} {msg}")
+            return []
+
+    def get_pyramid(self, market):
+        """
+        마켓의 CandlePyramid를 반환한다. 처음 요청할 때 저장된 캔들로 한 번 만들고
+        이후에는 save와 put_candle로 들어오는 캔들만 반영한다.
+        """
+        pyramid = self.pyramids.get(market)
+        if pyramid is None:
+            pyramid = CandlePyramid(market)
+            pyramid.put_list(self.load(market))
+            self.pyramids[market] = pyramid
+        return pyramid
+
+    def put_candle(self, market, info):
+        """ 진행 중인 1분 캔들을 CandlePyramid가 있으면 반영한다 """
+        pyramid = self.pyramids.get(market)
+        if pyramid is not None:
+            pyramid.put(info)
+
+    def put_backfill(self, market, info_list):
+        """ 나중에 채워진 1분 캔들을 저장된 캔들과 함께 저장하고 CandlePyramid가 있으면 지난 캔들에 반영 """
+        pyramid = self.pyramids.get(market)
+        if pyramid is not None:
+            pyramid.put_backfill(info_list)
+        self.save(market, self.load(market) + info_list)
+
+    def save(self, market, info_list):
+        """ 캔들 정보 리스트를 시간 순서로 정리해서 저장 """
+        candles = {info["timestamp"]: info for info in info_list}
+        info_list = [candles[timestamp] for timestamp in sorted(candles)][-self.max_count:]
+
+        pyramid = self.pyramids.get(market)
+        if pyramid is not None:
+            last_minute = pyramid.last_minute
+            pyramid.put_list(
+                info for info in info_list if last_minute is None or info["timestamp"] >= last_minute)
+
+        path = self._get_path(market)
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as cache_file:
+            pickle.dump(info_list, cache_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, path)
+        return info_list
+
+    def _get_path(self, market):
+        return os.path.join(self.folder, f"{market}.pkl")
@@ -0,0 +1,198 @@
+import bisect
+
+from .date_converter import DateConverter
+from .records import CandleInfo
+
+
+class CandlePyramid:
+    """
+    1분 캔들로 5분, 15분, 1시간, 1일 같은 상위 주기 캔들을 미리 만들어 두고 갱신하는 클래스
+
+    새로운 1분 캔들이 들어오면 주기별로 진행 중인 캔들 하나만 갱신하므로
+    상위 주기 조회 때 1분 캔들 전체를 다시 묶을 필요가 없다.
+    진행 중인 1분 캔들이 여러 번 갱신되는 경우를 위해 주기별로 마지막 1분을 제외한 합계를 따로 보관한다.
+    일 캔들은 업비트와 같이 UTC 0시(KST 9시)에 시작한다.
+
+    market: 거래 시장 종류
+    intervals: 상위 주기(분) 리스트
+    max_count: 주기별 최대 보관 캔들 개수, 오래된 것부터 삭제
+    """
+
+    INTERVALS = (5, 15, 60, 1440)
+    MAX_COUNT = 5000
+
+    def __init__(self, market="KRW-BTC", intervals=None, max_count=None):
+        self.market = market
+        self.intervals = tuple(self.INTERVALS if intervals is None else intervals)
+        max_count = self.MAX_COUNT if max_count is None else max_count
+        self.levels = {interval: _Level(interval * 60, max_count) for interval in self.intervals}
+        self.last_minute = None
+        self.last_values = None
+        self.late_count = 0
+
+    def put(self, info):
+        """
+        1분 캔들 하나를 반영한다. 마지막 1분과 같은 시간이면 갱신으로 처리하고
+        그보다 오래된 캔들은 반영하지 않는다.
+
+        returns: 반영 여부
+        """
+        timestamp = info["timestamp"]
+        values = (
+            info["opening_price"], info["high_price"], info["low_price"],
+            info["closing_price"], info.get("acc_price") or 0, info.get("acc_volume") or 0)
+
+        if self.last_minute is not None and timestamp < self.last_minute:
+            self.late_count += 1
+            return False
+
+        previous = self.last_values if self.last_minute is not None and timestamp > self.last_minute else None
+        self.last_minute = timestamp
+        self.last_values = values
+        for level in self.levels.values():
+            level.put(timestamp, values, previous)
+        return True
+
+    def put_list(self, info_list):
+        """ 오래된 순서의 1분 캔들 리스트를 반영한다 """
+        for info in info_list:
+            self.put(info)
+
+    def put_backfill(self, info_list):
+        """
+        실시간으로 받지 못했다가 나중에 채워진 1분 캔들 리스트를 반영한다.
+        마지막 1분보다 오래된 캔들도 해당 시간의 주기 캔들에 더하므로 이미 반영된 1분을 다시 넣으면 안 된다.
+        """
+        for info in info_list:
+            timestamp = info["timestamp"]
+            if self.last_minute is None or timestamp >= self.last_minute:
+                self.put(info)
+                continue
+
+            values = (
+                info["opening_price"], info["high_price"], info["low_price"],
+                info["closing_price"], info.get("acc_price") or 0, info.get("acc_volume") or 0)
+            for level in self.levels.values():
+                level.backfill(timestamp, values)
+
+    def get_range(self, interval, start=None, end=None):
+        """
+        주기 캔들 중 시작 시간이 start 이상 end 미만인 캔들을 오래된 순서로 반환, 진행 중인 캔들 포함
+
+        interval: 주기(분), intervals 중 하나
+        start, end: epoch 초, 없으면 범위 제한 없음
+        """
+        level = self.levels[interval]
+        first = 0 if start is None else bisect.bisect_left(level.starts, start)
+        last = len(level.starts) if end is None else bisect.bisect_left(level.starts, end)
+        return [self._to_candle_info(interval, level.starts[index], level.bars[index]) for index in range(first, last)]
+
+    def get_latest(self, interval, count=1):
+        """ 주기 캔들 중 최근 count 개를 오래된 순서로 반환, 진행 중인 캔들 포함 """
+        level = self.levels[interval]
+        first = max(len(level.starts) - count, 0)
+        return [
+            self._to_candle_info(interval, level.starts[index], level.bars[index])
+            for index in range(first, len(level.starts))]
+
+    def _to_candle_info(self, interval, start, bar):
+        return CandleInfo(
+            market=self.market,
+            date_time=DateConverter.from_timestamp(start),
+            opening_price=bar[0],
+            high_price=bar[1],
+            low_price=bar[2],
+            closing_price=bar[3],
+            acc_price=bar[4],
+            acc_volume=bar[5],
+            timestamp=start)
+
+
+class _Level:
+    """
+    한 주기의 캔들 목록
+
+    starts: 캔들 시작 시간 리스트
+    bars: [시가, 고가, 저가, 종가, 누적 거래 금액, 누적 거래량] 리스트, 마지막이 진행 중인 캔들
+    minutes: 캔들별 [첫 1분, 마지막 1분] 시간 리스트, 나중에 채워진 1분의 시가, 종가 반영에 사용
+    base: 진행 중인 캔들에서 마지막 1분을 제외한 합계
+    """
+
+    def __init__(self, size, max_count):
+        self.size = size
+        self.max_count = max_count
+        self.starts = []
+        self.bars = []
+        self.minutes = []
+        self.base = None
+
+    def put(self, timestamp, values, previous):
+        """
+        previous: 새로운 1분이면 직전 1분 캔들 값, 마지막 1분의 갱신이면 None
+        """
+        start = timestamp // self.size * self.size
+        if len(self.starts) == 0 or start > self.starts[-1]:
+            self.starts.append(start)
+            self.bars.append(list(values))
+            self.minutes.append([timestamp, timestamp])
+            self.base = None
+            if len(self.starts) > self.max_count:
+                del self.starts[0]
+                del self.bars[0]
+                del self.minutes[0]
+            return
+
+        if previous is not None:
+            self.base = _merge(self.base, previous)
+        self.bars[-1] = _merge(self.base, values)
+        self.minutes[-1][1] = timestamp
+
+    def backfill(self, timestamp, values):
+        """ 진행 중인 마지막 1분보다 오래된 1분 캔들을 해당 시간의 캔들에 더한다 """
+        start = timestamp // self.size * self.size
+        index = bisect.bisect_left(self.starts, start)
+        if index == len(self.starts) or self.starts[index] != start:
+            # 보관 개수를 넘는 오래된 캔들은 만들지 않는다
+            if index == 0 and len(self.starts) >= self.max_count:
+                return
+            self.starts.insert(index, start)
+            self.bars.insert(index, list(values))
+            self.minutes.insert(index, [timestamp, timestamp])
+            if len(self.starts) > self.max_count:
+                del self.starts[0]
+                del self.bars[0]
+                del self.minutes[0]
+            return
+
+        is_first = timestamp < self.minutes[index][0]
+        _add(self.bars[index], values, is_first, timestamp > self.minutes[index][1])
+        if is_first:
+            self.minutes[index][0] = timestamp
+        elif timestamp > self.minutes[index][1]:
+            self.minutes[index][1] = timestamp
+
+        # 진행 중인 캔들이면 마지막 1분을 제외한 합계에도 더한다
+        if index == len(self.starts) - 1:
+            if self.base is None:
+                self.base = list(values)
+            else:
+                _add(self.base, values, is_first, False)
+
+
+def _add(bar, values, is_first, is_last):
+    if is_first:
+        bar[0] = values[0]
+    if is_last:
+        bar[3] = values[3]
+    bar[1] = max(bar[1], values[1])
+    bar[2] = min(bar[2], values[2])
+    bar[4] += values[4]
+    bar[5] += values[5]
+
+
+def _merge(older, newer):
+    if older is None:
+        return list(newer)
+    return [
+        older[0], max(older[1], newer[1]), min(older[2], newer[2]),
+        newer[3], older[4] + newer[4], older[5] + newer[5]]
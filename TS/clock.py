@@ -0,0 +1,180 @@
+import heapq
+import itertools
+import threading
+import time
+
+from datetime import datetime
+from .scheduler import Scheduler
+
+
+class Clock:
+    """
+    모든 모듈이 함께 사용하는 시계
+
+    현재 시간, 대기, 예약 실행을 직접 time, datetime, threading.Timer로 하지 않고 Clock을 통해서 하면
+    실거래에서는 RealClock으로 실제 시간을, 시뮬레이션과 재생에서는 VirtualClock으로 데이터 시간을 사용한다.
+    set_clock으로 바꾸기 전에는 RealClock을 사용한다.
+
+    성능 측정(perf_counter)과 거래소 요청 제한처럼 실제 시간이어야 하는 곳은 Clock을 사용하지 않는다.
+    """
+
+    clock = None
+
+    @classmethod
+    def set_clock(cls, clock):
+        """ 사용할 시계를 바꾸고 이전 시계를 반환한다. None이면 RealClock """
+        previous = cls.get_clock()
+        cls.clock = RealClock() if clock is None else clock
+        return previous
+
+    @classmethod
+    def get_clock(cls):
+        if cls.clock is None:
+            cls.clock = RealClock()
+        return cls.clock
+
+    @classmethod
+    def is_virtual(cls):
+        return isinstance(cls.get_clock(), VirtualClock)
+
+    @classmethod
+    def time(cls):
+        """ 현재 시간 epoch 초(float) """
+        return cls.get_clock().time()
+
+    @classmethod
+    def monotonic(cls):
+        """ 간격 계산용 시간(초), 뒤로 가지 않는다 """
+        return cls.get_clock().monotonic()
+
+    @classmethod
+    def now_string(cls):
+        """ 현재 시간 %Y-%m-%dT%H:%M:%S 문자열 """
+        return cls.get_clock().now_string()
+
+    @classmethod
+    def sleep(cls, seconds):
+        cls.get_clock().sleep(seconds)
+
+    @classmethod
+    def call_later(cls, delay, callback, key=None):
+        """
+        delay초 뒤에 callback()을 실행하고, cancel()로 취소할 수 있는 객체를 반환한다.
+        key가 같은 예약이 대기 중이면 새로 예약하지 않고 그 예약을 반환한다.
+        """
+        return cls.get_clock().call_later(delay, callback, key)
+
+    @classmethod
+    def advance_to(cls, timestamp):
+        """ VirtualClock이면 timestamp까지 시간을 옮긴다. RealClock이면 아무것도 하지 않는다. """
+        cls.get_clock().advance_to(timestamp)
+
+
+class RealClock:
+    """
+    실제 시간을 사용하는 시계, 예약 실행은 모든 모듈이 함께 사용하는 하나의 Scheduler 스레드에서 실행된다
+
+    scheduler: 예약 실행에 사용할 Scheduler, 없으면 기본 Scheduler
+    """
+
+    ISO_DATEFORMAT = "%Y-%m-%dT%H:%M:%S"
+
+    def __init__(self, scheduler=None):
+        self.scheduler = Scheduler.get_default() if scheduler is None else scheduler
+
+    def time(self):
+        return time.time()
+
+    def monotonic(self):
+        return time.monotonic()
+
+    def now_string(self):
+        return datetime.now().strftime(self.ISO_DATEFORMAT)
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def call_later(self, delay, callback, key=None):
+        return self.scheduler.schedule(delay, callback, key)
+
+    def advance_to(self, timestamp):
+        pass
+
+
+class VirtualClock:
+    """
+    데이터 시간으로 움직이는 가상 시계
+
+    advance_to, sleep으로 시간을 옮길 때만 시간이 흐르고, 그 사이에 예정 시간이 된 예약 실행을
+    예정 시간 순서대로 시간을 옮긴 스레드에서 실행한다. 대기하지 않으므로 CPU가 허용하는 만큼 빠르게 실행된다.
+    시간은 뒤로 가지 않으며 과거 시간으로 옮기는 요청은 무시한다.
+
+    start: 시작 시간 epoch 초
+    """
+
+    ISO_DATEFORMAT = "%Y-%m-%dT%H:%M:%S"
+    KST_OFFSET = 9 * 60 * 60
+
+    def __init__(self, start=0):
+        self.now = float(start)
+        self.timers = []
+        self.keys = {}
+        self.sequence = itertools.count()
+        self.lock = threading.RLock()
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def now_string(self):
+        """ 데이터 시간 문자열과 같은 KST 기준 문자열 """
+        return time.strftime(self.ISO_DATEFORMAT, time.gmtime(int(self.now) + self.KST_OFFSET))
+
+    def sleep(self, seconds):
+        self.advance_to(self.now + seconds)
+
+    def call_later(self, delay, callback, key=None):
+        with self.lock:
+            timer = self.keys.get(key) if key is not None else None
+            if timer is not None and timer.is_cancelled is False:
+                return timer
+
+            timer = _VirtualTimer(callback, key)
+            heapq.heappush(self.timers, (self.now + max(delay, 0), next(self.sequence), timer))
+            if key is not None:
+                self.keys[key] = timer
+        return timer
+
+    def advance_to(self, timestamp):
+        """ timestamp까지 시간을 옮기면서 예정 시간이 된 예약 실행을 실행한다 """
+        while True:
+            with self.lock:
+                if len(self.timers) == 0 or self.timers[0][0] > timestamp:
+                    self.now = max(self.now, float(timestamp))
+                    return
+
+                due, _, timer = heapq.heappop(self.timers)
+                self.now = max(self.now, due)
+                if timer.key is not None and self.keys.get(timer.key) is timer:
+                    del self.keys[timer.key]
+
+            # 예약 실행 안에서 다시 예약하거나 시간을 옮길 수 있으므로 잠금 밖에서 실행
+            timer.run()
+
+
+class _VirtualTimer:
+    """ VirtualClock 예약 실행, threading.Timer와 같이 cancel()로 취소한다 """
+
+    def __init__(self, callback, key=None):
+        self.callback = callback
+        self.key = key
+        self.is_cancelled = False
+
+    def cancel(self):
+        self.is_cancelled = True
+
+    def run(self):
+        if self.is_cancelled is False:
+            self.callback()
@@ -1,17 +1,21 @@
-import uuid
-import jwt
-import requests
 import os
 import threading
 
 from dotenv import load_dotenv
+from .account_reconciler import AccountReconciler
 from .log_manager import LogManager
 from .analyzer import Analyzer
+from .candle_cache import CandleCache
 from .upbit_trader import UpbitTrader
 from .upbit_data_provider import UpbitDataProvider
 from .strategy_bnh import StrategyBuyAndHold
 from .strategy_bns import StrategyBuyAndSell
+from .metrics import MetricsRegistry, MetricsServer
 from .operator import Operator
+from .session_recorder import SessionRecorder
+from .snapshot_manager import SnapshotManager
+from .trade_journal import TradeJournal
+from .tracer import Tracer
 
 load_dotenv(verbose=True)
 
@@ -31,9 +35,25 @@ class Controller:
         self.budget = None
         self.is_initialized = False
         self.command_list = []
+        self.metrics_server = None
+        self.trader = UpbitTrader()
+        self.session_recorder = None
+
+        # TS_RECORD_FILE 이 설정된 경우 데이터와 거래소 응답을 기록, 값이 비어 있으면 기본 파일 이름 사용
+        if os.environ.get("TS_RECORD_FILE") is not None:
+            self.session_recorder = SessionRecorder(os.environ["TS_RECORD_FILE"] or None)
+            self.session_recorder.start({"market": self.trader.MARKET})
+            self.trader.upbit_api = self.session_recorder.wrap(
+                self.trader.upbit_api, "api", SessionRecorder.API_METHODS)
+        self.account_reconciler = AccountReconciler(self.trader.upbit_api)
         self.create_command()
         LogManager.set_stream_level(30)
 
+        # TS_METRICS_PORT 가 설정된 경우 지표 서버 실행
+        if os.environ.get("TS_METRICS_PORT") is not None:
+            self.metrics_server = MetricsServer()
+            self.metrics_server.start()
+
 
     def create_command(self):
         """ 명령어 정보를 생성한다. """
@@ -71,26 +91,51 @@ class Controller:
                 "cmd": ["query"],
                 "short": ["q"],
                 "need_value": True,
-                "value_guide": "무엇을 조회할까요? (Ex 1.state, 2.score, 3.result, 4.account info) :",
+                "value_guide": "무엇을 조회할까요? (Ex 1.state, 2.score, 3.result, 4.account info, 5.trace, 6.metrics, 7.exchange account) :",
                 "action_with_value": self._on_query_command,
             },
         ]
 
     def main(self):
         """ main 함수 """
-        budgetible = float(self._get_budgitable())
-        self.budget = input(f"시드머니 값 입력 (현재 거래 가능 금액: {budgetible}) :")           
-        self.budget = float(self.budget) 
+        snapshot_manager = SnapshotManager()
+        is_restoring = False
+        loaded = None
+        if snapshot_manager.has_snapshot():
+            is_restoring = input("저장된 상태로 복구할까요? (y/n) :").lower() in ["y", "yes"]
+
+        if is_restoring:
+            # snapshot과 delta log는 한 번만 읽어서 복구에 그대로 사용
+            loaded = snapshot_manager.load()
+            self.budget = loaded[0]["budget"]
+        else:
+            snapshot_manager.clear()
+            budgetible = float(self._get_budgitable())
+            self.budget = input(f"시드머니 값 입력 (현재 거래 가능 금액: {budgetible}) :")           
+            self.budget = float(self.budget) 
+            assert self.budget <= budgetible
         self.logger.debug(f"Start trading seed: {self.budget}")
-        
-        assert self.budget <= budgetible
+
+        data_provider = UpbitDataProvider(candle_cache=CandleCache())
+        strategy = StrategyBuyAndSell()
+        trader = self.trader
+        if self.session_recorder is not None:
+            self.session_recorder.set_meta(budget=self.budget, strategy=strategy.name)
+            data_provider = self.session_recorder.wrap(data_provider, "data", SessionRecorder.DATA_METHODS)
+            trader = self.session_recorder.wrap(trader, "trader", SessionRecorder.TRADER_METHODS)
 
         self.operator.initialize(
-            UpbitDataProvider(),
-            StrategyBuyAndSell(),
-            UpbitTrader(),
+            data_provider,
+            strategy,
+            trader,
             Analyzer(),
             budget=self.budget)
+        self.trader.set_account_reconciler(self.account_reconciler)
+        self.account_reconciler.start()
+        self.operator.set_snapshot_manager(snapshot_manager)
+        self.operator.set_trade_journal(TradeJournal())
+        if is_restoring:
+            self.operator.restore(loaded)
 
         print("=============== TS is intialized ===============")
         print(f"Start Seed Money:{self.budget}")
@@ -122,6 +167,13 @@ class Controller:
         """ 프로그램 종료 """
         print("프로그램 종료 중 ....")
         self.stop()
+        self.account_reconciler.stop()
+        if self.operator.trade_journal is not None:
+            self.operator.trade_journal.close()
+        if self.session_recorder is not None:
+            self.session_recorder.close()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
         self.terminating = True
         print("Good Bye~")
 
@@ -160,32 +212,20 @@ class Controller:
         elif key in ["result", "3"]:
             print(self.operator.get_trading_results())
         elif key in ["result", "4"]:
-            print(self.operator.trader.get_account_info())
+            try:
+                print(self.operator.trader.get_account_info())
+            except UserWarning as msg:
+                print(f"계좌 정보를 조회할 수 없습니다. {msg}")
+        elif key in ["trace", "5"]:
+            print(Tracer.format_report())
+        elif key in ["metrics", "6"]:
+            print(MetricsRegistry.render())
+        elif key in ["exchange", "7"]:
+            print(self.account_reconciler.get_snapshot())
 
     def _get_budgitable(self):
-        ACCESS_KEY = os.environ.get("UPBIT_OPEN_API_ACCESS_KEY", "upbit_access_key")
-        SECRET_KEY = os.environ.get("UPBIT_OPEN_API_SECRET_KEY", "upbit_secret_key")
-        SERVER_URL = os.environ.get("UPBIT_OPEN_API_SERVER_URL", "upbit_server_url")
-
-        payload = {
-            'access_key': ACCESS_KEY,
-            'nonce': str(uuid.uuid4())}
-
-        jwt_token = jwt.encode(payload, SECRET_KEY)
-        authorization = 'Bearer {}'.format(jwt_token)
-        headers = {'Authorization': authorization}
-
-        try:
-            res = requests.get(SERVER_URL + '/v1/accounts', headers=headers)
-            res.raise_for_status()
-            return res.json()[0]["balance"]
-
-        except requests.exceptions.HTTPError as msg:
-            self.logger.error(msg)
-            return None
-        except requests.exceptions.RequestException as msg:
-            self.logger.error(msg)
+        """ 거래소 계좌의 주문 가능 현금, 조회에 실패하면 None """
+        snapshot = self.account_reconciler.refresh()
+        if snapshot is None:
             return None
-        
-
-
+        return snapshot.balance
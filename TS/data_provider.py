@@ -24,3 +24,10 @@ class DataProvider(metaclass=ABCMeta):
         }
         """
 
+    def get_history(self, count):
+        """
+        최근 완성된 count 개의 거래 정보를 오래된 순서로 반환
+        과거 데이터를 제공하지 않는 경우 빈 리스트를 반환한다.
+        """
+        return []
+
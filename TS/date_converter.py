@@ -1,23 +1,30 @@
+import calendar
 import time
+import numpy as np
+
 from datetime import datetime
-from datetime import timedelta
+from functools import lru_cache
+from .clock import Clock
 
 
 class DateConverter:
     """
     날짜와 시간을 변경해주는 클래스
+
+    TS 내부의 시간 문자열(%Y-%m-%dT%H:%M:%S)은 KST 기준이며
+    timestamp는 UTC 기준 epoch 초(int)를 사용한다.
     """
 
     ISO_DATEFORMAT = "%Y-%m-%dT%H:%M:%S"
+    KST_OFFSET = 9 * 60 * 60
+    TIMESTAMP_CACHE_SIZE = 8192
 
     @classmethod
     def from_kst_to_utc_str(cls, datetime_str):
         """
         %Y-%m-%dT%H:%M:%S 형태의 문자열에서 9시간 뺀 표준시간 문자열 반환
         """
-        dt = datetime.strptime(datetime_str, "%Y-%m-%dT%H:%M:%S")
-        dt = dt - timedelta(hours=9)
-        return dt.strftime(cls.ISO_DATEFORMAT)
+        return cls.from_timestamp(cls.to_timestamp(datetime_str, is_kst=True), is_kst=False)
     
     @classmethod
     def to_end_min(cls, from_dash_to):
@@ -70,3 +77,96 @@ class DateConverter:
     def to_iso_string(cls, dt):
         """datetime 객체를 %Y-%m-%dT%H:%M:%S 형태의 문자열로 변환하여 반환"""
         return dt.strftime(cls.ISO_DATEFORMAT)  
+
+    @classmethod
+    def now_timestamp(cls):
+        """현재 시간을 epoch 초(int)로 반환, 시뮬레이션에서는 Clock의 데이터 시간"""
+        return int(Clock.time())
+
+    @classmethod
+    def to_timestamp(cls, datetime_str, is_kst=True):
+        """
+        %Y-%m-%dT%H:%M:%S 형태의 문자열을 epoch 초(int)로 변환
+        같은 문자열은 반복해서 파싱하지 않도록 캐시된 결과를 사용한다.
+
+        datetime_str 뒤에 붙은 "+09:00", "Z" 등의 접미사는 무시한다.
+        is_kst: 문자열이 KST 기준이면 True, UTC 기준이면 False
+        """
+        timestamp = _parse_iso_seconds(datetime_str[:19])
+        if is_kst:
+            return timestamp - cls.KST_OFFSET
+        return timestamp
+
+    @classmethod
+    def from_timestamp(cls, timestamp, is_kst=True):
+        """
+        epoch 초를 %Y-%m-%dT%H:%M:%S 형태의 문자열로 변환
+        is_kst: KST 기준 문자열을 원하면 True, UTC 기준이면 False
+        """
+        if is_kst:
+            return _format_iso_seconds(int(timestamp) + cls.KST_OFFSET)
+        return _format_iso_seconds(int(timestamp))
+
+    @classmethod
+    def to_timestamp_array(cls, datetime_strs, is_kst=True):
+        """
+        시간 문자열 배열(리스트, Series 등)을 int64 epoch 초 배열로 한번에 변환
+
+        returns: np.ndarray(dtype=int64)
+        """
+        strs = np.asarray(datetime_strs, dtype="U25")
+        if strs.size == 0:
+            return np.empty(0, dtype=np.int64)
+
+        # "+09:00", "Z" 등 접미사를 제거한 뒤 numpy datetime64로 파싱
+        strs = strs.astype("U19")
+        timestamps = strs.astype("datetime64[s]").astype(np.int64)
+        if is_kst:
+            timestamps -= cls.KST_OFFSET
+        return timestamps
+
+    @classmethod
+    def from_timestamp_array(cls, timestamps, is_kst=True):
+        """
+        epoch 초 배열을 %Y-%m-%dT%H:%M:%S 형태의 문자열 배열로 한번에 변환
+
+        returns: np.ndarray(dtype=str)
+        """
+        timestamps = np.asarray(timestamps, dtype=np.int64)
+        if is_kst:
+            timestamps = timestamps + cls.KST_OFFSET
+        return np.datetime_as_string(timestamps.astype("datetime64[s]"), unit="s")
+
+    @classmethod
+    def from_kst_to_utc_array(cls, datetime_strs):
+        """KST 시간 문자열 배열을 UTC 시간 문자열 배열로 변환"""
+        return cls.from_timestamp_array(cls.to_timestamp_array(datetime_strs, is_kst=True), is_kst=False)
+
+    @classmethod
+    def from_utc_to_kst_array(cls, datetime_strs):
+        """UTC 시간 문자열 배열을 KST 시간 문자열 배열로 변환"""
+        return cls.from_timestamp_array(cls.to_timestamp_array(datetime_strs, is_kst=False), is_kst=True)
+
+
+@lru_cache(maxsize=DateConverter.TIMESTAMP_CACHE_SIZE)
+def _parse_iso_seconds(datetime_str):
+    """
+    YYYY-mm-ddTHH:MM:SS 문자열을 시간대 변환 없이 epoch 초로 변환
+    strptime 대신 고정 위치 슬라이싱으로 파싱한다.
+    """
+    if len(datetime_str) != 19 or datetime_str[4] != "-" or datetime_str[10] != "T":
+        raise ValueError(f"unsupported datetime string {datetime_str}")
+
+    return calendar.timegm((
+        int(datetime_str[0:4]),
+        int(datetime_str[5:7]),
+        int(datetime_str[8:10]),
+        int(datetime_str[11:13]),
+        int(datetime_str[14:16]),
+        int(datetime_str[17:19])))
+
+
+@lru_cache(maxsize=DateConverter.TIMESTAMP_CACHE_SIZE)
+def _format_iso_seconds(timestamp):
+    """epoch 초를 시간대 변환 없이 YYYY-mm-ddTHH:MM:SS 문자열로 변환"""
+    return time.strftime(DateConverter.ISO_DATEFORMAT, time.gmtime(timestamp))
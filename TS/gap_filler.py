@@ -0,0 +1,120 @@
+import threading
+import numpy as np
+
+from .date_converter import DateConverter
+from .log_manager import LogManager
+from .metrics import MetricsRegistry
+from .worker import Worker
+
+
+class GapFiller:
+    """
+    캔들 흐름에서 빠진 구간을 찾아서 별도 스레드에서 채우는 클래스
+
+    실시간으로 받은 캔들의 시간이 마지막 캔들보다 interval 넘게 건너뛰면 그 사이를 빈 구간으로 보고,
+    worker 스레드에서 fetch_func로 한 번에 조회한다. 조회한 캔들은 중복, 구간 밖, 잘못된 가격,
+    주변 가격과 max_deviation 넘게 차이 나는 캔들을 한 번에 걸러낸 뒤 시간 순서로 쌓아두고,
+    pop_candles로 꺼낼 수 있다. 거래가 없던 분은 거래소에도 캔들이 없으므로 채워지지 않는다.
+
+    fetch_func: fetch_func(end, since, count), end(미포함) 이전 since(미포함) 이후의 캔들을 최대 count 개 오래된 순서로 반환
+    interval: 캔들 주기(초)
+    max_deviation: 빈 구간 양 끝 가격과 채운 캔들 종가의 중앙값 대비 허용 변동률
+    """
+
+    MAX_DEVIATION = 0.1
+    MAX_GAP_COUNT = 24 * 60
+
+    gap_counter = MetricsRegistry.counter("ts_candle_gaps_total", "Gaps found in the candle feed")
+    candle_counter = MetricsRegistry.counter("ts_backfill_candles_total", "Backfilled candles by result")
+
+    def __init__(self, fetch_func, interval=60, max_deviation=None):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.fetch_func = fetch_func
+        self.interval = interval
+        self.max_deviation = self.MAX_DEVIATION if max_deviation is None else max_deviation
+        self.worker = Worker("GapFiller-Worker")
+        self.last_timestamp = None
+        self.last_price = None
+        self.candles = []
+        self.lock = threading.Lock()
+
+    def check(self, info):
+        """
+        실시간 캔들을 받을 때마다 호출한다. 빈 구간이 있으면 채우는 작업을 worker에 넘기고 바로 반환한다.
+        """
+        timestamp = info.get("timestamp")
+        if timestamp is None:
+            timestamp = DateConverter.to_timestamp(info["date_time"])
+
+        if self.last_timestamp is not None and timestamp - self.last_timestamp > self.interval:
+            count = (timestamp - self.last_timestamp) // self.interval - 1
+            self.gap_counter.inc()
+            self.logger.warning(
+                f"{count} candles are missing from {DateConverter.from_timestamp(self.last_timestamp)}")
+            self.worker.start()
+            self.worker.post_task({
+                "runnable": self._fill,
+                "since": self.last_timestamp,
+                "end": timestamp,
+                "count": min(count, self.MAX_GAP_COUNT),
+                "prices": (self.last_price, float(info["closing_price"]))})
+
+        if self.last_timestamp is None or timestamp >= self.last_timestamp:
+            self.last_timestamp = timestamp
+            self.last_price = float(info["closing_price"])
+
+    def pop_candles(self):
+        """ 채워진 캔들을 오래된 순서로 꺼낸다, 없으면 빈 리스트 """
+        with self.lock:
+            candles = self.candles
+            self.candles = []
+        return candles
+
+    def stop(self):
+        """ 진행 중인 작업을 끝으로 worker를 종료 """
+        self.worker.stop()
+
+    def validate(self, candles, since, end, prices=()):
+        """
+        since(미포함)와 end(미포함) 사이의 올바른 캔들만 시간 순서로 반환한다.
+        같은 시간의 캔들은 처음 것만 사용하고, 고가와 저가가 시가, 종가를 감싸지 않거나
+        prices와 종가의 중앙값 대비 max_deviation 넘게 차이 나는 캔들은 버린다.
+        """
+        if len(candles) == 0:
+            return []
+
+        timestamps = np.array([candle["timestamp"] for candle in candles], dtype=np.int64)
+        order = np.argsort(timestamps, kind="stable")
+        timestamps = timestamps[order]
+        ohlc = np.array([
+            (candle["opening_price"], candle["high_price"], candle["low_price"], candle["closing_price"])
+            for candle in candles], dtype=np.float64)[order]
+
+        is_valid = (timestamps > since) & (timestamps < end) & (timestamps % self.interval == 0)
+        is_valid[1:] &= timestamps[1:] != timestamps[:-1]
+        is_valid &= (ohlc > 0).all(axis=1)
+        is_valid &= (ohlc[:, 1] >= ohlc.max(axis=1)) & (ohlc[:, 2] <= ohlc.min(axis=1))
+
+        references = np.array([price for price in prices if price is not None], dtype=np.float64)
+        median = np.median(np.concatenate((references, ohlc[is_valid, 3])))
+        if median > 0:
+            is_valid &= np.abs(ohlc[:, 3] / median - 1) <= self.max_deviation
+
+        return [candles[index] for index in order[is_valid]]
+
+    def _fill(self, task):
+        try:
+            candles = self.fetch_func(task["end"], task["since"], task["count"])
+        except UserWarning as msg:
+            self.logger.warning(f"backfill fail {msg}")
+            return
+
+        valid = self.validate(candles, task["since"], task["end"], task["prices"])
+        self.candle_counter.inc(len(valid), result="accepted")
+        self.candle_counter.inc(len(candles) - len(valid), result="rejected")
+        self.logger.info(f"backfill {len(valid)} of {task['count']} missing candles, {len(candles) - len(valid)} rejected")
+        if len(valid) == 0:
+            return
+
+        with self.lock:
+            self.candles.extend(valid)
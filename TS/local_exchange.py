@@ -0,0 +1,772 @@
+"""
+업비트 거래소를 대신하는 로컬 테스트 서버
+
+UpbitAPI가 사용하는 엔드포인트를 그대로 구현하고
+간단한 매칭 엔진으로 주문을 체결시킨다.
+UPBIT_OPEN_API_SERVER_URL 을 이 서버 주소로 설정하면
+네트워크 없이 주문 경로 전체를 테스트하거나 부하 테스트 할 수 있다.
+
+Example) python -m TS.local_exchange --port 8800 --latency 0.05 --fill_ratio 0.5
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import uuid
+import jwt
+import numpy as np
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+from .date_converter import DateConverter
+from .log_manager import LogManager
+
+
+class LocalExchange:
+    """
+    주문 접수, 체결, 취소와 계좌, 체결, 캔들 정보를 시뮬레이션하는 매칭 엔진
+
+    Attributes:
+        price: 종목별 현재가 딕셔너리
+        orders: uuid를 키로 갖는 주문 딕셔너리
+        accounts: 화폐를 키로 갖는 {balance, locked, avg_buy_price} 딕셔너리
+        ticks: 종목별 최근 체결 리스트
+        candles: 종목별 {분 단위 epoch 초: [시가, 고가, 저가, 종가, 누적 거래 금액, 누적 거래량]}
+        latency: 응답 지연 시간(초)
+        fill_ratio: 지정가 주문이 매칭 1회에 체결되는 미체결 잔량의 비율, 1이면 한번에 모두 체결
+                    시장가 주문은 접수 즉시 모두 체결된다
+        rate_limits: 그룹별 초당 최대 요청 수
+    """
+
+    COMMISSION_RATIO = 0.0005
+    MAX_CANDLE_COUNT = 200
+    MAX_TICK_COUNT = 500
+    MIN_VOLUME = 1e-8
+    ORDERBOOK_LEVELS = 15
+    ORDERBOOK_TICK_RATIO = 0.0001
+    RATE_LIMITS = {"order": 8, "default": 30, "quotation": 10}
+
+    def __init__(
+        self,
+        markets=("KRW-BTC",),
+        start_price=29000000.0,
+        krw_balance=10000000.0,
+        latency=0.0,
+        fill_ratio=1.0,
+        volatility=0.0005,
+        history_minutes=1440,
+        rate_limits=None,
+        seed=None):
+
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.lock = threading.RLock()
+        self.random = random.Random(seed)
+        self.markets = list(markets)
+        self.latency = latency
+        self.fill_ratio = fill_ratio
+        self.volatility = volatility
+        self.rate_limits = dict(self.RATE_LIMITS if rate_limits is None else rate_limits)
+        self.rate_buckets = {}
+
+        self.price = {}
+        self.orders = {}
+        self.open_orders = {}
+        self.ticks = {}
+        self.candles = {}
+        self.sequential_id = 0
+        self.accounts = {"KRW": {"balance": float(krw_balance), "locked": 0.0, "avg_buy_price": 0.0}}
+
+        for market in self.markets:
+            self.price[market] = float(start_price)
+            self.ticks[market] = []
+            self.candles[market] = {}
+            self.accounts[self._get_currency(market)] = {"balance": 0.0, "locked": 0.0, "avg_buy_price": 0.0}
+            self._create_history(market, history_minutes, seed)
+
+    def step(self):
+        """
+        가격을 랜덤 워크로 한 틱 움직이고 미체결 주문을 매칭한다.
+        """
+        with self.lock:
+            for market in self.markets:
+                change = self.random.gauss(0, self.volatility)
+                self._put_tick(market, self.price[market] * (1 + change), self.MIN_VOLUME, "bid")
+            self._match_open_orders()
+
+    def set_price(self, market, price):
+        """
+        외부 데이터의 가격으로 체결 정보를 추가해서 현재가를 옮기고 미체결 주문을 매칭한다.
+        가상 데이터와 같은 가격으로 체결시키는 시험에 사용한다.
+        """
+        with self.lock:
+            self._put_tick(market, price, self.MIN_VOLUME, "bid")
+            self._match_open_orders()
+
+    def create_order(self, query):
+        """
+        주문을 접수하고 시장가 주문은 즉시 매칭한다.
+
+        returns: (HTTP status, response)
+        """
+        market = query.get("market")
+        side = query.get("side")
+        ord_type = query.get("ord_type")
+
+        if market not in self.price or side not in ("bid", "ask"):
+            return 400, self._error("invalid_parameter", "market or side is invalid")
+
+        try:
+            price = float(query["price"]) if query.get("price") is not None else None
+            volume = float(query["volume"]) if query.get("volume") is not None else None
+        except ValueError:
+            return 400, self._error("invalid_parameter", "price or volume is not a number")
+
+        if ord_type == "limit" and (price is None or volume is None):
+            return 400, self._error("invalid_parameter", "limit order needs price and volume")
+        if ord_type == "price" and (side != "bid" or price is None):
+            return 400, self._error("invalid_parameter", "market buy order needs price")
+        if ord_type == "market" and (side != "ask" or volume is None):
+            return 400, self._error("invalid_parameter", "market sell order needs volume")
+        if ord_type not in ("limit", "price", "market"):
+            return 400, self._error("invalid_parameter", "unsupported ord_type")
+
+        with self.lock:
+            # 주문에 필요한 금액 또는 수량을 묶어둔다
+            if side == "bid":
+                funds = price * volume if ord_type == "limit" else price
+                reserved = funds * (1 + self.COMMISSION_RATIO)
+                account = self.accounts["KRW"]
+            else:
+                reserved = volume
+                account = self.accounts[self._get_currency(market)]
+
+            if account["balance"] < reserved:
+                return 400, self._error("insufficient_funds_" + side, "not enough balance")
+
+            account["balance"] -= reserved
+            account["locked"] += reserved
+
+            order = {
+                "uuid": str(uuid.uuid4()),
+                "side": side,
+                "ord_type": ord_type,
+                "price": query.get("price"),
+                "state": "wait",
+                "market": market,
+                "created_at": self._now_kst(),
+                "volume": query.get("volume"),
+                "remaining_volume": volume,
+                "remaining_funds": price if ord_type == "price" else None,
+                "reserved": reserved,
+                "reserved_fee": reserved - reserved / (1 + self.COMMISSION_RATIO) if side == "bid" else 0.0,
+                "paid_fee": 0.0,
+                "executed_volume": 0.0,
+                "trades": [],
+            }
+            self.orders[order["uuid"]] = order
+            self.open_orders[order["uuid"]] = order
+
+            if ord_type in ("price", "market"):
+                self._match_order(order)
+            return 201, self._to_response(order)
+
+    def cancel_order(self, order_uuid):
+        """
+        대기중인 주문을 취소하고 묶여있던 금액 또는 수량을 돌려준다.
+
+        returns: (HTTP status, response)
+        """
+        with self.lock:
+            order = self.orders.get(order_uuid)
+            if order is None:
+                return 404, self._error("order_not_found", "주문을 찾지 못했습니다.")
+            if order["state"] != "wait":
+                return 400, self._error("order_not_found", "이미 체결되거나 취소된 주문입니다.")
+
+            self._release_order(order)
+            order["state"] = "cancel"
+            del self.open_orders[order_uuid]
+            return 200, self._to_response(order)
+
+    def get_order(self, order_uuid):
+        """ 주문 하나를 체결 목록과 함께 반환 """
+        with self.lock:
+            order = self.orders.get(order_uuid)
+            if order is None:
+                return 404, self._error("order_not_found", "주문을 찾지 못했습니다.")
+            return 200, self._to_response(order, with_trades=True)
+
+    def get_orders(self, uuids=None, states=None, market=None):
+        """ 조건에 맞는 주문 목록 반환 """
+        with self.lock:
+            if uuids:
+                orders = [self.orders[order_uuid] for order_uuid in uuids if order_uuid in self.orders]
+            else:
+                orders = list(self.orders.values())
+
+            states = states or ["wait"]
+            return 200, [
+                self._to_response(order) for order in orders
+                if order["state"] in states and (market is None or order["market"] == market)]
+
+    def get_accounts(self):
+        """ 보유 자산 목록 반환, KRW가 항상 첫번째 """
+        with self.lock:
+            accounts = []
+            for currency, account in self.accounts.items():
+                accounts.append({
+                    "currency": currency,
+                    "balance": self._to_number_string(account["balance"]),
+                    "locked": self._to_number_string(account["locked"]),
+                    "avg_buy_price": self._to_number_string(account["avg_buy_price"]),
+                    "avg_buy_price_modified": False,
+                    "unit_currency": "KRW"})
+            return 200, accounts
+
+    def get_trade_ticks(self, market, count=1):
+        """ 최근 체결 목록을 최신순으로 반환 """
+        with self.lock:
+            if market not in self.ticks:
+                return 404, self._error("not_found_market", "Code not found")
+
+            count = max(1, min(int(count), self.MAX_TICK_COUNT))
+            return 200, list(reversed(self.ticks[market][-count:]))
+
+    def get_ticker(self, markets):
+        """
+        종목별 현재가 정보를 업비트 응답 형식으로 반환
+
+        markets: 종목 리스트 또는 콤마로 구분한 문자열
+        """
+        if isinstance(markets, str):
+            markets = markets.split(",")
+
+        with self.lock:
+            tickers = []
+            for market in markets:
+                if market not in self.ticks:
+                    return 404, self._error("not_found_market", "Code not found")
+
+                last = self.ticks[market][-1] if self.ticks[market] else None
+                price = self.price[market] if last is None else last["trade_price"]
+                tickers.append({
+                    "market": market,
+                    "trade_price": float(price),
+                    "trade_volume": 0.0 if last is None else last["trade_volume"],
+                    "timestamp": int(time.time() * 1000) if last is None else last["timestamp"]})
+            return 200, tickers
+
+    def get_orderbook(self, markets):
+        """
+        현재가를 중심으로 만든 호가 목록을 업비트 응답 형식으로 반환
+
+        markets: 종목 리스트 또는 콤마로 구분한 문자열
+        """
+        if isinstance(markets, str):
+            markets = markets.split(",")
+
+        with self.lock:
+            orderbooks = []
+            for market in markets:
+                if market not in self.price:
+                    return 404, self._error("not_found_market", "Code not found")
+                orderbooks.append(self._create_orderbook(market))
+            return 200, orderbooks
+
+    def stream_orderbook(self, markets, interval=0.1):
+        """
+        업비트 웹소켓 호가 메시지 형식으로 호가를 계속 반환하는 generator
+        StreamingOrderbookProvider의 connect_func로 사용할 수 있다.
+        """
+        while True:
+            status, orderbooks = self.get_orderbook(markets)
+            if status != 200:
+                raise ValueError(orderbooks["error"]["message"])
+
+            for orderbook in orderbooks:
+                orderbook["type"] = "orderbook"
+                orderbook["code"] = orderbook.pop("market")
+                yield orderbook
+            time.sleep(interval)
+
+    def get_minute_candles(self, market, unit=1, count=1, to=None):
+        """
+        분 캔들 목록을 최신순으로 반환
+
+        to: 마지막 캔들 시간(UTC, 해당 시간 미포함), 없으면 현재 시간
+        """
+        with self.lock:
+            if market not in self.candles:
+                return 404, self._error("not_found_market", "Code not found")
+
+            unit = int(unit)
+            count = max(1, min(int(count), self.MAX_CANDLE_COUNT))
+            if to is None:
+                end = int(time.time()) // 60 * 60 + 60
+            else:
+                end = DateConverter.to_timestamp(to.replace(" ", "T"), is_kst=False)
+
+            end = end // (60 * unit) * (60 * unit)
+            minute_candles = self.candles[market]
+            candles = []
+            bar_start = end - 60 * unit
+            oldest = min(minute_candles) if minute_candles else end
+
+            while len(candles) < count and bar_start >= oldest - 60 * (unit - 1):
+                bar = None
+                for minute in range(bar_start, bar_start + 60 * unit, 60):
+                    candle = minute_candles.get(minute)
+                    if candle is None:
+                        continue
+                    if bar is None:
+                        bar = list(candle)
+                    else:
+                        bar[1] = max(bar[1], candle[1])
+                        bar[2] = min(bar[2], candle[2])
+                        bar[3] = candle[3]
+                        bar[4] += candle[4]
+                        bar[5] += candle[5]
+
+                if bar is not None:
+                    candles.append(self._to_candle_response(market, unit, bar_start, bar))
+                bar_start -= 60 * unit
+            return 200, candles
+
+    def acquire_rate_limit(self, group):
+        """
+        그룹별 초당 요청 수를 확인한다.
+
+        returns: (요청 가능 여부, 이번 초에 남은 요청 수)
+        """
+        limit = self.rate_limits.get(group)
+        if limit is None:
+            return True, None
+
+        with self.lock:
+            now = int(time.time())
+            second, used = self.rate_buckets.get(group, (now, 0))
+            if second != now:
+                second, used = now, 0
+
+            if used >= limit:
+                self.rate_buckets[group] = (second, used)
+                return False, 0
+
+            used += 1
+            self.rate_buckets[group] = (second, used)
+            return True, limit - used
+
+    def _create_history(self, market, history_minutes, seed):
+        """ 현재 시간 이전의 1분 캔들을 랜덤 워크로 생성 """
+        if history_minutes <= 0:
+            return
+
+        generator = np.random.default_rng(seed)
+        now_minute = int(time.time()) // 60 * 60
+        changes = generator.normal(0, self.volatility * 8, history_minutes)
+        closes = self.price[market] * np.exp(np.cumsum(changes[::-1]))[::-1]
+        opens = np.roll(closes, 1)
+        opens[0] = closes[0]
+        spreads = np.abs(generator.normal(0, self.volatility * 4, history_minutes)) * closes
+        volumes = np.abs(generator.normal(1, 0.5, history_minutes))
+
+        for index in range(history_minutes):
+            minute = now_minute - (history_minutes - index) * 60
+            high = max(opens[index], closes[index]) + spreads[index]
+            low = min(opens[index], closes[index]) - spreads[index]
+            self.candles[market][minute] = [
+                float(opens[index]), float(high), float(low), float(closes[index]),
+                float(closes[index] * volumes[index]), float(volumes[index])]
+
+    def _put_tick(self, market, price, volume, ask_bid):
+        """ 체결 정보를 추가하고 현재 분 캔들에 반영 """
+        price = round(price)
+        now = time.time()
+        minute = int(now) // 60 * 60
+        self.price[market] = price
+        self.sequential_id += 1
+
+        candle = self.candles[market].get(minute)
+        if candle is None:
+            self.candles[market][minute] = [price, price, price, price, price * volume, volume]
+        else:
+            candle[1] = max(candle[1], price)
+            candle[2] = min(candle[2], price)
+            candle[3] = price
+            candle[4] += price * volume
+            candle[5] += volume
+
+        self.ticks[market].append({
+            "market": market,
+            "trade_date_utc": time.strftime("%Y-%m-%d", time.gmtime(now)),
+            "trade_time_utc": time.strftime("%H:%M:%S", time.gmtime(now)),
+            "timestamp": int(now * 1000),
+            "trade_price": float(price),
+            "trade_volume": volume,
+            "prev_closing_price": float(price),
+            "change_price": 0.0,
+            "ask_bid": "ASK" if ask_bid == "ask" else "BID",
+            "sequential_id": self.sequential_id})
+
+        if len(self.ticks[market]) > self.MAX_TICK_COUNT * 2:
+            del self.ticks[market][:-self.MAX_TICK_COUNT]
+
+    def _create_orderbook(self, market):
+        """ 현재가 위아래로 ORDERBOOK_LEVELS 단계의 호가와 랜덤 잔량을 만든다 """
+        price = self.price[market]
+        tick = max(round(price * self.ORDERBOOK_TICK_RATIO), 1)
+        best_ask = (price // tick + 1) * tick
+        best_bid = best_ask - tick
+        units = []
+        for level in range(self.ORDERBOOK_LEVELS):
+            units.append({
+                "ask_price": best_ask + tick * level,
+                "bid_price": best_bid - tick * level,
+                "ask_size": round(self.random.uniform(0.001, 1), 8),
+                "bid_size": round(self.random.uniform(0.001, 1), 8)})
+        return {
+            "market": market,
+            "timestamp": int(time.time() * 1000),
+            "total_ask_size": sum(unit["ask_size"] for unit in units),
+            "total_bid_size": sum(unit["bid_size"] for unit in units),
+            "orderbook_units": units}
+
+    def _match_open_orders(self):
+        for order in list(self.open_orders.values()):
+            self._match_order(order)
+
+    def _match_order(self, order):
+        """ 현재가 기준으로 주문을 fill_ratio 만큼 체결 """
+        market = order["market"]
+        price = self.price[market]
+
+        if order["ord_type"] == "limit":
+            limit_price = float(order["price"])
+            if (order["side"] == "bid" and price > limit_price) or (
+                order["side"] == "ask" and price < limit_price):
+                return
+            price = limit_price
+
+        fill_ratio = self.fill_ratio if order["ord_type"] == "limit" else 1
+        if order["ord_type"] == "price":
+            volume = order["remaining_funds"] / price
+            order["remaining_funds"] = 0
+            is_finished = True
+        else:
+            volume = order["remaining_volume"] * fill_ratio
+            if order["remaining_volume"] - volume < self.MIN_VOLUME:
+                volume = order["remaining_volume"]
+            order["remaining_volume"] -= volume
+            is_finished = order["remaining_volume"] <= self.MIN_VOLUME
+
+        self._settle_trade(order, price, volume)
+        self._put_tick(market, price, volume, order["side"])
+
+        if is_finished:
+            order["state"] = "done"
+            self._release_order(order)
+            del self.open_orders[order["uuid"]]
+
+    def _settle_trade(self, order, price, volume):
+        """ 체결된 만큼 계좌 잔고와 평균 매수가를 반영 """
+        funds = price * volume
+        fee = funds * self.COMMISSION_RATIO
+        krw = self.accounts["KRW"]
+        coin = self.accounts[self._get_currency(order["market"])]
+
+        if order["side"] == "bid":
+            cost = funds + fee
+            krw["locked"] -= cost
+            order["reserved"] -= cost
+            total_volume = coin["balance"] + coin["locked"] + volume
+            coin["avg_buy_price"] = (
+                coin["avg_buy_price"] * (coin["balance"] + coin["locked"]) + funds) / total_volume
+            coin["balance"] += volume
+        else:
+            coin["locked"] -= volume
+            order["reserved"] -= volume
+            krw["balance"] += funds - fee
+
+        order["paid_fee"] += fee
+        order["executed_volume"] += volume
+        order["trades"].append({
+            "market": order["market"],
+            "uuid": str(uuid.uuid4()),
+            "price": self._to_number_string(price),
+            "volume": self._to_number_string(volume),
+            "funds": self._to_number_string(funds),
+            "created_at": self._now_kst(),
+            "side": order["side"]})
+
+    def _release_order(self, order):
+        """ 주문에 묶여 있던 나머지 금액 또는 수량을 잔고로 되돌린다 """
+        if order["side"] == "bid":
+            account = self.accounts["KRW"]
+        else:
+            account = self.accounts[self._get_currency(order["market"])]
+
+        account["locked"] -= order["reserved"]
+        account["balance"] += order["reserved"]
+        order["reserved"] = 0.0
+
+    def _to_response(self, order, with_trades=False):
+        response = {
+            "uuid": order["uuid"],
+            "side": order["side"],
+            "ord_type": order["ord_type"],
+            "price": order["price"],
+            "state": order["state"],
+            "market": order["market"],
+            "created_at": order["created_at"],
+            "volume": order["volume"],
+            "remaining_volume": None if order["volume"] is None else self._to_number_string(order["remaining_volume"]),
+            "reserved_fee": self._to_number_string(order["reserved_fee"]),
+            "remaining_fee": self._to_number_string(max(order["reserved_fee"] - order["paid_fee"], 0)),
+            "paid_fee": self._to_number_string(order["paid_fee"]),
+            "locked": self._to_number_string(order["reserved"]),
+            "executed_volume": self._to_number_string(order["executed_volume"]),
+            "trades_count": len(order["trades"]),
+        }
+        if with_trades:
+            response["trades"] = list(order["trades"])
+        return response
+
+    @staticmethod
+    def _to_candle_response(market, unit, bar_start, bar):
+        return {
+            "market": market,
+            "candle_date_time_utc": DateConverter.from_timestamp(bar_start, is_kst=False),
+            "candle_date_time_kst": DateConverter.from_timestamp(bar_start),
+            "opening_price": bar[0],
+            "high_price": bar[1],
+            "low_price": bar[2],
+            "trade_price": bar[3],
+            "timestamp": (bar_start + 60 * unit) * 1000 - 1,
+            "candle_acc_trade_price": bar[4],
+            "candle_acc_trade_volume": bar[5],
+            "unit": unit}
+
+    @staticmethod
+    def _get_currency(market):
+        return market.split("-")[1]
+
+    @staticmethod
+    def _now_kst():
+        return DateConverter.from_timestamp(DateConverter.now_timestamp()) + "+09:00"
+
+    @staticmethod
+    def _to_number_string(value):
+        return f"{value:.8f}".rstrip("0").rstrip(".")
+
+    @staticmethod
+    def _error(name, message):
+        return {"error": {"name": name, "message": message}}
+
+
+class LocalExchangeServer:
+    """
+    LocalExchange를 업비트 Open API와 같은 HTTP 인터페이스로 제공하는 서버
+
+    JWT 토큰의 access_key와 query_hash를 검증하며,
+    별도의 스레드에서 주기적으로 매칭 엔진을 동작시킨다.
+    """
+
+    MATCHING_INTERVAL = 0.1
+
+    def __init__(self, exchange=None, access_key=None, secret_key=None, host="127.0.0.1", port=0):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.exchange = exchange if exchange is not None else LocalExchange()
+        self.access_key = access_key or os.environ.get("UPBIT_OPEN_API_ACCESS_KEY", "upbit_access_key")
+        self.secret_key = secret_key or os.environ.get("UPBIT_OPEN_API_SECRET_KEY", "upbit_secret_key")
+        self.httpd = ThreadingHTTPServer((host, port), self._create_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+        self.matching_thread = None
+        self.is_running = False
+
+    @property
+    def url(self):
+        """ UPBIT_OPEN_API_SERVER_URL 로 사용할 서버 주소 """
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """ 서버와 매칭 스레드를 시작한다 """
+        if self.thread is not None:
+            return
+
+        self.is_running = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+        def matching_looper():
+            while self.is_running:
+                self.exchange.step()
+                time.sleep(self.MATCHING_INTERVAL)
+
+        self.matching_thread = threading.Thread(target=matching_looper, daemon=True)
+        self.matching_thread.start()
+        self.logger.info(f"Local exchange is started at {self.url}")
+
+    def stop(self):
+        """ 서버와 매칭 스레드를 종료한다 """
+        if self.thread is None:
+            return
+
+        self.is_running = False
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
+        self.matching_thread.join()
+        self.thread = None
+        self.matching_thread = None
+
+    def verify_token(self, authorization, raw_query):
+        """
+        Authorization 헤더의 JWT 토큰을 검증한다.
+
+        returns: 오류 메시지, 정상인 경우 None
+        """
+        if authorization is None or not authorization.startswith("Bearer "):
+            return "jwt token is missing"
+
+        try:
+            payload = jwt.decode(authorization[len("Bearer "):], self.secret_key, algorithms=["HS256"])
+        except jwt.InvalidTokenError as msg:
+            return f"invalid jwt token {msg}"
+
+        if payload.get("access_key") != self.access_key:
+            return "invalid access key"
+
+        if raw_query:
+            query_hashes = {
+                hashlib.sha512(raw_query.encode()).hexdigest(),
+                hashlib.sha512(unquote(raw_query).encode()).hexdigest()}
+            if payload.get("query_hash") not in query_hashes:
+                return "invalid query hash"
+        return None
+
+    def _create_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """ 업비트 Open API 요청 처리 """
+
+            def do_GET(self):
+                self._dispatch("GET")
+
+            def do_POST(self):
+                self._dispatch("POST")
+
+            def do_DELETE(self):
+                self._dispatch("DELETE")
+
+            def log_message(self, format, *args):
+                server.logger.debug(format % args)
+
+            def _dispatch(self, method):
+                parsed = urlparse(self.path)
+                raw_query = parsed.query
+                query = {key: value[-1] for key, value in parse_qs(raw_query).items()}
+                multi_query = parse_qs(raw_query)
+                path = parsed.path.rstrip("/")
+
+                # JSON body로 전달된 주문 파라미터도 지원
+                length = int(self.headers.get("Content-Length") or 0)
+                if length > 0:
+                    try:
+                        body = json.loads(self.rfile.read(length))
+                        query.update({key: str(value) for key, value in body.items()})
+                    except ValueError:
+                        return self._send(400, LocalExchange._error("invalid_body", "body is not json"))
+
+                is_public = path in ("/v1/trades/ticks", "/v1/orderbook", "/v1/ticker") or path.startswith("/v1/candles/")
+                group = "quotation" if is_public else "order" if method != "GET" else "default"
+
+                if server.exchange.latency > 0:
+                    time.sleep(server.exchange.latency * (0.5 + server.exchange.random.random()))
+
+                is_allowed, remaining = server.exchange.acquire_rate_limit(group)
+                if is_allowed is False:
+                    return self._send(
+                        429, LocalExchange._error("too_many_requests", "Too many API requests."), group, remaining)
+
+                if is_public is False:
+                    error = server.verify_token(self.headers.get("Authorization"), raw_query)
+                    if error is not None:
+                        return self._send(401, LocalExchange._error("invalid_query_payload", error), group, remaining)
+
+                exchange = server.exchange
+                if method == "POST" and path == "/v1/orders":
+                    status, response = exchange.create_order(query)
+                elif method == "GET" and path == "/v1/orders":
+                    states = multi_query.get("states[]") or multi_query.get("state")
+                    status, response = exchange.get_orders(multi_query.get("uuids[]"), states, query.get("market"))
+                elif method == "GET" and path == "/v1/order":
+                    status, response = exchange.get_order(query.get("uuid"))
+                elif method == "DELETE" and path == "/v1/order":
+                    status, response = exchange.cancel_order(query.get("uuid"))
+                elif method == "GET" and path == "/v1/accounts":
+                    status, response = exchange.get_accounts()
+                elif method == "GET" and path == "/v1/trades/ticks":
+                    status, response = exchange.get_trade_ticks(query.get("market"), query.get("count", 1))
+                elif method == "GET" and path == "/v1/ticker":
+                    status, response = exchange.get_ticker(multi_query.get("markets[]") or query.get("markets", ""))
+                elif method == "GET" and path == "/v1/orderbook":
+                    markets = multi_query.get("markets[]") or query.get("markets", "")
+                    status, response = exchange.get_orderbook(markets)
+                elif method == "GET" and path.startswith("/v1/candles/minutes/"):
+                    status, response = exchange.get_minute_candles(
+                        query.get("market"), path.split("/")[-1], query.get("count", 1), query.get("to"))
+                else:
+                    status, response = 404, LocalExchange._error("not_found", f"{method} {path}")
+
+                self._send(status, response, group, remaining)
+
+            def _send(self, status, response, group=None, remaining=None):
+                body = json.dumps(response).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                if group is not None and remaining is not None:
+                    self.send_header("Remaining-Req", f"group={group}; min=1800; sec={remaining}")
+                self.end_headers()
+                self.wfile.write(body)
+
+        return Handler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", help="server host", default="127.0.0.1")
+    parser.add_argument("--port", help="server port", type=int, default=8800)
+    parser.add_argument("--market", help="markets separated by comma", default="KRW-BTC")
+    parser.add_argument("--price", help="start price", type=float, default=29000000.0)
+    parser.add_argument("--balance", help="KRW balance", type=float, default=10000000.0)
+    parser.add_argument("--latency", help="response latency (seconds)", type=float, default=0.0)
+    parser.add_argument("--fill_ratio", help="filled ratio of remaining volume per matching", type=float, default=1.0)
+    parser.add_argument("--order_rate", help="order requests per second", type=int, default=8)
+    parser.add_argument("--seed", help="random seed", type=int, default=None)
+    args = parser.parse_args()
+
+    local_exchange = LocalExchange(
+        markets=args.market.split(","),
+        start_price=args.price,
+        krw_balance=args.balance,
+        latency=args.latency,
+        fill_ratio=args.fill_ratio,
+        rate_limits=dict(LocalExchange.RATE_LIMITS, order=args.order_rate),
+        seed=args.seed)
+    exchange_server = LocalExchangeServer(local_exchange, host=args.host, port=args.port)
+    exchange_server.start()
+    print(f"export UPBIT_OPEN_API_SERVER_URL={exchange_server.url}")
+
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        exchange_server.stop()
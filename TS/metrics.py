@@ -0,0 +1,284 @@
+import collections
+import os
+import threading
+import time
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .log_manager import LogManager
+from .tracer import LatencyHistogram
+
+
+class Counter:
+    """ 증가만 하는 값, 라벨 별로 따로 집계한다 """
+
+    TYPE = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def collect(self):
+        """ [(라벨 튜플, 값)] """
+        with self.lock:
+            return list(self.values.items())
+
+
+class Gauge(Counter):
+    """ 임의로 설정되는 값 """
+
+    TYPE = "gauge"
+
+    def set(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = value
+
+
+class CallbackGauge:
+    """
+    수집 시점에 func를 호출해서 값을 계산하는 gauge
+    func는 숫자 또는 [(라벨 딕셔너리, 값)] 리스트를 반환한다.
+    """
+
+    TYPE = "gauge"
+
+    def __init__(self, name, help_text, func):
+        self.name = name
+        self.help_text = help_text
+        self.func = func
+
+    def collect(self):
+        value = self.func()
+        if isinstance(value, list):
+            return [(tuple(sorted(labels.items())), item) for labels, item in value]
+        return [((), value)]
+
+
+class RateGauge:
+    """ 최근 window 초 동안 mark된 횟수를 per 초 단위 비율로 제공하는 gauge """
+
+    TYPE = "gauge"
+
+    def __init__(self, name, help_text, window=60, per=1):
+        self.name = name
+        self.help_text = help_text
+        self.window = window
+        self.per = per
+        self.marks = collections.deque()
+        self.lock = threading.Lock()
+
+    def mark(self):
+        now = time.monotonic()
+        with self.lock:
+            self.marks.append(now)
+            self._expire(now)
+
+    def get_rate(self):
+        now = time.monotonic()
+        with self.lock:
+            self._expire(now)
+            return len(self.marks) * self.per / self.window
+
+    def collect(self):
+        return [((), self.get_rate())]
+
+    def _expire(self, now):
+        while self.marks and self.marks[0] < now - self.window:
+            self.marks.popleft()
+
+
+class Histogram:
+    """ LatencyHistogram을 라벨 별로 관리하는 히스토그램 """
+
+    TYPE = "histogram"
+
+    def __init__(self, name, help_text, buckets=None):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = buckets
+        self.histograms = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            with self.lock:
+                histogram = self.histograms.setdefault(key, LatencyHistogram(self.buckets))
+        histogram.observe(value)
+
+    def collect(self):
+        with self.lock:
+            return list(self.histograms.items())
+
+
+class MetricsRegistry:
+    """
+    TS 운영 지표를 모아서 Prometheus text 형식으로 제공하는 클래스
+
+    같은 이름으로 요청하면 이미 만들어진 지표를 반환하므로
+    각 모듈은 생성 시점에 필요한 지표를 가져와서 사용한다.
+    """
+
+    metrics = {}
+    lock = threading.Lock()
+
+    @classmethod
+    def counter(cls, name, help_text):
+        return cls._get_or_create(name, lambda: Counter(name, help_text))
+
+    @classmethod
+    def gauge(cls, name, help_text):
+        return cls._get_or_create(name, lambda: Gauge(name, help_text))
+
+    @classmethod
+    def rate(cls, name, help_text, window=60, per=1):
+        return cls._get_or_create(name, lambda: RateGauge(name, help_text, window, per))
+
+    @classmethod
+    def histogram(cls, name, help_text, buckets=None):
+        return cls._get_or_create(name, lambda: Histogram(name, help_text, buckets))
+
+    @classmethod
+    def register_callback(cls, name, help_text, func):
+        """ 수집 시점에 계산되는 gauge를 등록한다. 같은 이름이 있으면 교체한다 """
+        with cls.lock:
+            cls.metrics[name] = CallbackGauge(name, help_text, func)
+
+    @classmethod
+    def unregister(cls, name):
+        with cls.lock:
+            cls.metrics.pop(name, None)
+
+    @classmethod
+    def render(cls):
+        """ 모든 지표를 Prometheus text 형식 문자열로 반환 """
+        with cls.lock:
+            metrics = list(cls.metrics.values())
+
+        lines = []
+        for metric in metrics:
+            try:
+                samples = metric.collect()
+            except Exception as msg:  # pylint: disable=broad-except
+                LogManager.get_logger(cls.__name__).warning(f"metric {metric.name} collect fail {msg}")
+                continue
+
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.TYPE}")
+            for labels, value in samples:
+                if metric.TYPE == "histogram":
+                    lines.extend(cls._render_histogram(metric.name, labels, value))
+                else:
+                    lines.append(f"{metric.name}{cls._render_labels(labels)} {cls._render_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def _get_or_create(cls, name, factory):
+        metric = cls.metrics.get(name)
+        if metric is not None:
+            return metric
+        with cls.lock:
+            return cls.metrics.setdefault(name, factory())
+
+    @classmethod
+    def _render_histogram(cls, name, labels, histogram):
+        lines = []
+        accumulated = 0
+        with histogram.lock:
+            counts = list(histogram.counts)
+            count = histogram.count
+            total = histogram.total
+
+        for bucket, bucket_count in zip(histogram.buckets + ("+Inf",), counts):
+            accumulated += bucket_count
+            bucket_labels = labels + (("le", str(bucket)),)
+            lines.append(f"{name}_bucket{cls._render_labels(bucket_labels)} {accumulated}")
+        lines.append(f"{name}_sum{cls._render_labels(labels)} {cls._render_value(total)}")
+        lines.append(f"{name}_count{cls._render_labels(labels)} {count}")
+        return lines
+
+    @staticmethod
+    def _render_labels(labels):
+        if len(labels) == 0:
+            return ""
+        items = []
+        for key, value in labels:
+            value = str(value).replace("\\", "\\\\").replace('"', '\\"')
+            items.append(f'{key}="{value}"')
+        return "{" + ",".join(items) + "}"
+
+    @staticmethod
+    def _render_value(value):
+        if value is None:
+            return "NaN"
+        return repr(float(value))
+
+
+class MetricsServer:
+    """
+    MetricsRegistry의 지표를 /metrics 경로로 제공하는 로컬 HTTP 서버
+    TS_METRICS_PORT 환경 변수로 포트를 지정할 수 있다.
+    """
+
+    DEFAULT_PORT = 9464
+
+    def __init__(self, host="127.0.0.1", port=None):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        if port is None:
+            port = int(os.environ.get("TS_METRICS_PORT", self.DEFAULT_PORT))
+        self.httpd = ThreadingHTTPServer((host, port), self._create_handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def start(self):
+        if self.thread is not None:
+            return
+
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        self.logger.info(f"Metrics server is started at {self.url}")
+
+    def stop(self):
+        if self.thread is None:
+            return
+
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
+        self.thread = None
+
+    def _create_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """ /metrics 요청 처리 """
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+
+                body = MetricsRegistry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                server.logger.debug(format % args)
+
+        return Handler
@@ -0,0 +1,113 @@
+from .clock import Clock
+from .date_converter import DateConverter
+from .quote_cache import QuoteCache
+from .records import AccountInfo
+from .upbit_trader import UpbitTrader
+
+
+class MultiMarketTrader(UpbitTrader):
+    """
+    하나의 계좌로 여러 종목의 주문, 보유 자산, 현재가를 함께 관리하는 UpbitTrader
+
+    거래소 연결(UpbitAPI), 주문 worker, 취소 요청 속도 제한은 모든 종목이 함께 사용하므로
+    종목 수와 관계없이 거래소 요청 제한을 한 곳에서 지킨다.
+    체결 대기 주문은 하나의 order_map에 종목과 함께 보관하고,
+    체결 확인은 모든 종목의 주문 uuid를 한 번에 조회하는 한 번의 과정으로 처리한다.
+    거래 요청의 market 항목으로 주문할 종목을 정하며, 없으면 첫 번째 종목으로 주문한다.
+
+    markets: 거래할 종목 리스트 (Ex. ["KRW-BTC", "KRW-ETH"]), 첫 번째 종목이 기본 종목
+
+    assets: {종목: (평균 매입 가격, 수량)}, asset은 기본 종목의 값과 같다
+    """
+
+    def __init__(self, markets=None):
+        super().__init__()
+        self.markets = tuple(markets) if markets else (self.MARKET,)
+        self.assets = {market: (0, 0) for market in self.markets}
+        self.name = "UpbitMultiMarket"
+        # AccountReconciler와 get_latest_price는 기본 종목을 사용한다
+        self.upbit_api.market = self.markets[0]
+
+    def send_request(self, request_list, callback):
+        """
+        거래 요청을 처리한다. 관리하지 않는 종목의 요청이 있으면 아무것도 요청하지 않는다.
+        """
+        for request in request_list:
+            market = request.get("market")
+            if market is not None and market not in self.assets:
+                raise UserWarning(f"{market} is not managed by this trader")
+        super().send_request(request_list, callback)
+
+    def get_open_orders(self, market=None):
+        """
+        체결 대기 주문을 종목별로 나눠서 반환
+
+        returns: market이 있으면 {request id: order}, 없으면 {종목: {request id: order}}
+        """
+        books = {name: {} for name in self.markets}
+        for request_id, order in list(self.order_map.items()):
+            books.setdefault(self._get_market(order["result"]["request"]), {})[request_id] = order
+        return books if market is None else books.get(market, {})
+
+    def get_ledger(self):
+        """
+        AccountReconciler와 비교할 로컬 장부, 거래소 조회가 기본 종목만 하므로 기본 종목의 자산과 주문만 담는다
+        """
+        return {
+            "balance": self.balance,
+            "asset": self.asset,
+            "uuids": [order["uuid"] for order in self.get_open_orders(self.markets[0]).values()]}
+
+    def get_state(self):
+        """ UpbitTrader 상태에 종목별 보유 자산 assets를 더해서 반환 """
+        state = super().get_state()
+        state["assets"] = dict(self.assets)
+        return state
+
+    def set_state(self, state):
+        super().set_state(state)
+        for market, asset in state.get("assets", {}).items():
+            self.assets[market] = tuple(asset)
+        self.asset = self.assets[self.markets[0]]
+
+    def get_account_info(self):
+        """
+        모든 종목의 보유 자산과 현재가로 계좌 정보를 만든다.
+        현재가는 QuoteCache에 없는 종목만 한 번에 조회하고, 조회에 실패하면 마지막으로 받은 가격을 사용한다.
+        가격을 알 수 없는 종목은 제외한다.
+        """
+        prices = self.upbit_api.get_latest_prices(self.markets)
+        asset = {}
+        quote = {}
+        for market in self.markets:
+            price = prices.get(market)
+            if price is None:
+                price = QuoteCache.get(market, max_age=float("inf"))
+            if price is None:
+                self.logger.warning(f"quote of {market} is not available")
+                continue
+
+            currency = market.split("-")[1]
+            asset[currency] = self.assets[market]
+            quote[currency] = float(price)
+
+        result = AccountInfo(
+            balance=self.balance,
+            asset=asset,
+            quote=quote,
+            date_time=Clock.now_string(),
+            timestamp=DateConverter.now_timestamp())
+
+        self.logger.debug(f"account info | banance: {result['balance']} | {result['asset']} | {result['quote']}")
+        return result
+
+    def _get_market(self, request):
+        return request.get("market") or self.markets[0]
+
+    def _get_asset(self, market):
+        return self.assets.get(market, (0, 0))
+
+    def _set_asset(self, market, asset):
+        self.assets[market] = asset
+        if market == self.markets[0]:
+            self.asset = asset
@@ -2,7 +2,10 @@ import time
 import threading
 
 from datetime import datetime
+from .clock import Clock
 from .log_manager import LogManager
+from .metrics import MetricsRegistry
+from .tracer import Tracer
 from .worker import Worker
 
 
@@ -16,10 +19,15 @@ class Operator:
         strategy: 사용될 Strategy 인스턴스
         trader: 사용될 Trader 인스턴스
         analyzer: 거래 분석용 Analyzer 인스턴스
+        snapshot_manager: 상태 저장 및 복구용 SnapshotManager 인스턴스, 없으면 저장하지 않는다
+        trade_journal: 거래 기록용 TradeJournal 인스턴스, 없으면 기록하지 않는다
+        warm_up_count: 거래 시작 전에 전략에 미리 전달할 과거 데이터 개수, 0이면 사용하지 않는다
     """
 
     ISO_DATEFORMAT = "%Y-%m-%dT%H:%M:%S"
     OUTPUT_FOLDER = "output/"
+    WARM_UP_COUNT = 200
+    CANCEL_TIMEOUT = 5
 
     def __init__(self):
         self.logger = LogManager.get_logger(__class__.__name__)
@@ -30,6 +38,21 @@ class Operator:
 
         self.state = None 
         self.last_report = None
+        self.budget = None
+        self.warm_up_count = self.WARM_UP_COUNT
+
+        self.snapshot_manager = None
+        self.trade_journal = None
+        self.is_restored = False
+        self.logged_counts = {}
+        self.state_lock = threading.RLock()
+
+        self.iteration_counter = MetricsRegistry.counter(
+            "ts_operator_iterations_total", "Trading loop iterations")
+        self.iteration_rate = MetricsRegistry.rate(
+            "ts_operator_iterations_per_second", "Trading loop iterations per second", window=10)
+        self.fetch_latency = MetricsRegistry.histogram(
+            "ts_data_fetch_seconds", "Latency of DataProvider.get_info")
 
     def initialize(self, data_provider, strategy, trader, analyzer, budget):
         """
@@ -44,10 +67,71 @@ class Operator:
         self.strategy = strategy
         self.trader = trader
         self.analyzer = analyzer
+        self.budget = budget
         self.state = "ready"
         self.trader.initialize(budget)
         self.strategy.initialize(budget)
         self.analyzer.initialize(trader.get_account_info)
+        if hasattr(self.trader, "get_account_snapshot"):
+            self.analyzer.set_account_snapshot_func(self.trader.get_account_snapshot)
+        if hasattr(self.trader, "order_listener"):
+            self.trader.order_listener = self._on_order_placed
+        if hasattr(self.data_provider, "bar_listener"):
+            self.data_provider.bar_listener = self._on_bar_closed
+        if hasattr(self.data_provider, "backfill_listener"):
+            self.data_provider.backfill_listener = self._on_backfill
+        self._register_metrics()
+
+    def set_snapshot_manager(self, snapshot_manager):
+        """
+        상태 저장에 사용할 SnapshotManager를 설정한다.
+        주기적으로 전체 상태를 저장하고 그 사이의 변경 사항을 기록한다.
+        """
+        self.snapshot_manager = snapshot_manager
+
+    def set_trade_journal(self, trade_journal):
+        """
+        거래 요청, 주문 접수, 체결 결과, 잔고 변화를 기록할 TradeJournal을 설정하고 쓰기를 시작한다.
+        """
+        self.trade_journal = trade_journal
+        self.trade_journal.start()
+
+    def restore(self, loaded=None):
+        """
+        저장된 snapshot과 변경 사항으로 전략, 거래, 분석 상태를 복구하고
+        체결 대기 중이던 주문만 거래소에 다시 확인한다.
+
+        loaded: 이미 읽은 snapshot_manager.load()의 (snapshot 상태, [변경 사항]), 없으면 새로 읽는다
+        """
+        if self.snapshot_manager is None or self.state != "ready":
+            return False
+
+        state, records = self.snapshot_manager.load() if loaded is None else loaded
+        if state is None:
+            return False
+
+        with self.state_lock:
+            self.strategy.set_state(state["strategy"])
+            self.trader.set_state(state["trader"])
+            self.analyzer.set_state(state["analyzer"])
+            for record in records:
+                self._apply_delta(record)
+            self.logged_counts = self.analyzer.get_item_counts()
+            self.is_restored = True
+
+        self.logger.info(f"state is restored with {len(records)} delta records")
+        self.trader.reconcile_orders(self._send_request_callback)
+        self.snapshot_manager.save_snapshot(self.get_state())
+        return True
+
+    def get_state(self):
+        """ 복구를 위한 전체 상태를 반환 """
+        with self.state_lock:
+            return {
+                "budget": self.budget,
+                "strategy": self.strategy.get_state(),
+                "trader": self.trader.get_state(),
+                "analyzer": self.analyzer.get_state()}
 
     def start(self):
         """
@@ -58,7 +142,15 @@ class Operator:
         
         self.logger.info("====== Start Operating ======")
         self.state = "running" 
-        self.analyzer.make_start_point()
+
+        # 복구된 경우 기존 기록을 이어서 사용
+        if self.is_restored is False:
+            self.warm_up()
+            self.analyzer.make_start_point()
+            if self.snapshot_manager is not None:
+                self.logged_counts = self.analyzer.get_item_counts()
+                self.snapshot_manager.save_snapshot(self.get_state())
+        self.is_restored = False
         self.thread = threading.Thread(target=self._execute_trading, daemon=True)
         self.thread.start()
 
@@ -72,59 +164,200 @@ class Operator:
         self.logger.info("===== Stop operating =====")
         self.state = "terminating"
         
+        # 거래 주기가 끝난 뒤 취소한다. 취소와 남은 주문의 체결 확인은 trader worker에서 실행되므로 그 뒤에 worker를 멈춘다
+        self.thread.join()
+        uncanceled = self.trader.cancel_all_requests(self.CANCEL_TIMEOUT)
+        if uncanceled:
+            self.logger.error(f"uncanceled requests are left {uncanceled}")
         self.trader.worker.stop()
-        self.trader.cancel_all_requests()
         trading_info = self.data_provider.get_info()
         self.analyzer.put_trading_info(trading_info)
         # self.last_report = self.analyzer.create_report(tag=self.tag)
-        self.thread.join()
+        if hasattr(self.data_provider, "stop"):
+            self.data_provider.stop()
+        if self.snapshot_manager is not None:
+            self.snapshot_manager.save_snapshot(self.get_state())
+        if self.trade_journal is not None:
+            self.trade_journal.flush()
         self.state = "ready"
 
+    def warm_up(self):
+        """ 거래 시작 전에 최근 warm_up_count 개의 과거 데이터를 전략에 전달 """
+        if self.warm_up_count <= 0:
+            return
+
+        start = time.perf_counter()
+        try:
+            history = self.data_provider.get_history(self.warm_up_count)
+        except UserWarning as msg:
+            self.logger.warning(f"warm up fail {msg}")
+            return
+
+        self.strategy.warm_up(history)
+        self.logger.info(f"warm up with {len(history)} data in {time.perf_counter() - start:.2f}s")
+
     def _execute_trading(self):
         """
         자동 거래를 실행한다. 
         """
         self.logger.debug("========= trading is started =========")
 
-        # 결과 콜백 함수 
-        def send_request_callback(result):
-            print(result)
-            if result["state"] == "done" and result["type"] == "buy":
-                self.strategy.hold = True
-                self.strategy.last_buy_id = result["request"]["id"]
-            if result["state"] == "done" and result["type"] == "sell":
-                self.strategy.hold = False
-                self.strategy.last_buy_id = None
- 
-            self.strategy.update_result(result)
-            if result["state"] != "requested":
-                self.analyzer.put_result(result)
-        
         # 트레이딩
         try:
             while self.state != "terminating":
+                # 일시적인 조회 실패로 거래를 멈추지 않고, 빠진 캔들은 DataProvider가 나중에 채운다
+                try:
+                    self.step()
+                except UserWarning as msg:
+                    self.logger.warning(f"trading iteration is skipped {msg}")
+                Clock.sleep(1/10)
 
-                # 종목 데이터 전달 
-                trading_info = self.data_provider.get_info()    
-                self.strategy.update_trading_info(trading_info)
-                self.analyzer.put_trading_info(trading_info)
+        except (AttributeError, TypeError) as msg:
+            self.logger.error(f"excuting fail {msg}")
+        return True
 
-                # 시그널 후 주문 생성
-                target_request = self.strategy.get_request()
-                if target_request:
+    def step(self):
+        """
+        종목 데이터를 전달하고 생성된 주문을 요청하는 한 번의 거래 주기를 수행한다.
+        start로 만든 스레드에서 반복 호출하며, 시뮬레이션, 재생, 시험에서는 스레드 없이 직접 호출한다.
+        """
 
-                    print(target_request)
-                    self.logger.debug(f"Trading Signal is made with info : {trading_info}")
-                    self.logger.debug(f"Trading Request is made : {target_request}")
+        trace = Tracer.start_trace()
 
-                    self.analyzer.put_requests(target_request)
-                    self.trader.send_request(target_request, send_request_callback)
-                    
-                time.sleep(1/10)
+        # 종목 데이터 전달 
+        fetch_start = time.perf_counter()
+        with Tracer.span("fetch", trace):
+            trading_info = self.data_provider.get_info()    
+        self.fetch_latency.observe(time.perf_counter() - fetch_start)
+        with Tracer.span("strategy", trace):
+            self.strategy.update_trading_info(trading_info)
+        with Tracer.span("analyzer", trace):
+            self.analyzer.put_trading_info(trading_info)
 
-        except (AttributeError, TypeError) as msg:
-            self.logger.error(f"excuting fail {msg}")
-        return True
+        # 시그널 후 주문 생성
+        with Tracer.span("signal", trace):
+            target_request = self.strategy.get_request()
+        if target_request:
+
+            print(target_request)
+            self.logger.debug(f"Trading Signal is made with info : {trading_info}")
+            self.logger.debug(f"Trading Request is made : {target_request}")
+
+            # 취소 요청은 원래 주문의 추적 정보를 그대로 사용
+            if trace is not None:
+                for request in target_request:
+                    if request["type"] != "cancel":
+                        Tracer.bind(request["id"], trace)
+
+            self.analyzer.put_requests(target_request)
+            if self.trade_journal is not None:
+                for request in target_request:
+                    self.trade_journal.record_request(request)
+            # 거래 요청 queue가 가득 차면 이번 요청은 버리고 다음 주기에 전략이 다시 요청한다
+            try:
+                self.trader.send_request(target_request, self._send_request_callback)
+            except UserWarning as msg:
+                self.logger.warning(f"requests are rejected by the trader {msg}")
+
+        self._record_delta({"kind": "tick", "info": trading_info})
+        if self.snapshot_manager is not None and self.snapshot_manager.is_snapshot_due():
+            self.snapshot_manager.save_snapshot(self.get_state())
+
+        self.iteration_counter.inc()
+        self.iteration_rate.mark()
+
+    def _send_request_callback(self, result):
+        """ 결과 콜백 함수 """
+        print(result)
+        # Trader가 거절하거나 보내기 전에 버린 요청은 결과 없이 "error"로 알려준다
+        if result == "error":
+            self.logger.warning("request is rejected by the trader")
+            return
+        if result["state"] == "done" and result["type"] == "buy":
+            self.strategy.hold = True
+            self.strategy.last_buy_id = result["request"]["id"]
+        if result["state"] == "done" and result["type"] == "sell":
+            self.strategy.hold = False
+            self.strategy.last_buy_id = None
+
+        self.strategy.update_result(result)
+        if result["state"] != "requested":
+            self.analyzer.put_result(result)
+        if self.snapshot_manager is None and self.trade_journal is None:
+            return
+
+        trader_state = self.trader.get_state()
+        self._record_delta({"kind": "result", "result": result, "trader": trader_state})
+        if self.trade_journal is not None:
+            self.trade_journal.record_result(result)
+            if trader_state is not None and result["state"] == "done":
+                self.trade_journal.record_balance(
+                    trader_state["balance"], trader_state["asset"], result["request"]["id"])
+
+    def _on_order_placed(self, request_id, order_uuid, result):
+        """ 거래소에 주문이 접수되면 체결 대기 주문 목록과 주문 접수를 기록 """
+        if self.snapshot_manager is not None:
+            self._record_delta({"kind": "order", "trader": self.trader.get_state()})
+        if self.trade_journal is not None:
+            self.trade_journal.record_order(request_id, order_uuid, result)
+
+    def _on_bar_closed(self, interval, candle_info):
+        """ DataProvider가 만든 캔들이 완성되면 전략에 전달 """
+        self.logger.debug(f"{interval}s candle is closed : {candle_info}")
+        self.strategy.update_closed_candle(interval, candle_info)
+
+    def _on_backfill(self, info_list):
+        """ DataProvider가 빠진 캔들을 채우면 전략과 분석에 전달하고 기록 """
+        self.logger.info(f"{len(info_list)} missing candles are backfilled from {info_list[0]['date_time']}")
+        self.strategy.update_backfill(info_list)
+        self.analyzer.put_backfill(info_list)
+        self._record_delta({"kind": "backfill", "info_list": info_list})
+
+    def _record_delta(self, record):
+        """
+        마지막 기록 이후 분석 데이터와 전략 상태 변경 사항을 record에 더해서 기록한다.
+        """
+        if self.snapshot_manager is None:
+            return
+
+        with self.state_lock:
+            new_items = self.analyzer.get_new_items(self.logged_counts)
+            self.logged_counts = self.analyzer.get_item_counts()
+            record["analyzer"] = new_items
+            record["strategy"] = self.strategy.get_ledger()
+            self.snapshot_manager.append(record)
+
+    def _apply_delta(self, record):
+        """ _record_delta로 기록한 변경 사항을 상태에 반영 """
+        if record["kind"] == "tick":
+            self.strategy.update_trading_info(record["info"])
+        elif record["kind"] == "backfill":
+            self.strategy.update_backfill(record["info_list"])
+        elif record["kind"] == "result" and record["result"]["state"] != "requested":
+            self.strategy.result.append(record["result"])
+
+        if "trader" in record:
+            self.trader.set_state(record["trader"])
+        self.strategy.set_ledger(record["strategy"])
+        self.analyzer.put_new_items(record["analyzer"])
+
+    def _register_metrics(self):
+        """ 수집 시점에 각 모듈 상태를 읽는 지표 등록 """
+        MetricsRegistry.register_callback(
+            "ts_worker_queue_depth", "Tasks waiting in the trader worker queue",
+            lambda: self.trader.worker.task_queue.qsize())
+        MetricsRegistry.register_callback(
+            "ts_order_queue_depth", "Order requests waiting to be sent by the trader",
+            lambda: len(getattr(self.trader, "order_queue", ())))
+        MetricsRegistry.register_callback(
+            "ts_open_orders", "Orders waiting for result in the trader order map",
+            lambda: len(getattr(self.trader, "order_map", {})))
+        MetricsRegistry.register_callback(
+            "ts_analyzer_items", "Items held by the analyzer lists",
+            lambda: [({"list": name}, count) for name, count in self.analyzer.get_item_counts().items()])
+        MetricsRegistry.register_callback(
+            "ts_analyzer_memory_bytes", "Estimated memory held by the analyzer lists",
+            lambda: [({"list": name}, size) for name, size in self.analyzer.get_memory_usage().items()])
 
     def get_trading_results(self):
         """현재까지 거래 결과 기록을 반환한다"""
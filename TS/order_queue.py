@@ -0,0 +1,113 @@
+import collections
+import threading
+
+from .clock import Clock
+from .log_manager import LogManager
+from .metrics import MetricsRegistry
+from .tracer import Tracer
+
+
+class OrderQueue:
+    """
+    거래소에 보내기 전의 거래 요청을 담는 크기 제한 queue
+
+    거래소 응답이 느려져서 요청이 쌓여도 오래된 요청이 늦게 실행되지 않도록 넣을 때와 꺼낼 때 정리한다.
+    - 같은 주문에 대한 취소 요청이 이미 대기 중이면 새 취소 요청은 버린다.
+    - 같은 종목, 같은 방향(buy, sell)의 주문이 대기 중이면 새 주문으로 교체한다.
+    - max_age초보다 오래 기다린 주문은 꺼낼 때 버린다. 취소 요청은 오래되어도 실행한다.
+    - 정리한 뒤에도 max_size개가 차 있으면 UserWarning을 발생시켜 요청한 쪽에 알린다.
+    버려진 요청은 Trader가 거절한 요청과 같이 callback("error")로 알린다. callback은 잠금 밖에서 호출한다.
+
+    max_size: 최대 대기 요청 개수
+    max_age: 주문의 최대 대기 시간(초)
+    """
+
+    MAX_SIZE = 20
+    MAX_AGE = 10
+
+    drop_counter = MetricsRegistry.counter("ts_order_queue_dropped_total", "Order requests dropped before sending")
+
+    def __init__(self, max_size=None, max_age=None):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.max_size = self.MAX_SIZE if max_size is None else max_size
+        self.max_age = self.MAX_AGE if max_age is None else max_age
+        self.entries = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def put(self, request, callback, market=None):
+        """ 거래 요청을 추가한다. 버려지는 요청의 추적 정보는 함께 지운다 """
+        if request["type"] == "cancel":
+            key = ("cancel", request["id"])
+        else:
+            key = ("order", market, request["type"])
+
+        expired = []
+        with self.lock:
+            # 먼저 들어온 취소 요청을 그대로 둔다
+            if key[0] == "cancel" and key in self.entries:
+                self.drop_counter.inc(reason="duplicate_cancel")
+                return
+
+            previous = self.entries.pop(key, None)
+            if previous is None and len(self.entries) >= self.max_size:
+                expired = self._drop_expired(Clock.monotonic())
+                if len(self.entries) >= self.max_size:
+                    self.drop_counter.inc(reason="full")
+                    self._reject(expired)
+                    raise UserWarning(f"order queue is full with {len(self.entries)} requests")
+
+            self.entries[key] = (request, callback, Clock.monotonic())
+
+        if previous is not None:
+            self.drop_counter.inc(reason="superseded")
+            Tracer.discard(previous[0]["id"])
+            self.logger.info(f"request {previous[0]['id']} is superseded by {request['id']}")
+            expired.append(previous[:2])
+        self._reject(expired)
+
+    def get(self):
+        """
+        가장 먼저 들어온 요청을 꺼낸다. 오래된 주문은 버린다.
+
+        returns: (request, callback), 없으면 None
+        """
+        with self.lock:
+            expired = self._drop_expired(Clock.monotonic())
+            item = None
+            if len(self.entries) > 0:
+                _, (request, callback, _) = self.entries.popitem(last=False)
+                item = (request, callback)
+        self._reject(expired)
+        return item
+
+    def clear(self):
+        """ 대기 중인 요청을 모두 버리고 반환한다 """
+        with self.lock:
+            dropped = [(request, callback) for request, callback, _ in self.entries.values()]
+            self.entries.clear()
+        for request, _ in dropped:
+            Tracer.discard(request["id"])
+        self._reject(dropped)
+        return [request for request, _ in dropped]
+
+    def _drop_expired(self, now):
+        """ 오래 기다린 주문을 지우고 (request, callback) 리스트를 반환, 잠금 안에서 호출한다 """
+        expired = [
+            key for key, (request, _, created) in self.entries.items()
+            if request["type"] != "cancel" and now - created > self.max_age]
+        dropped = []
+        for key in expired:
+            request, callback, _ = self.entries.pop(key)
+            self.drop_counter.inc(reason="expired")
+            Tracer.discard(request["id"])
+            self.logger.warning(f"request {request['id']} is dropped after waiting {self.max_age}s")
+            dropped.append((request, callback))
+        return dropped
+
+    def _reject(self, dropped):
+        for _, callback in dropped:
+            if callback is not None:
+                callback("error")
@@ -0,0 +1,317 @@
+import json
+import os
+import threading
+import time
+import uuid
+import numpy as np
+
+from .data_provider import DataProvider
+from .date_converter import DateConverter
+from .log_manager import LogManager
+from .upbit_api import UpbitAPI
+
+try:
+    import websocket
+except ImportError:
+    websocket = None
+
+
+class OrderbookBuffer:
+    """
+    한 종목의 호가 스냅샷을 미리 할당한 NumPy 배열에 순환 저장하는 버퍼
+
+    prices, sizes: (capacity, 2, levels) 배열, 두 번째 축은 0: 매도(ask), 1: 매수(bid)
+                   호가 단계가 levels 보다 적으면 나머지는 nan
+    timestamps: (capacity,) 스냅샷 시간 epoch 초
+    count: 지금까지 저장한 스냅샷 개수, capacity를 넘으면 오래된 것부터 덮어쓴다
+    """
+
+    ASK = 0
+    BID = 1
+
+    def __init__(self, levels=15, capacity=3600):
+        self.levels = levels
+        self.capacity = capacity
+        self.prices = np.full((capacity, 2, levels), np.nan)
+        self.sizes = np.full((capacity, 2, levels), np.nan)
+        self.timestamps = np.zeros(capacity)
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def put(self, timestamp, ask_prices, ask_sizes, bid_prices, bid_sizes):
+        """ 스냅샷 하나를 저장, 각 호가 리스트는 최우선 호가부터 """
+        with self.lock:
+            index = self.count % self.capacity
+            self.prices[index].fill(np.nan)
+            self.sizes[index].fill(np.nan)
+            ask_count = min(len(ask_prices), self.levels)
+            bid_count = min(len(bid_prices), self.levels)
+            self.prices[index, self.ASK, :ask_count] = ask_prices[:ask_count]
+            self.sizes[index, self.ASK, :ask_count] = ask_sizes[:ask_count]
+            self.prices[index, self.BID, :bid_count] = bid_prices[:bid_count]
+            self.sizes[index, self.BID, :bid_count] = bid_sizes[:bid_count]
+            self.timestamps[index] = timestamp
+            self.count += 1
+
+    def get_history(self, count=None):
+        """
+        최근 count 개의 스냅샷을 오래된 순서로 복사해서 반환
+
+        returns: (timestamps, prices, sizes)
+        """
+        with self.lock:
+            indexes = self._get_indexes(count)
+            return self.timestamps[indexes], self.prices[indexes], self.sizes[indexes]
+
+    def get_spread(self, count=1):
+        """ 최근 count 개의 최우선 매도, 매수 호가 차이 배열 """
+        _, prices, _ = self.get_history(count)
+        return self.calc_spread(prices)
+
+    def get_mid(self, count=1):
+        """ 최근 count 개의 최우선 매도, 매수 호가 중간 가격 배열 """
+        _, prices, _ = self.get_history(count)
+        return self.calc_mid(prices)
+
+    def get_imbalance(self, count=1, levels=None):
+        """
+        최근 count 개의 호가 잔량 불균형 배열
+        (매수 잔량 - 매도 잔량) / (매수 잔량 + 매도 잔량), levels 단계까지 합산, 범위 -1 ~ 1
+        """
+        _, _, sizes = self.get_history(count)
+        return self.calc_imbalance(sizes, levels)
+
+    def get_depth(self, distance, count=1):
+        """
+        최근 count 개의 중간 가격 대비 distance 비율 안에 있는 호가 잔량
+
+        returns: (매도 잔량 배열, 매수 잔량 배열)
+        """
+        _, prices, sizes = self.get_history(count)
+        return self.calc_depth(prices, sizes, distance)
+
+    # get_history로 복사한 스냅샷 배열로 지표를 계산한다, 여러 지표를 같은 스냅샷에서 계산할 때 사용
+    @classmethod
+    def calc_spread(cls, prices):
+        return prices[:, cls.ASK, 0] - prices[:, cls.BID, 0]
+
+    @classmethod
+    def calc_mid(cls, prices):
+        return (prices[:, cls.ASK, 0] + prices[:, cls.BID, 0]) / 2
+
+    @classmethod
+    def calc_imbalance(cls, sizes, levels=None):
+        sizes = sizes[:, :, :levels]
+        ask = np.nansum(sizes[:, cls.ASK], axis=1)
+        bid = np.nansum(sizes[:, cls.BID], axis=1)
+        total = ask + bid
+        return np.divide(bid - ask, total, out=np.zeros_like(total), where=total > 0)
+
+    @classmethod
+    def calc_depth(cls, prices, sizes, distance):
+        mid = cls.calc_mid(prices)[:, np.newaxis]
+        with np.errstate(invalid="ignore"):
+            ask_mask = prices[:, cls.ASK] <= mid * (1 + distance)
+            bid_mask = prices[:, cls.BID] >= mid * (1 - distance)
+        ask = np.where(ask_mask, sizes[:, cls.ASK], 0).sum(axis=1)
+        bid = np.where(bid_mask, sizes[:, cls.BID], 0).sum(axis=1)
+        return ask, bid
+
+    def _get_indexes(self, count):
+        length = len(self)
+        if count is None or count > length:
+            count = length
+        return np.arange(self.count - count, self.count) % self.capacity
+
+
+class OrderbookDataProvider(DataProvider):
+    """
+    여러 종목의 호가 정보를 OrderbookBuffer에 저장하고 파생 지표를 제공하는 DataProvider 기본 클래스
+
+    markets: 종목 리스트, 첫 번째 종목이 get_info의 기준 종목
+    levels: 저장할 호가 단계 수
+    capacity: 종목별 저장할 스냅샷 개수
+    buffers: 종목별 OrderbookBuffer 딕셔너리
+    """
+
+    DEPTH_DISTANCE = 0.001
+
+    def __init__(self, markets=("KRW-BTC",), levels=15, capacity=3600):
+        self.logger = LogManager.get_logger(self.__class__.__name__)
+        self.markets = list(markets)
+        self.buffers = {market: OrderbookBuffer(levels, capacity) for market in self.markets}
+
+    def get_buffer(self, market=None):
+        """ 종목의 OrderbookBuffer, 종목이 없으면 기준 종목 """
+        return self.buffers[self.markets[0] if market is None else market]
+
+    def get_features(self, market=None):
+        """
+        종목의 최근 호가 파생 지표, 저장된 스냅샷이 없으면 None
+
+        returns:
+        {
+            "market": 종목,
+            "date_time": 스냅샷 시간,
+            "timestamp": 스냅샷 시간 epoch 초,
+            "ask_price": 최우선 매도 호가,
+            "bid_price": 최우선 매수 호가,
+            "spread": 최우선 호가 차이,
+            "mid_price": 중간 가격,
+            "imbalance": 호가 잔량 불균형,
+            "ask_depth", "bid_depth": 중간 가격 대비 DEPTH_DISTANCE 안의 잔량
+        }
+        """
+        market = self.markets[0] if market is None else market
+        buffer = self.buffers[market]
+        if len(buffer) == 0:
+            return None
+
+        # 스트리밍 중에도 한 스냅샷의 지표만 담기도록 한 번 복사한 배열로 모두 계산
+        timestamps, prices, sizes = buffer.get_history(1)
+        ask_depth, bid_depth = OrderbookBuffer.calc_depth(prices, sizes, self.DEPTH_DISTANCE)
+        return {
+            "market": market,
+            "date_time": DateConverter.from_timestamp(timestamps[0]),
+            "timestamp": int(timestamps[0]),
+            "ask_price": float(prices[0, OrderbookBuffer.ASK, 0]),
+            "bid_price": float(prices[0, OrderbookBuffer.BID, 0]),
+            "spread": float(OrderbookBuffer.calc_spread(prices)[0]),
+            "mid_price": float(OrderbookBuffer.calc_mid(prices)[0]),
+            "imbalance": float(OrderbookBuffer.calc_imbalance(sizes)[0]),
+            "ask_depth": float(ask_depth[0]),
+            "bid_depth": float(bid_depth[0])}
+
+    def put_orderbook(self, data):
+        """
+        업비트 호가 응답 하나를 버퍼에 저장한다. REST 응답의 market, 웹소켓의 code 모두 지원
+        """
+        market = data.get("market", data.get("code"))
+        if market not in self.buffers:
+            return
+
+        units = data["orderbook_units"]
+        self.buffers[market].put(
+            data["timestamp"] / 1000,
+            [unit["ask_price"] for unit in units],
+            [unit["ask_size"] for unit in units],
+            [unit["bid_price"] for unit in units],
+            [unit["bid_size"] for unit in units])
+
+
+class UpbitOrderbookProvider(OrderbookDataProvider):
+    """
+    get_info 호출마다 업비트 호가 API를 조회하는 polling 방식의 호가 DataProvider
+    UPBIT_OPEN_API_SERVER_URL 이 설정된 경우 해당 서버에서 데이터를 가져온다
+    """
+
+    URL = "https://api.upbit.com/v1/orderbook"
+    ORDERBOOK_PATH = "/v1/orderbook"
+
+    def __init__(self, markets=("KRW-BTC",), levels=15, capacity=3600):
+        super().__init__(markets, levels, capacity)
+        server_url = os.environ.get("UPBIT_OPEN_API_SERVER_URL")
+        if server_url is not None:
+            self.URL = server_url + self.ORDERBOOK_PATH
+        self.query_string = {"markets": ",".join(self.markets)}
+        self.upbit_api = UpbitAPI(access_key=0, secret_key=0, server_url=0, market=0)
+
+    def get_info(self):
+        """ 모든 종목의 호가를 조회해서 저장하고 기준 종목의 파생 지표를 반환 """
+        self.poll()
+        return self.get_features()
+
+    def poll(self):
+        """ 모든 종목의 호가를 한 번에 조회해서 저장 """
+        for data in self.upbit_api.get_data_from_server(url=self.URL, params=self.query_string):
+            self.put_orderbook(data)
+
+
+class StreamingOrderbookProvider(OrderbookDataProvider):
+    """
+    웹소켓으로 받은 호가를 별도 스레드에서 저장하는 streaming 방식의 호가 DataProvider
+    get_info는 네트워크 요청 없이 마지막으로 받은 호가의 파생 지표를 반환한다.
+
+    connect_func: markets를 받아서 호가 메시지(딕셔너리)를 차례로 반환하는 iterable을 만드는 함수
+                  없으면 websocket-client 패키지로 업비트 웹소켓에 연결한다.
+                  LocalExchange.stream_orderbook 을 사용하면 로컬에서 테스트할 수 있다.
+    """
+
+    URL = "wss://api.upbit.com/websocket/v1"
+    RECONNECT_INTERVAL = 1
+    STOP_TIMEOUT = 3
+
+    def __init__(self, markets=("KRW-BTC",), levels=15, capacity=3600, connect_func=None):
+        super().__init__(markets, levels, capacity)
+        self.connect_func = connect_func if connect_func is not None else self._connect_upbit
+        self.stop_event = None
+        self.thread = None
+        self.connection = None
+        self.message_count = 0
+
+    def start(self):
+        """ 호가 수신 스레드를 시작한다 """
+        if self.thread is not None:
+            return
+
+        if self.connect_func == self._connect_upbit and websocket is None:
+            raise UserWarning("websocket-client package is required for streaming orderbook")
+
+        # 실행마다 새 Event를 사용해서 멈춘 이전 스레드가 다시 시작되지 않도록 한다
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(
+            target=self._receive_loop, args=(self.stop_event,), name="Orderbook-Stream", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """ 호가 수신을 멈추고 연결을 닫은 뒤 스레드가 종료될 때까지 최대 STOP_TIMEOUT초 기다린다 """
+        thread = self.thread
+        if thread is None:
+            return
+
+        self.stop_event.set()
+        connection = self.connection
+        if connection is not None:
+            connection.close()
+        if thread is not threading.current_thread():
+            thread.join(self.STOP_TIMEOUT)
+            if thread.is_alive():
+                self.logger.warning("orderbook stream thread is not terminated")
+        self.thread = None
+
+    def get_info(self):
+        """ 마지막으로 받은 기준 종목 호가의 파생 지표, 아직 받지 못했으면 None """
+        return self.get_features()
+
+    def _receive_loop(self, stop_event):
+        while stop_event.is_set() is False:
+            try:
+                for data in self.connect_func(self.markets):
+                    if stop_event.is_set():
+                        return
+                    self.put_orderbook(data)
+                    self.message_count += 1
+            except (OSError, ValueError, KeyError) as msg:
+                if stop_event.is_set() is False:
+                    self.logger.warning(f"orderbook stream is disconnected {msg}")
+            except Exception as msg:  # pylint: disable=broad-except
+                # websocket-client 연결 오류는 패키지별 예외를 사용한다
+                if stop_event.is_set() is False:
+                    self.logger.warning(f"orderbook stream fail {msg}")
+
+            stop_event.wait(self.RECONNECT_INTERVAL)
+
+    def _connect_upbit(self, markets):
+        connection = websocket.create_connection(self.URL)
+        # stop에서 닫아서 recv 대기 중인 스레드를 바로 깨운다
+        self.connection = connection
+        try:
+            connection.send(json.dumps([{"ticket": str(uuid.uuid4())}, {"type": "orderbook", "codes": markets}]))
+            while True:
+                yield json.loads(connection.recv())
+        finally:
+            self.connection = None
+            connection.close()
@@ -0,0 +1,58 @@
+from .clock import Clock
+from .metrics import MetricsRegistry
+
+
+class QuoteCache:
+    """
+    종목별 마지막 체결 가격을 모든 모듈이 함께 사용하는 캐시
+
+    DataProvider가 데이터를 받을 때마다 가격을 넣어두고,
+    계좌 정보 조회나 주문 가격 보정은 TTL 안의 가격이면 거래소 조회 없이 사용한다.
+    종목별 값은 (가격, 갱신 시간) 튜플 하나로 교체하므로 읽을 때 잠금이 필요 없다.
+
+    ttl: 가격을 유효하게 사용할 수 있는 시간(초)
+    """
+
+    TTL = 3
+
+    ttl = TTL
+    quotes = {}
+    hit_counter = MetricsRegistry.counter("ts_quote_cache_hits_total", "Quote reads served from memory")
+    miss_counter = MetricsRegistry.counter("ts_quote_cache_misses_total", "Quote reads that needed the exchange")
+
+    @classmethod
+    def put(cls, market, price):
+        """ 종목의 마지막 체결 가격을 갱신한다 """
+        cls.quotes[market] = (float(price), Clock.monotonic())
+
+    @classmethod
+    def get(cls, market, max_age=None):
+        """ max_age(기본 ttl)초 안에 갱신된 가격, 없으면 None """
+        quote = cls.quotes.get(market)
+        max_age = cls.ttl if max_age is None else max_age
+        if quote is None or Clock.monotonic() - quote[1] > max_age:
+            cls.miss_counter.inc(market=market)
+            return None
+
+        cls.hit_counter.inc(market=market)
+        return quote[0]
+
+    @classmethod
+    def get_or_fetch(cls, market, fetch_func, max_age=None):
+        """
+        유효한 가격이 없으면 fetch_func()로 가격을 조회해서 저장하고 반환한다.
+        fetch_func가 None을 반환하면 None
+        """
+        price = cls.get(market, max_age)
+        if price is not None:
+            return price
+
+        price = fetch_func()
+        if price is not None:
+            cls.put(market, price)
+        return price
+
+    @classmethod
+    def clear(cls):
+        """ 저장된 가격을 모두 지운다 """
+        cls.quotes = {}
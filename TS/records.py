@@ -0,0 +1,210 @@
+class Record:
+    """
+    __slots__ 기반의 변경할 수 없는 메시지 기본 클래스
+
+    모듈 사이에 복사 없이 그대로 공유할 수 있도록 생성 후에는 값을 바꿀 수 없고,
+    값을 바꾸려면 _replace로 새 객체를 만든다.
+    기존 딕셔너리 코드와 호환되도록 ["key"], get, keys, items, in 을 지원하며
+    값이 None인 항목도 키로 포함한다.
+
+    FLOAT_FIELDS: 생성 시점에 한 번만 float로 변환하는 항목
+    KIND: Analyzer 보고서용 데이터 종류, 딕셔너리 뷰에 "kind" 키로 제공
+    """
+
+    __slots__ = ()
+    FLOAT_FIELDS = ()
+    KIND = None
+    FIELD_SET = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.FIELD_SET = frozenset(cls.__slots__)
+
+    def __init__(self, **fields):
+        """ 항목별 키워드 인자로 생성, 주지 않은 항목은 None """
+        for name in self.__slots__:
+            value = fields.pop(name, None)
+            if value is not None and name in self.FLOAT_FIELDS:
+                value = float(value)
+            object.__setattr__(self, name, value)
+        if len(fields) > 0:
+            raise TypeError(f"{self.__class__.__name__} got unexpected fields {sorted(fields)}")
+
+    @classmethod
+    def from_dict(cls, data):
+        """ 딕셔너리로 생성, 이미 같은 타입이면 그대로 반환 """
+        if isinstance(data, cls):
+            return data
+        return cls(**{name: data[name] for name in cls.__slots__ if name in data})
+
+    def _replace(self, **changes):
+        """ 일부 항목을 바꾼 새 객체를 반환 """
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(changes)
+        return self.__class__(**fields)
+
+    def to_dict(self):
+        """ 딕셔너리로 변환 """
+        return dict(self.items())
+
+    def keys(self):
+        keys = list(self.__slots__)
+        if self.KIND is not None:
+            keys.append("kind")
+        return keys
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def values(self):
+        return [self[key] for key in self.keys()]
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __getitem__(self, key):
+        if key in self.FIELD_SET:
+            return getattr(self, key)
+        if key == "kind" and self.KIND is not None:
+            return self.KIND
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in self.FIELD_SET or (key == "kind" and self.KIND is not None)
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is immutable")
+
+    def __setitem__(self, key, value):
+        raise TypeError(f"{self.__class__.__name__} is immutable, use _replace")
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            other = other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+    def __reduce__(self):
+        return (_restore_record, (self.__class__, tuple(getattr(self, name) for name in self.__slots__)))
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.to_dict()})"
+
+
+def _restore_record(cls, values):
+    record = cls.__new__(cls)
+    for name, value in zip(cls.__slots__, values):
+        object.__setattr__(record, name, value)
+    # 항목이 추가되기 전에 저장된 객체는 새 항목을 None으로 채운다
+    for name in cls.__slots__[len(values):]:
+        object.__setattr__(record, name, None)
+    return record
+
+
+class CandleInfo(Record):
+    """
+    거래 정보 info
+
+    market: 거래 시장 종류 BTC
+    date_time: 정보의 기준 시간
+    opening_price: 시작 거래 가격
+    high_price: 최고 거래 가격
+    low_price: 최저 거래 가격
+    closing_price: 마지막 거래 가격
+    acc_price: 단위 시간내 누적 거래 금액
+    acc_volume: 단위 시간내 누적 거래 양
+    timestamp: 정보의 기준 시간 epoch 초
+    """
+
+    __slots__ = (
+        "market", "date_time", "opening_price", "high_price", "low_price",
+        "closing_price", "acc_price", "acc_volume", "timestamp")
+    FLOAT_FIELDS = ("opening_price", "high_price", "low_price", "closing_price", "acc_price", "acc_volume")
+    KIND = 0
+
+
+class TradingRequest(Record):
+    """
+    거래 요청 정보
+
+    id: 요청 정보 id "1607862457.560075"
+    type: 거래 유형 sell, buy, cancel
+    price: 주문 가격
+    amount: 주문 수량
+    date_time: 요청 생성 시간, 시뮬레이션에서는 데이터 시간
+    market: 주문할 종목 (Ex. KRW-BTC), 없으면 Trader의 기본 종목
+    """
+
+    __slots__ = ("id", "type", "price", "amount", "date_time", "market")
+    FLOAT_FIELDS = ("price", "amount")
+    KIND = 1
+
+
+class TradingResult(Record):
+    """
+    거래 결과 정보
+
+    request: 요청 정보
+    type: 거래 유형 sell, buy, cancel
+    price: 거래 가격
+    amount: 거래 수량
+    msg: 거래 결과 메시지
+    state: 거래 상태 requested, done
+    date_time: 거래 체결 시간
+    uuid: 거래소 주문 uuid
+    """
+
+    __slots__ = ("request", "type", "price", "amount", "msg", "state", "date_time", "uuid")
+    FLOAT_FIELDS = ("price", "amount")
+    KIND = 2
+
+
+class AccountInfo(Record):
+    """
+    계좌 정보
+
+    balance: 계좌 현금 잔고
+    asset: 자산 목록, 마켓이름을 키값으로 갖고 (평균 매입 가격, 수량)을 갖는 딕셔너리
+    quote: 종목별 현재 가격 딕셔너리
+    date_time: 현재 시간
+    timestamp: 현재 시간 epoch 초
+    """
+
+    __slots__ = ("balance", "asset", "quote", "date_time", "timestamp")
+    FLOAT_FIELDS = ("balance",)
+
+
+class AccountSnapshot(Record):
+    """
+    거래소에서 조회한 계좌 상태
+
+    version: 갱신할 때마다 1씩 증가하는 번호
+    balance: 주문 가능한 현금 잔고
+    locked: 주문에 묶여 있는 현금
+    asset: 화폐를 키값으로 갖고 (평균 매입 가격, 주문 가능 수량, 주문에 묶인 수량)을 갖는 딕셔너리
+    open_orders: 체결 대기 주문 uuid 튜플
+    drift: 로컬 장부와 거래소의 차이 딕셔너리, 장부가 없으면 None
+    date_time: 조회 시간
+    timestamp: 조회 시간 epoch 초
+    """
+
+    __slots__ = ("version", "balance", "locked", "asset", "open_orders", "drift", "date_time", "timestamp")
+    FLOAT_FIELDS = ("balance", "locked")
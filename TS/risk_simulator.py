@@ -0,0 +1,132 @@
+import os
+import numpy as np
+
+from concurrent.futures import ProcessPoolExecutor
+from .log_manager import LogManager
+
+
+class RiskSimulator:
+    """
+    거래별 수익률 또는 자산 곡선의 수익률을 복원 추출(bootstrap)로 다시 뽑아서
+    최종 수익률, 최대 낙폭, 회복 기간의 분포를 계산하는 클래스
+
+    모든 표본 경로를 (표본 수, 길이) 배열로 한 번에 계산하며, 메모리를 넘지 않도록 chunk_size 개씩 나눠서 처리한다.
+    workers가 2 이상이면 chunk를 프로세스 풀에서 나눠서 계산한다.
+    block_size가 1보다 크면 연속된 구간을 통째로 뽑는 circular block bootstrap으로 수익률의 자기 상관을 유지한다.
+
+    returns: 한 단계(거래 또는 기록 시점)별 수익률 배열, 0.01은 1%
+    seed: 랜덤 시드, 같은 시드와 인자면 workers와 관계없이 같은 결과
+    """
+
+    PERCENTILES = (5, 25, 50, 75, 95)
+    CHUNK_SIZE = 5000
+
+    def __init__(self, returns, seed=None):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.returns = np.asarray(returns, dtype=np.float64)
+        self.seed = seed
+
+    @classmethod
+    def from_trades(cls, result_list, seed=None):
+        """
+        Analyzer.result_list의 체결 결과로 매도 거래별 수익률(매도 가격 / 평균 매입 가격 - 1)을 만든다.
+        """
+        returns = []
+        avg_price = 0.0
+        amount = 0.0
+        for result in result_list:
+            price = float(result["price"])
+            volume = float(result["amount"])
+            if result.get("state", "done") != "done" or price <= 0 or volume <= 0:
+                continue
+
+            if result["type"] == "buy":
+                avg_price = (avg_price * amount + price * volume) / (amount + volume)
+                amount += volume
+            elif result["type"] == "sell" and amount > 0:
+                returns.append(price / avg_price - 1)
+                amount = max(round(amount - volume, 8), 0)
+                if amount == 0:
+                    avg_price = 0.0
+        return cls(returns, seed)
+
+    @classmethod
+    def from_equity(cls, score_list, seed=None):
+        """ Analyzer.score_list의 누적 수익률(%)로 기록 시점 사이의 수익률을 만든다 """
+        equity = 1 + np.array([score["cumulative_return"] for score in score_list], dtype=np.float64) / 100
+        if len(equity) < 2:
+            return cls([], seed)
+        return cls(equity[1:] / equity[:-1] - 1, seed)
+
+    def run(self, count=10000, length=None, block_size=1, chunk_size=None, workers=None):
+        """
+        count 개의 표본 경로를 만들어서 분포를 요약한다.
+
+        length: 표본 경로 길이, 없으면 원래 수익률 개수
+        workers: 프로세스 개수, 없거나 1이면 현재 프로세스에서 계산
+        returns:
+        {
+            "count": 표본 수,
+            "length": 표본 경로 길이,
+            "final_return": 최종 수익률 분포,
+            "max_drawdown": 최대 낙폭 분포 (0.1은 고점 대비 10% 하락),
+            "recovery_time": 고점을 회복하지 못한 가장 긴 기간(단계 수) 분포,
+            "loss_probability": 최종 수익률이 0보다 작은 비율
+        }
+        분포: {"mean": 평균, "p5", "p25", "p50", "p75", "p95": 백분위 값}
+        """
+        if len(self.returns) == 0:
+            raise UserWarning("No returns for risk simulation")
+
+        length = len(self.returns) if length is None else int(length)
+        chunk_size = self.CHUNK_SIZE if chunk_size is None else chunk_size
+        chunk_counts = [min(chunk_size, count - start) for start in range(0, count, chunk_size)]
+        seeds = np.random.SeedSequence(self.seed).spawn(len(chunk_counts))
+        jobs = [(self.returns, chunk_count, length, block_size, seed) for chunk_count, seed in zip(chunk_counts, seeds)]
+
+        if workers is not None and workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs), os.cpu_count() or 1)) as executor:
+                chunks = list(executor.map(_simulate_chunk, jobs))
+        else:
+            chunks = [_simulate_chunk(job) for job in jobs]
+
+        final_return, max_drawdown, recovery_time = (np.concatenate(values) for values in zip(*chunks))
+        return {
+            "count": count,
+            "length": length,
+            "final_return": self._summarize(final_return),
+            "max_drawdown": self._summarize(max_drawdown),
+            "recovery_time": self._summarize(recovery_time),
+            "loss_probability": float(np.mean(final_return < 0))}
+
+    def _summarize(self, values):
+        summary = {"mean": float(values.mean())}
+        for percentile, value in zip(self.PERCENTILES, np.percentile(values, self.PERCENTILES)):
+            summary[f"p{percentile}"] = float(value)
+        return summary
+
+
+def _simulate_chunk(job):
+    """
+    표본 경로 count 개의 최종 수익률, 최대 낙폭, 최장 회복 기간을 계산한다.
+    프로세스 풀에서 실행되도록 모듈 함수로 둔다.
+    """
+    returns, count, length, block_size, seed = job
+    generator = np.random.default_rng(seed)
+    size = len(returns)
+
+    # 블록 시작 위치를 뽑고 블록 안의 위치를 더해서 (count, length) 인덱스를 만든다
+    block_count = -(-length // block_size)
+    starts = generator.integers(0, size, size=(count, block_count, 1))
+    indexes = ((starts + np.arange(block_size)) % size).reshape(count, -1)[:, :length]
+
+    paths = np.cumprod(1 + returns[indexes], axis=1)
+    peaks = np.maximum.accumulate(np.maximum(paths, 1), axis=1)
+    max_drawdown = (1 - paths / peaks).max(axis=1)
+
+    # 마지막 고점 이후 지난 단계 수, 시작 시점(-1)을 첫 고점으로 본다
+    steps = np.arange(length)
+    last_peak = np.maximum.accumulate(np.where(paths >= peaks, steps, -1), axis=1)
+    recovery_time = (steps - last_peak).max(axis=1)
+
+    return paths[:, -1] - 1, max_drawdown, recovery_time
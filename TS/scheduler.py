@@ -0,0 +1,155 @@
+import heapq
+import itertools
+import threading
+import time
+
+from .log_manager import LogManager
+from .metrics import MetricsRegistry
+
+
+class Scheduler:
+    """
+    예약 실행을 하나의 스레드에서 처리하는 스케줄러
+
+    예약마다 threading.Timer 스레드를 만드는 대신 예정 시간 순서의 heap에 넣고,
+    하나의 daemon 스레드가 가장 이른 예정 시간까지 기다렸다가 차례대로 실행한다.
+    callback은 스케줄러 스레드에서 실행되므로 오래 걸리는 작업은 Worker에 넘겨야 한다.
+
+    같은 key로 아직 실행되지 않은 예약이 있으면 새로 예약하지 않고 기존 예약을 반환한다.
+    취소된 예약은 heap에서 바로 지우지 않고 실행할 차례가 되었을 때 버린다.
+    예정 시간보다 늦게 실행된 시간(초)은 ts_scheduler_lateness_seconds로 집계한다.
+    """
+
+    lateness_histogram = MetricsRegistry.histogram(
+        "ts_scheduler_lateness_seconds", "Delay between the due time and the run of scheduled tasks")
+    task_counter = MetricsRegistry.counter("ts_scheduler_tasks_total", "Scheduled tasks by result")
+    default = None
+    default_lock = threading.Lock()
+
+    def __init__(self, name="TS-Scheduler"):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.name = name
+        self.tasks = []
+        self.keys = {}
+        self.sequence = itertools.count()
+        self.condition = threading.Condition()
+        self.thread = None
+
+    @classmethod
+    def get_default(cls):
+        """ 모든 모듈이 함께 사용하는 기본 Scheduler """
+        with cls.default_lock:
+            if cls.default is None:
+                cls.default = cls()
+            return cls.default
+
+    def schedule(self, delay, callback, key=None):
+        """
+        delay초 뒤에 callback()을 실행하도록 예약한다.
+
+        key: 중복 예약을 합치기 위한 이름, 같은 key의 예약이 대기 중이면 그 예약을 반환
+        returns: cancel()로 취소할 수 있는 ScheduledTask
+        """
+        with self.condition:
+            if key is not None and key in self.keys:
+                self.task_counter.inc(result="coalesced")
+                return self.keys[key]
+
+            task = ScheduledTask(self, time.monotonic() + max(delay, 0), callback, key)
+            heapq.heappush(self.tasks, (task.due, next(self.sequence), task))
+            if key is not None:
+                self.keys[key] = task
+
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self.thread.start()
+            # 가장 이른 예약이 바뀐 경우에만 대기 중인 스레드를 깨운다
+            elif self.tasks[0][2] is task:
+                self.condition.notify()
+        return task
+
+    def cancel(self, task):
+        """ 예약을 취소한다. 이미 실행되었거나 취소된 예약이면 아무것도 하지 않는다 """
+        with self.condition:
+            if task.is_cancelled or task.is_done:
+                return
+            task.is_cancelled = True
+            self._release_key(task)
+        self.task_counter.inc(result="cancelled")
+
+    def get_pending_count(self):
+        """ 취소되지 않고 실행을 기다리는 예약 개수 """
+        with self.condition:
+            return sum(1 for _, _, task in self.tasks if task.is_cancelled is False)
+
+    def stop(self):
+        """ 대기 중인 예약을 모두 버리고 스레드를 종료한다 """
+        with self.condition:
+            thread = self.thread
+            self.thread = None
+            self.tasks = []
+            self.keys = {}
+            self.condition.notify()
+
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _run(self):
+        current = threading.current_thread()
+        while True:
+            with self.condition:
+                while True:
+                    if self.thread is not current:
+                        return
+
+                    if len(self.tasks) == 0:
+                        self.condition.wait()
+                        continue
+
+                    due, _, task = self.tasks[0]
+                    if task.is_cancelled:
+                        heapq.heappop(self.tasks)
+                        continue
+
+                    now = time.monotonic()
+                    if due > now:
+                        self.condition.wait(due - now)
+                        continue
+
+                    heapq.heappop(self.tasks)
+                    task.is_done = True
+                    self._release_key(task)
+                    break
+
+            self.lateness_histogram.observe(now - due)
+            self.task_counter.inc(result="run")
+            try:
+                task.callback()
+            except Exception as msg:  # pylint: disable=broad-except
+                # 예약 하나의 실패로 다른 예약이 멈추지 않도록 기록만 한다
+                self.logger.error(f"scheduled task fail {task.key} {msg}")
+
+    def _release_key(self, task):
+        if task.key is not None and self.keys.get(task.key) is task:
+            del self.keys[task.key]
+
+
+class ScheduledTask:
+    """
+    Scheduler 예약 하나, threading.Timer와 같이 cancel()로 취소한다
+
+    due: 예정 시간 (time.monotonic 기준)
+    """
+
+    __slots__ = ("scheduler", "due", "callback", "key", "is_cancelled", "is_done")
+
+    def __init__(self, scheduler, due, callback, key=None):
+        self.scheduler = scheduler
+        self.due = due
+        self.callback = callback
+        self.key = key
+        self.is_cancelled = False
+        self.is_done = False
+
+    def cancel(self):
+        self.scheduler.cancel(self)
@@ -0,0 +1,216 @@
+import os
+import pickle
+import struct
+import threading
+import time
+import zlib
+
+from datetime import datetime
+from .log_manager import LogManager
+
+
+class SessionRecorder:
+    """
+    실거래 중 DataProvider, Trader, UpbitAPI의 응답을 시간과 함께 파일에 기록하는 클래스
+    기록한 파일은 SessionReplayer로 네트워크 없이 다시 실행할 수 있다.
+
+    wrap()으로 만든 proxy가 지정한 메서드의 인자와 반환 값(또는 UserWarning)을 기록하고,
+    인자로 전달된 callback과 *_listener 속성에 설정된 함수의 호출도 기록한다.
+
+    파일 형식: MAGIC 다음에 [길이(4byte) + pickle] 기록들을 하나의 zlib 스트림으로 압축해서 이어 쓴다.
+    flush 때마다 Z_SYNC_FLUSH로 내보내므로 중간에 끊긴 파일도 마지막 flush까지는 읽을 수 있다.
+    기록: (시작 후 경과 시간(초), source, name, args, result, error)
+
+    filename: 기록 파일 경로, 없으면 OUTPUT_FOLDER에 시작 시간으로 만든다
+    flush_interval: 기록을 파일로 내보내는 최대 간격(초)
+    """
+
+    MAGIC = b"TSREC1\n"
+    OUTPUT_FOLDER = "output/session/"
+    FLUSH_INTERVAL = 1
+    FRAME_HEADER = struct.Struct(">I")
+    DATA_METHODS = ("get_info", "get_history")
+    TRADER_METHODS = ("send_request", "cancel_request", "cancel_all_requests", "get_account_info", "reconcile_orders")
+    API_METHODS = (
+        "send_order", "cancel_order", "get_data_from_server", "get_order_list", "get_order_one",
+        "get_trade_tick", "get_accounts", "get_open_orders", "get_latest_price")
+
+    def __init__(self, filename=None, flush_interval=None):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        if filename is None:
+            filename = os.path.join(self.OUTPUT_FOLDER, datetime.now().strftime("%y%m%d.%H%M%S") + ".rec")
+        self.filename = filename
+        self.flush_interval = self.FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.lock = threading.Lock()
+        self.file = None
+        self.compressor = None
+        self.start_time = None
+        self.last_flush_time = None
+        self.count = 0
+
+    def start(self, meta=None):
+        """
+        기록 파일을 열고 시작 정보를 기록한다.
+
+        meta: 세션 정보 딕셔너리 (budget, market, strategy 등), SessionReplayer의 기본 값으로 사용
+        시작 시간 timestamp(epoch 초)는 SessionReplayer가 VirtualClock의 시작 시간으로 사용한다.
+        """
+        with self.lock:
+            if self.file is not None:
+                return
+
+            folder = os.path.dirname(self.filename)
+            if folder != "" and os.path.isdir(folder) is False:
+                os.makedirs(folder)
+
+            self.file = open(self.filename, "wb")
+            self.file.write(self.MAGIC)
+            self.compressor = zlib.compressobj()
+            self.start_time = time.monotonic()
+            self.last_flush_time = self.start_time
+
+        meta = {} if meta is None else dict(meta)
+        meta.setdefault("date_time", datetime.now().strftime("%Y-%m-%dT%H:%M:%S"))
+        meta.setdefault("timestamp", time.time())
+        self.record("session", "meta", result=meta)
+        self.logger.info(f"session recording is started {self.filename}")
+
+    def set_meta(self, **meta):
+        """ 시작 후에 정해진 세션 정보를 추가로 기록한다 """
+        self.record("session", "meta", result=meta)
+
+    def wrap(self, target, source, methods):
+        """
+        target의 methods 호출을 source 이름으로 기록하는 proxy를 반환한다.
+        그 밖의 속성은 target의 것을 그대로 사용한다.
+        """
+        return _RecordingProxy(target, self, source, methods)
+
+    def record(self, source, name, args=(), result=None, error=None):
+        """ 기록 하나를 추가한다. 시작 전이나 종료 후에는 무시한다. """
+        with self.lock:
+            if self.file is None:
+                return
+
+            now = time.monotonic()
+            event = (round(now - self.start_time, 6), source, name, args, result, error)
+            try:
+                payload = pickle.dumps(event, protocol=pickle.HIGHEST_PROTOCOL)
+            except (pickle.PicklingError, TypeError, AttributeError) as msg:
+                self.logger.warning(f"skip unpicklable record {source}.{name} {msg}")
+                return
+
+            self.file.write(self.compressor.compress(self.FRAME_HEADER.pack(len(payload)) + payload))
+            self.count += 1
+            if now - self.last_flush_time >= self.flush_interval:
+                self._flush()
+
+    def flush(self):
+        """ 압축 중인 기록을 파일로 내보낸다 """
+        with self.lock:
+            if self.file is not None:
+                self._flush()
+
+    def close(self):
+        """ 압축을 끝내고 파일을 닫는다 """
+        with self.lock:
+            if self.file is None:
+                return
+
+            self.file.write(self.compressor.flush())
+            self.file.close()
+            self.file = None
+            self.compressor = None
+        self.logger.info(f"session recording is closed with {self.count} records {self.filename}")
+
+    def _flush(self):
+        self.file.write(self.compressor.flush(zlib.Z_SYNC_FLUSH))
+        self.file.flush()
+        self.last_flush_time = time.monotonic()
+
+    @classmethod
+    def read(cls, filename):
+        """
+        기록 파일의 기록을 차례대로 반환하는 generator
+        파일 끝이 잘린 경우 완전한 기록까지만 반환한다.
+        """
+        with open(filename, "rb") as record_file:
+            if record_file.read(len(cls.MAGIC)) != cls.MAGIC:
+                raise UserWarning(f"Invalid session record file {filename}")
+
+            decompressor = zlib.decompressobj()
+            buffer = b""
+            while True:
+                chunk = record_file.read(65536)
+                if len(chunk) == 0:
+                    return
+
+                try:
+                    buffer += decompressor.decompress(chunk)
+                except zlib.error:
+                    LogManager.get_logger(cls.__name__).warning("session record is broken, ignore the remaining records")
+                    return
+
+                offset = 0
+                while len(buffer) - offset >= cls.FRAME_HEADER.size:
+                    length = cls.FRAME_HEADER.unpack_from(buffer, offset)[0]
+                    end = offset + cls.FRAME_HEADER.size + length
+                    if end > len(buffer):
+                        break
+                    yield pickle.loads(buffer[offset + cls.FRAME_HEADER.size:end])
+                    offset = end
+                buffer = buffer[offset:]
+
+
+class _RecordingProxy:
+    """
+    지정한 메서드 호출과 callback, listener 호출을 SessionRecorder에 기록하면서 target에 전달하는 proxy
+    """
+
+    def __init__(self, target, recorder, source, methods):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_recorder", recorder)
+        object.__setattr__(self, "_source", source)
+        object.__setattr__(self, "_methods", frozenset(methods))
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        if name not in self._methods or callable(value) is False:
+            return value
+
+        def recorded(*args, **kwargs):
+            args = tuple(self._wrap_callback(arg) for arg in args)
+            # 함수 인자는 기록할 수 없으므로 None으로 남긴다
+            recorded_args = tuple(None if callable(arg) else arg for arg in args) + tuple(kwargs.items())
+            try:
+                result = value(*args, **kwargs)
+            except UserWarning as error:
+                self._recorder.record(self._source, name, recorded_args, error=str(error))
+                raise
+            self._recorder.record(self._source, name, recorded_args, result=result)
+            return result
+
+        return recorded
+
+    def __setattr__(self, name, value):
+        # Operator가 설정하는 order_listener, bar_listener 호출도 기록한다
+        if name.endswith("_listener") and callable(value):
+            value = self._wrap_listener(name, value)
+        setattr(self._target, name, value)
+
+    def _wrap_callback(self, arg):
+        if callable(arg) is False:
+            return arg
+
+        def callback(result):
+            self._recorder.record(self._source, "callback", (result,))
+            return arg(result)
+
+        return callback
+
+    def _wrap_listener(self, name, listener):
+        def recorded_listener(*args):
+            self._recorder.record(self._source, name, args)
+            return listener(*args)
+
+        return recorded_listener
@@ -0,0 +1,326 @@
+import argparse
+import json
+import sys
+import time
+
+from .analyzer import Analyzer
+from .clock import Clock, VirtualClock
+from .data_provider import DataProvider
+from .date_converter import DateConverter
+from .log_manager import LogManager
+from .operator import Operator
+from .session_recorder import SessionRecorder
+from .strategy_bnh import StrategyBuyAndHold
+from .strategy_bns import StrategyBuyAndSell
+from .trader import Trader
+from .worker import Worker
+
+
+class SessionReplayer:
+    """
+    SessionRecorder로 기록한 실거래 세션을 네트워크 없이 Operator로 다시 실행하는 클래스
+
+    ReplayDataProvider는 기록된 get_info 응답을 순서대로 반환하고,
+    ReplayTrader는 기록된 체결 결과 callback과 주문 접수 listener 호출을 기록된 순서대로 전달한다.
+    모든 전달은 Operator의 거래 주기 안에서 기록 순서대로 일어나므로 같은 파일은 항상 같은 순서로 실행된다.
+    UpbitAPI 응답은 Trader 내부의 결과이므로 다시 전달하지 않고 get_events("api")로 확인할 수 있다.
+    전략이 만든 거래 요청이 기록과 다르면 divergence_count를 늘리고 경고를 남긴다.
+    재생하는 동안 기록 시간으로 움직이는 VirtualClock을 사용하므로 주기적인 기록도 실거래와 같은 시점에 만들어진다.
+
+    filename: 기록 파일 경로
+    speed: 재생 속도, 1이면 기록된 시간 간격대로, 없으면 대기 없이 최대한 빠르게 실행
+
+    Example) python -m TS.session_replayer output/session/221001.090000.rec
+    Example) python -m TS.session_replayer output/session/221001.090000.rec --speed 1
+    """
+
+    STRATEGY_LIST = (StrategyBuyAndSell, StrategyBuyAndHold)
+    TICK = ("data", "get_info")
+
+    def __init__(self, filename, speed=None):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.filename = filename
+        self.speed = speed
+        self.events = list(SessionRecorder.read(filename))
+        self.meta = {}
+        for event in self.events:
+            if event[1] == "session":
+                self.meta.update(event[4])
+
+        tick_indexes = [index for index, event in enumerate(self.events) if (event[1], event[2]) == self.TICK]
+        self.last_tick_index = tick_indexes[-1] if tick_indexes else -1
+        self.position = 0
+        self.start_time = None
+        self.start_timestamp = self.meta.get("timestamp")
+        if self.start_timestamp is None and "date_time" in self.meta:
+            self.start_timestamp = DateConverter.to_timestamp(self.meta["date_time"])
+        self.data_provider = None
+        self.trader = None
+        self.divergence_count = 0
+
+    def get_events(self, source=None, name=None):
+        """ source, name이 같은 기록 리스트, 없으면 전체 """
+        return [
+            event for event in self.events
+            if (source is None or event[1] == source) and (name is None or event[2] == name)]
+
+    def find(self, source, name):
+        """ 위치와 관계없이 처음 나오는 source.name 기록, 없으면 None """
+        for event in self.events:
+            if event[1] == source and event[2] == name:
+                return event
+        return None
+
+    def is_finished(self):
+        """ 마지막 get_info 기록까지 재생했으면 True """
+        return self.position > self.last_tick_index
+
+    def advance(self, source, name, stop_at=TICK):
+        """
+        다음 source.name 기록까지 진행하면서 지나가는 callback, listener 기록을 전달하고 그 기록을 반환한다.
+        stop_at 기록을 먼저 만나거나 끝까지 없으면 위치를 그대로 두고 None
+
+        전달받은 callback 안에서 다시 advance를 호출할 수 있으므로
+        위치를 먼저 옮긴 뒤에 하나씩 전달하고 매번 대상 기록을 다시 찾는다.
+        """
+        while True:
+            index = self._find_next(source, name, stop_at)
+            if index is None:
+                return None
+            if index == self.position:
+                break
+
+            event = self.events[self.position]
+            self.position += 1
+            self._deliver(event)
+
+        self.position = index + 1
+        self._wait(self.events[index])
+        return self.events[index]
+
+    def drain(self):
+        """ 남은 callback, listener 기록을 모두 전달한다 """
+        while self.position < len(self.events):
+            event = self.events[self.position]
+            self.position += 1
+            self._deliver(event)
+
+    def add_divergence(self, msg):
+        self.divergence_count += 1
+        self.logger.warning(f"replay diverged from the record: {msg}")
+
+    def run(self, strategy=None, budget=None):
+        """
+        기록의 처음부터 끝까지 Operator 거래 주기를 반복하고 결과 보고서를 반환한다.
+        거래 주기에서 재현된 기록의 UserWarning은 warning_count로 세고 계속 진행하며, 다른 예외는 그대로 발생한다.
+
+        strategy: 전략 번호 0: BnS, 1: BnH, 없으면 기록된 전략 이름으로 찾는다
+        budget: 시작 예산, 없으면 기록된 예산
+        """
+        budget = self.meta.get("budget") if budget is None else budget
+        if budget is None:
+            raise UserWarning("No budget in the session record")
+
+        self.data_provider = ReplayDataProvider(self)
+        self.trader = ReplayTrader(self)
+        strategy = self._create_strategy(strategy)
+        operator = Operator()
+        operator.initialize(self.data_provider, strategy, self.trader, Analyzer(), budget=float(budget))
+
+        start = time.perf_counter()
+        self.start_time = time.monotonic()
+        warning_count = 0
+        previous_clock = Clock.set_clock(VirtualClock(self.start_timestamp or 0))
+        try:
+            operator.warm_up()
+            operator.analyzer.make_start_point()
+            while self.is_finished() is False:
+                try:
+                    operator.step()
+                except UserWarning as msg:
+                    warning_count += 1
+                    self.logger.warning(f"recorded error is replayed {msg}")
+            self.drain()
+        finally:
+            Clock.set_clock(previous_clock)
+        elapsed = time.perf_counter() - start
+
+        analyzer = operator.analyzer
+        summary = analyzer.get_return_report()
+        if summary is None:
+            summary = (None, None, None, None, None)
+
+        return {
+            "filename": self.filename,
+            "strategy": strategy.name,
+            "budget": float(budget),
+            "speed": self.speed,
+            "event_count": len(self.events),
+            "tick_count": self.data_provider.index,
+            "start_value": summary[0],
+            "last_value": summary[1],
+            "cumulative_return": summary[2],
+            "price_change_ratio": summary[3],
+            "request_count": len(analyzer.request_list),
+            "result_count": len(analyzer.result_list),
+            "divergence_count": self.divergence_count,
+            "warning_count": warning_count,
+            "elapsed": round(elapsed, 3)}
+
+    def _create_strategy(self, strategy):
+        if strategy is not None:
+            return self.STRATEGY_LIST[int(strategy)]()
+
+        for strategy_class in self.STRATEGY_LIST:
+            instance = strategy_class()
+            if instance.name == self.meta.get("strategy"):
+                return instance
+        return self.STRATEGY_LIST[0]()
+
+    def _find_next(self, source, name, stop_at):
+        for index in range(self.position, len(self.events)):
+            key = (self.events[index][1], self.events[index][2])
+            if key == (source, name):
+                return index
+            if key == stop_at:
+                return None
+        return None
+
+    def _deliver(self, event):
+        source, name, args = event[1], event[2], event[3]
+        if source == "trader" and name == "callback":
+            self._wait(event)
+            self.trader.put_result(args[0])
+        elif source == "trader" and name == "order_listener":
+            self._wait(event)
+            if self.trader.order_listener is not None:
+                self.trader.order_listener(*args)
+        elif source == "data" and name == "bar_listener":
+            self._wait(event)
+            if self.data_provider.bar_listener is not None:
+                self.data_provider.bar_listener(*args)
+        elif source == "data" and name == "backfill_listener":
+            self._wait(event)
+            if self.data_provider.backfill_listener is not None:
+                self.data_provider.backfill_listener(*args)
+        elif source == "trader" and name == "send_request":
+            self.add_divergence(f"recorded request is not made {args[0]}")
+
+    def _wait(self, event):
+        """ VirtualClock을 기록 시간으로 옮기고, 기록된 속도로 재생하는 경우 기록 시간이 될 때까지 대기 """
+        if self.start_timestamp is not None:
+            Clock.advance_to(self.start_timestamp + event[0])
+        if self.speed is None or self.start_time is None:
+            return
+
+        delay = self.start_time + event[0] / self.speed - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ReplayDataProvider(DataProvider):
+    """ 기록된 get_info, get_history 응답을 순서대로 반환하는 DataProvider """
+
+    def __init__(self, replayer):
+        self.replayer = replayer
+        self.bar_listener = None
+        self.backfill_listener = None
+        self.last_info = None
+        self.index = 0
+
+    def get_info(self):
+        """ 다음 get_info 기록, 기록이 끝나면 마지막 정보 """
+        event = self.replayer.advance(*SessionReplayer.TICK, stop_at=None)
+        if event is None:
+            if self.last_info is None:
+                raise UserWarning("No recorded trading info")
+            return self.last_info
+
+        self.index += 1
+        if event[5] is not None:
+            raise UserWarning(event[5])
+        self.last_info = event[4]
+        return self.last_info
+
+    def get_history(self, count):
+        event = self.replayer.advance("data", "get_history")
+        if event is None:
+            return []
+        if event[5] is not None:
+            raise UserWarning(event[5])
+        return event[4][-count:]
+
+
+class ReplayTrader(Trader):
+    """
+    거래소 대신 기록된 체결 결과를 전달하는 Trader
+    거래 요청은 기록과 비교만 하고, 결과는 SessionReplayer가 기록된 순서대로 put_result로 전달한다.
+    """
+
+    def __init__(self, replayer):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.replayer = replayer
+        self.worker = Worker("ReplayTrader-Worker")
+        self.callback = None
+        self.order_listener = None
+        self.account_info = None
+        self.name = "Replay"
+
+    def initialize(self, budget):
+        pass
+
+    def send_request(self, request_list, callback):
+        self.callback = callback
+        event = self.replayer.advance("trader", "send_request")
+        if event is None:
+            self.replayer.add_divergence(f"request is not recorded {request_list}")
+        elif self._get_orders(event[3][0]) != self._get_orders(request_list):
+            self.replayer.add_divergence(f"request {request_list} is different from {event[3][0]}")
+
+    def put_result(self, result):
+        """ 기록된 체결 결과를 마지막 send_request의 callback으로 전달 """
+        if self.callback is None:
+            self.replayer.add_divergence(f"result without request {result}")
+            return
+        self.callback(result)
+
+    def cancel_request(self, request_id):
+        self.replayer.advance("trader", "cancel_request")
+
+    def cancel_all_requests(self, timeout=None):
+        event = self.replayer.advance("trader", "cancel_all_requests")
+        if event is None or event[4] is None:
+            return []
+        return event[4]
+
+    def get_account_info(self):
+        """ 현재 위치의 계좌 정보 기록, 없으면 마지막으로 반환한 기록 """
+        event = self.replayer.advance("trader", "get_account_info")
+        if event is None and self.account_info is None:
+            event = self.replayer.find("trader", "get_account_info")
+        if event is not None and event[5] is None:
+            self.account_info = event[4]
+        return self.account_info
+
+    @staticmethod
+    def _get_orders(request_list):
+        return [(request["type"], request.get("price"), request.get("amount")) for request in request_list]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m TS.session_replayer")
+    parser.add_argument("filename", help="session record file")
+    parser.add_argument("--speed", help="replay speed, 1 for the recorded speed, default is as fast as possible", type=float, default=None)
+    parser.add_argument("--strategy", help="0: buy and sell, 1: buy and hold, default is the recorded strategy", type=int, default=None)
+    parser.add_argument("--budget", help="start budget, default is the recorded budget", type=float, default=None)
+    args = parser.parse_args(argv)
+
+    LogManager.set_stream_level(30)
+    replayer = SessionReplayer(args.filename, speed=args.speed)
+    report = replayer.run(strategy=args.strategy, budget=args.budget)
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    return 0 if report["divergence_count"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import numpy as np
+
+from .clock import Clock
+from .data_provider import DataProvider
+from .date_converter import DateConverter
+from .log_manager import LogManager
+from .records import CandleInfo
+
+
+class SimulationDataProvider(DataProvider):
+    """
+    미리 준비된 거래 데이터를 순서대로 제공하는 시뮬레이션용 DataProvider
+    정보를 제공할 때마다 VirtualClock을 정보의 기준 시간으로 옮긴다.
+
+    info_list: 제공할 거래 정보 리스트
+    index: 다음에 제공할 거래 정보 인덱스
+    last_info: 마지막으로 제공한 거래 정보
+    """
+
+    def __init__(self, info_list=None):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.info_list = []
+        self.index = 0
+        self.last_info = None
+        if info_list is not None:
+            self.initialize(info_list)
+
+    def initialize(self, info_list):
+        """ 제공할 거래 정보 리스트를 설정하고 처음부터 다시 제공한다 """
+        self.info_list = [CandleInfo.from_dict(info) for info in info_list]
+        self.index = 0
+        self.last_info = None
+
+    def is_finished(self):
+        """ 모든 거래 정보를 제공했으면 True """
+        return self.index >= len(self.info_list)
+
+    def get_info(self):
+        """
+        다음 거래 정보를 전달한다. 더 이상 정보가 없으면 None
+
+        returns: 거래 정보 info
+        {
+            "market": 거래 시장 종류 BTC
+            "date_time": 정보의 기준 시간
+            "opening_price": 시작 거래 가격
+            "high_price": 최고 거래 가격
+            "low_price": 최저 거래 가격
+            "closing_price": 마지막 거래 가격
+            "acc_price": 단위 시간내 누적 거래 금액
+            "acc_volume": 단위 시간내 누적 거래 양
+            "timestamp": 정보의 기준 시간 epoch 초
+        }
+        """
+        if self.is_finished():
+            self.logger.info("No more simulation data")
+            return None
+
+        self.last_info = self.info_list[self.index]
+        self.index += 1
+        Clock.advance_to(self.get_timestamp(self.last_info))
+        return self.last_info
+
+    @staticmethod
+    def get_timestamp(info):
+        """ 거래 정보의 기준 시간 epoch 초 """
+        if info.get("timestamp") is not None:
+            return info["timestamp"]
+        return DateConverter.to_timestamp(info["date_time"])
+
+    def get_last_price(self):
+        """ 마지막으로 제공한 거래 정보의 종가 """
+        if self.last_info is None:
+            return None
+        return self.last_info["closing_price"]
+
+    @staticmethod
+    def make_synthetic_info_list(
+        count, market="KRW-BTC", start_price=29000000.0, start="2022-10-01T09:00:00", volatility=0.001, seed=None):
+        """
+        랜덤 워크로 1분 간격의 가상 거래 정보 리스트를 생성
+        """
+        generator = np.random.default_rng(seed)
+        closes = np.round(start_price * np.exp(np.cumsum(generator.normal(0, volatility, count))))
+        opens = np.concatenate(([start_price], closes[:-1]))
+        spreads = np.round(np.abs(generator.normal(0, volatility, count)) * closes)
+        volumes = np.abs(generator.normal(1, 0.5, count))
+        timestamps = DateConverter.to_timestamp(start) + np.arange(count, dtype=np.int64) * 60
+        date_times = DateConverter.from_timestamp_array(timestamps)
+
+        info_list = []
+        for index in range(count):
+            info_list.append(CandleInfo(
+                market=market,
+                date_time=str(date_times[index]),
+                opening_price=opens[index],
+                high_price=max(opens[index], closes[index]) + spreads[index],
+                low_price=min(opens[index], closes[index]) - spreads[index],
+                closing_price=closes[index],
+                acc_price=closes[index] * volumes[index],
+                acc_volume=volumes[index],
+                timestamp=int(timestamps[index]),
+            ))
+        return info_list
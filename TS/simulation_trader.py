@@ -0,0 +1,124 @@
+from .clock import Clock
+from .date_converter import DateConverter
+from .log_manager import LogManager
+from .records import AccountInfo, TradingResult
+from .trader import Trader
+from .worker import Worker
+
+
+class SimulationTrader(Trader):
+    """
+    거래소 대신 요청 즉시 현재가로 체결시키는 시뮬레이션용 Trader
+    잔고와 보유 자산 계산은 UpbitTrader와 같은 방식을 사용한다.
+
+    get_quote_func: 현재가를 반환하는 콜백
+    """
+
+    MARKET = "KRW-BTC"
+    MARKET_CURRENCY = "BTC"
+    ISO_DATEFORMAT = "%Y-%m-%dT%H:%M:%S"
+    COMMISSION_RATIO = 0.0005
+
+    def __init__(self, get_quote_func=None):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.worker = Worker("SimulationTrader-Worker")
+        self.get_quote_func = get_quote_func
+        self.asset = (0, 0)
+        self.balance = None
+        self.name = "Simulation"
+        self.is_initialized = False
+
+    def initialize(self, budget):
+        self.balance = budget
+        self.is_initialized = True
+
+    def send_request(self, request_list, callback):
+        """
+        거래 요청을 현재가로 즉시 체결하고 callback으로 결과를 전달한다.
+        """
+        if self.is_initialized == False:
+            raise UserWarning("Simulation Trader is not initialized")
+
+        for request in request_list:
+            if request["type"] == "cancel" or float(request["price"]) <= 0:
+                continue
+
+            quote = float(self.get_quote_func())
+            if request["type"] == "buy":
+                # 매수 요청의 price는 주문 금액
+                if float(request["price"]) > self.balance:
+                    self.logger.warning("Invalid price request. Balance is too small!")
+                    continue
+                amount = round(float(request["price"]) / quote, 8)
+            else:
+                amount = float(request["amount"])
+                if amount > self.asset[1]:
+                    self.logger.warning(f"Invalid price request. RQ:{amount} > MY: {self.asset[1]}")
+                    continue
+
+            result = TradingResult(
+                request=request,
+                type=request["type"],
+                price=quote,
+                amount=amount,
+                msg="success",
+                state="done",
+                date_time=request["date_time"])
+            self._call_callback(callback, result)
+
+    def cancel_request(self, request_id):
+        """ 모든 요청이 즉시 체결되므로 취소할 요청이 없다 """
+
+    def cancel_all_requests(self, timeout=None):
+        """ 모든 요청이 즉시 체결되므로 취소할 요청이 없다 """
+        return []
+
+    def get_state(self):
+        """ 복구를 위한 잔고와 보유 자산 """
+        return {"balance": self.balance, "asset": self.asset}
+
+    def set_state(self, state):
+        """ get_state로 저장한 상태를 복구 """
+        self.balance = state["balance"]
+        self.asset = tuple(state["asset"])
+
+    def get_account_info(self):
+        """
+        계좌 정보를 요청한다.
+        return:
+            {
+                balance: 계좌 현금 잔고
+                asset: 자산 목록, 마켓이름을 키값으로 갖고 (평균 매입 가격, 수량)을 갖는 딕셔너리
+                quote: 종목별 현재 가격 딕셔너리
+                date_time: 현재 시간
+                timestamp: 현재 시간 epoch 초
+            }
+        """
+        return AccountInfo(
+            balance=self.balance,
+            asset={self.MARKET_CURRENCY: self.asset},
+            quote={self.MARKET_CURRENCY: float(self.get_quote_func())},
+            date_time=Clock.now_string(),
+            timestamp=DateConverter.now_timestamp())
+
+    def _call_callback(self, callback, result):
+        """
+        result 받아서 self.asset, self.balance 업데이트하고
+        콜백으로 결과 전달
+        """
+        result_value = float(result["price"]) * float(result["amount"])
+        fee = result_value * self.COMMISSION_RATIO
+
+        if result["type"] == "buy":
+            new_value = self.asset[0] * self.asset[1] + result_value
+            new_amount = round(self.asset[1] + float(result["amount"]), 8)
+            avr_price = 0 if new_amount == 0 else new_value / new_amount
+            self.asset = (avr_price, new_amount)
+            self.balance -= round(result_value + fee)
+        else:
+            new_amount = round(self.asset[1] - float(result["amount"]), 8)
+            avr_price = 0 if new_amount == 0 else self.asset[0]
+            self.asset = (avr_price, new_amount)
+            self.balance += round(result_value - fee)
+
+        callback(result)
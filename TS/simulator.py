@@ -0,0 +1,201 @@
+import contextlib
+import json
+import os
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from .analyzer import Analyzer
+from .clock import Clock, VirtualClock
+from .log_manager import LogManager
+from .operator import Operator
+from .risk_simulator import RiskSimulator
+from .simulation_data_provider import SimulationDataProvider
+from .simulation_trader import SimulationTrader
+from .strategy_bnh import StrategyBuyAndHold
+from .strategy_bns import StrategyBuyAndSell
+from .upbit_data_provider import UpbitDataProvider
+
+
+class Simulator:
+    """
+    과거 거래 데이터 또는 가상 거래 데이터로 Operator를 실행하는 시뮬레이터
+    입력을 기다리지 않고 데이터를 모두 사용할 때까지 실행한 후 결과 보고서를 OUTPUT_FOLDER에 저장한다.
+    실행하는 동안 데이터 시간으로 움직이는 VirtualClock을 사용하므로 주기적인 기록과 예약 실행도 데이터 시간을 따른다.
+
+    budget: 시작 예산
+    strategy: 전략 번호 0: BnS, 1: BnH
+    from_dash_to: 시뮬레이션 기간 (Ex. 201220.170000-201220.180000), 없으면 가상 데이터를 사용
+    term: 틱 사이 실제 대기 시간(초), 0이면 대기하지 않는다
+    count: 가상 데이터 개수
+    seed: 가상 데이터 랜덤 시드
+    tag: 보고서 이름, 없으면 생성 시간
+    risk_count: 거래별 수익률 bootstrap 표본 수, 0이면 위험 분석을 하지 않는다
+    """
+
+    OUTPUT_FOLDER = "output/"
+    STRATEGY_LIST = (StrategyBuyAndSell, StrategyBuyAndHold)
+
+    def __init__(
+        self, budget=50000, strategy=0, from_dash_to=None, term=0, count=1000, seed=None, tag=None, risk_count=0):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.budget = float(budget)
+        self.strategy_number = int(strategy)
+        self.from_dash_to = from_dash_to
+        self.term = float(term)
+        self.count = int(count)
+        self.seed = seed
+        self.tag = tag if tag is not None else datetime.now().strftime("%y%m%d.%H%M%S")
+        self.risk_count = int(risk_count)
+        self.operator = None
+        self.data_provider = None
+
+    def initialize(self):
+        """ 시뮬레이션 데이터를 준비하고 Operator를 초기화한다 """
+        if self.from_dash_to is not None:
+            info_list = UpbitDataProvider().get_info_list(self.from_dash_to)
+        else:
+            info_list = SimulationDataProvider.make_synthetic_info_list(self.count, seed=self.seed)
+
+        if len(info_list) == 0:
+            raise UserWarning("No simulation data")
+
+        self.data_provider = SimulationDataProvider(info_list)
+        strategy = self.STRATEGY_LIST[self.strategy_number]()
+        strategy.is_simulation = True
+        self.operator = Operator()
+        self.operator.initialize(
+            self.data_provider,
+            strategy,
+            SimulationTrader(self.data_provider.get_last_price),
+            Analyzer(),
+            budget=self.budget)
+
+    def run(self):
+        """
+        데이터를 모두 사용할 때까지 거래 주기를 반복하고 결과 보고서를 반환한다.
+        첫 번째 데이터는 시작 시점 기록에 사용한다.
+        """
+        if self.operator is None:
+            self.initialize()
+
+        start = time.perf_counter()
+        start_timestamp = SimulationDataProvider.get_timestamp(self.data_provider.info_list[self.data_provider.index])
+        previous_clock = Clock.set_clock(VirtualClock(start_timestamp))
+        try:
+            first_info = self.data_provider.get_info()
+            self.operator.analyzer.make_start_point()
+            self.operator.strategy.warm_up([first_info])
+            self.operator.analyzer.put_trading_info(first_info)
+
+            while self.data_provider.is_finished() is False:
+                self.operator.step()
+                if self.term > 0:
+                    time.sleep(self.term)
+
+            return self.make_report(time.perf_counter() - start)
+        finally:
+            Clock.set_clock(previous_clock)
+
+    def make_report(self, elapsed):
+        """
+        시뮬레이션 결과 보고서
+
+        returns:
+        {
+            "tag": 보고서 이름,
+            "strategy": 전략 이름,
+            "budget": 시작 예산,
+            "from_dash_to": 시뮬레이션 기간, 가상 데이터인 경우 None,
+            "seed": 가상 데이터 랜덤 시드,
+            "tick_count": 사용한 데이터 개수,
+            "start_value": 시작 자산,
+            "last_value": 최종 자산,
+            "cumulative_return": 누적 수익률,
+            "price_change_ratio": 종목별 가격 변동률,
+            "request_count": 거래 요청 개수,
+            "result_count": 거래 결과 개수,
+            "elapsed": 실행 시간(초),
+            "risk": risk_count가 있으면 RiskSimulator.run 결과, 매도 거래가 없으면 None
+        }
+        """
+        analyzer = self.operator.analyzer
+        summary = analyzer.get_return_report()
+        if summary is None:
+            summary = (None, None, None, None, None)
+
+        report = {
+            "tag": self.tag,
+            "strategy": self.operator.strategy.name,
+            "budget": self.budget,
+            "from_dash_to": self.from_dash_to,
+            "seed": self.seed,
+            "tick_count": self.data_provider.index,
+            "start_value": summary[0],
+            "last_value": summary[1],
+            "cumulative_return": summary[2],
+            "price_change_ratio": summary[3],
+            "request_count": len(analyzer.request_list),
+            "result_count": len(analyzer.result_list),
+            "elapsed": round(elapsed, 3)}
+
+        if self.risk_count > 0:
+            risk_simulator = RiskSimulator.from_trades(analyzer.result_list, seed=self.seed)
+            report["risk"] = None
+            if len(risk_simulator.returns) > 0:
+                report["risk"] = risk_simulator.run(self.risk_count)
+        return report
+
+    def save_report(self, report):
+        """ 보고서를 OUTPUT_FOLDER에 JSON 파일로 저장하고 경로를 반환 """
+        if os.path.isdir(self.OUTPUT_FOLDER) is False:
+            os.makedirs(self.OUTPUT_FOLDER)
+
+        filename = os.path.join(self.OUTPUT_FOLDER, f"simulation-{self.tag}.json")
+        with open(filename, "w", encoding="utf-8") as report_file:
+            json.dump(report, report_file, indent=2, ensure_ascii=False)
+        return filename
+
+
+def run_simulation(job):
+    """
+    job 딕셔너리(Simulator 인자)로 시뮬레이션을 한 번 실행하고 보고서를 저장한다.
+    프로세스 풀에서 실행되므로 실패해도 예외 대신 error 항목을 담아 반환한다.
+    """
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            simulator = Simulator(**job)
+            report = simulator.run()
+            report["filename"] = simulator.save_report(report)
+        return report
+
+    except Exception as msg:  # pylint: disable=broad-except
+        return {"tag": job.get("tag"), "error": f"{type(msg).__name__}: {msg}"}
+
+
+def run_batch(jobs, workers=None):
+    """
+    시뮬레이션 job 리스트를 프로세스 풀에서 동시에 실행한다.
+    tag가 없는 job은 순번으로 tag를 만든다.
+
+    workers: 프로세스 개수, 없으면 CPU 개수
+    returns: job 순서대로의 보고서 리스트
+    """
+    batch_tag = datetime.now().strftime("%y%m%d.%H%M%S")
+    jobs = [dict(job) for job in jobs]
+    for index, job in enumerate(jobs):
+        job.setdefault("tag", f"{batch_tag}-{index:03d}")
+
+    LogManager.set_stream_level(40)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_simulation, jobs))
+
+
+def load_batch_file(filename):
+    """ 시뮬레이션 job 딕셔너리 리스트가 저장된 JSON 파일을 읽는다 """
+    with open(filename, encoding="utf-8") as batch_file:
+        jobs = json.load(batch_file)
+
+    if isinstance(jobs, list) is False:
+        raise ValueError("batch file should be a list of simulation jobs")
+    return jobs
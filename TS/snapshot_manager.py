@@ -0,0 +1,144 @@
+import os
+import pickle
+import struct
+import threading
+import zlib
+
+from .clock import Clock
+from .log_manager import LogManager
+
+
+class SnapshotManager:
+    """
+    Operator 전체 상태를 주기적으로 저장하고 그 사이의 변경 사항을 기록하는 클래스
+
+    snapshot: 상태 전체를 압축해서 임시 파일에 쓴 뒤 교체하므로 항상 완전한 파일만 남는다.
+    delta log: snapshot 이후 변경 사항을 [길이(4byte) + pickle] 형태로 이어서 기록한다.
+               각 기록은 순번(seq)을 가지며, snapshot에 포함된 순번 이하는 복구 시 무시한다.
+               마지막 기록이 쓰다가 끊긴 경우 그 이전까지만 사용한다.
+    """
+
+    SNAPSHOT_FILENAME = "snapshot.bin"
+    DELTA_FILENAME = "delta.log"
+    SNAPSHOT_INTERVAL = 60
+    FRAME_HEADER = struct.Struct(">I")
+
+    def __init__(self, folder="output/state/", snapshot_interval=None, is_sync=False):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.folder = folder
+        self.snapshot_interval = self.SNAPSHOT_INTERVAL if snapshot_interval is None else snapshot_interval
+        self.is_sync = is_sync
+        self.snapshot_path = os.path.join(folder, self.SNAPSHOT_FILENAME)
+        self.delta_path = os.path.join(folder, self.DELTA_FILENAME)
+        self.lock = threading.Lock()
+        self.seq = 0
+        self.last_snapshot_time = Clock.monotonic()
+        self.delta_file = None
+
+        if os.path.isdir(folder) is False:
+            os.makedirs(folder)
+
+    def has_snapshot(self):
+        """ 저장된 snapshot이 있으면 True """
+        return os.path.isfile(self.snapshot_path)
+
+    def is_snapshot_due(self):
+        """ 마지막 snapshot 이후 snapshot_interval 초가 지났으면 True """
+        return Clock.monotonic() - self.last_snapshot_time >= self.snapshot_interval
+
+    def save_snapshot(self, state):
+        """
+        상태 전체를 snapshot으로 저장하고 delta log를 비운다.
+        """
+        with self.lock:
+            data = zlib.compress(pickle.dumps({"seq": self.seq, "state": state}, protocol=pickle.HIGHEST_PROTOCOL))
+            temp_path = self.snapshot_path + ".tmp"
+            with open(temp_path, "wb") as snapshot_file:
+                snapshot_file.write(data)
+                snapshot_file.flush()
+                os.fsync(snapshot_file.fileno())
+            os.replace(temp_path, self.snapshot_path)
+
+            # snapshot에 포함된 변경 사항은 더 이상 필요 없다
+            self._close_delta_file()
+            self.delta_file = open(self.delta_path, "wb")
+            self.last_snapshot_time = Clock.monotonic()
+            self.logger.debug(f"snapshot saved seq: {self.seq}, size: {len(data)}")
+
+    def append(self, record):
+        """ 변경 사항 하나를 delta log에 추가 """
+        with self.lock:
+            self.seq += 1
+            payload = pickle.dumps((self.seq, record), protocol=pickle.HIGHEST_PROTOCOL)
+            if self.delta_file is None:
+                self.delta_file = open(self.delta_path, "ab")
+
+            self.delta_file.write(self.FRAME_HEADER.pack(len(payload)) + payload)
+            self.delta_file.flush()
+            if self.is_sync:
+                os.fsync(self.delta_file.fileno())
+
+    def load(self):
+        """
+        snapshot과 그 이후의 변경 사항을 읽는다.
+
+        returns: (snapshot 상태, [변경 사항]), snapshot이 없으면 (None, [])
+        """
+        with self.lock:
+            if self.has_snapshot() is False:
+                return None, []
+
+            with open(self.snapshot_path, "rb") as snapshot_file:
+                snapshot = pickle.loads(zlib.decompress(snapshot_file.read()))
+
+            records = []
+            seq = snapshot["seq"]
+            for record_seq, record in self._read_delta_log():
+                if record_seq <= snapshot["seq"]:
+                    continue
+                records.append(record)
+                seq = record_seq
+
+            self.seq = seq
+            self.logger.info(f"snapshot loaded with {len(records)} delta records")
+            return snapshot["state"], records
+
+    def clear(self):
+        """ 저장된 snapshot과 delta log를 지운다 """
+        with self.lock:
+            self._close_delta_file()
+            for path in (self.snapshot_path, self.delta_path):
+                if os.path.isfile(path):
+                    os.remove(path)
+            self.seq = 0
+
+    def close(self):
+        with self.lock:
+            self._close_delta_file()
+
+    def _read_delta_log(self):
+        if os.path.isfile(self.delta_path) is False:
+            return
+
+        with open(self.delta_path, "rb") as delta_file:
+            while True:
+                header = delta_file.read(self.FRAME_HEADER.size)
+                if len(header) < self.FRAME_HEADER.size:
+                    return
+
+                length = self.FRAME_HEADER.unpack(header)[0]
+                payload = delta_file.read(length)
+                if len(payload) < length:
+                    self.logger.warning("delta log is truncated, ignore the last record")
+                    return
+
+                try:
+                    yield pickle.loads(payload)
+                except (pickle.UnpicklingError, EOFError, ValueError):
+                    self.logger.warning("delta log is broken, ignore the remaining records")
+                    return
+
+    def _close_delta_file(self):
+        if self.delta_file is not None:
+            self.delta_file.close()
+            self.delta_file = None
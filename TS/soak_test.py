@@ -0,0 +1,340 @@
+"""
+TS 장시간 실행(soak) 시험 도구
+
+가상 데이터와 LocalExchangeServer로 전체 Operator를 가상 시간 여러 날 동안 빠르게 실행하면서
+tracemalloc 메모리, 객체 수, 스레드 수를 주기적으로 기록하고
+모듈별 메모리 증가량이나 스레드 증가량이 예산을 넘으면 실패로 보고한다.
+
+Example) python -m TS.soak_test --days 3
+Example) python -m TS.soak_test --days 1 --strategy 1 --output output/soak.json
+Example) python -m TS.soak_test --days 7 --memory_budget 262144 --thread_budget 0
+"""
+
+import argparse
+import contextlib
+import gc
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+from datetime import datetime
+from .analyzer import Analyzer
+from .benchmark import quiet, save_report
+from .clock import Clock, VirtualClock
+from .date_converter import DateConverter
+from .local_exchange import LocalExchange, LocalExchangeServer
+from .operator import Operator
+from .quote_cache import QuoteCache
+from .records import TradingRequest
+from .simulation_data_provider import SimulationDataProvider
+from .strategy_bnh import StrategyBuyAndHold
+from .strategy_bns import StrategyBuyAndSell
+from .upbit_trader import UpbitTrader
+
+OUTPUT_FOLDER = "output/"
+
+
+class SoakTest:
+    """
+    가상 데이터 1개를 가상 시간 1분으로 보고 days 일 동안 Operator 거래 주기를 대기 없이 반복한다.
+    VirtualClock을 사용하므로 주기적인 수익률 기록과 체결 확인 예약도 가상 시간으로 실행되고,
+    거래소 HTTP 요청만 실제 시간으로 처리된다.
+    주문은 UpbitTrader가 LocalExchangeServer에 HTTP로 요청하므로 worker, scheduler 스레드와 체결 확인까지 실행된다.
+
+    sample_interval 틱마다 tracemalloc 스냅샷을 TS 모듈 파일별로 묶은 메모리, gc 객체 수, 스레드 수를 기록한다.
+    첫 번째 기록(시작 직후의 할당 제외)과 마지막 기록의 차이를 가상 하루당 증가량으로 환산해서
+    모듈별 memory_budget(bytes/일), object_budget(개/일), thread_budget(개)을 넘으면 실패로 보고한다.
+    시험용 거래소와 이 도구 자체의 메모리는 IGNORED_COMPONENTS로 예산에서 제외한다.
+
+    days: 가상 실행 일 수
+    strategy: 0: BnS, 1: BnH, 2: 주문을 계속 주고받는 시험용 RoundTrip
+    budget: 시작 예산
+    sample_interval: 기록 간격(틱), 없으면 가상 3시간
+    memory_budget: 모듈별 하루 메모리 증가 예산, 딕셔너리로 모듈별 값을 줄 수 있다
+                   없으면 MODULE_MEMORY_BUDGET에 없는 모듈은 MEMORY_BUDGET
+    """
+
+    MINUTES_PER_DAY = 1440
+    SAMPLE_INTERVAL = 180
+    MARKET = "KRW-BTC"
+    MEMORY_BUDGET = 512 * 1024
+    # Analyzer는 보고서를 위해 틱마다 거래 정보를, 주기마다 자산과 수익률 기록을 계속 보관하므로 따로 정한다
+    MODULE_MEMORY_BUDGET = {"analyzer": 1024 * 1024}
+    OBJECT_BUDGET = 20000
+    THREAD_BUDGET = 2
+    IGNORED_COMPONENTS = ("local_exchange", "soak_test", "<python>")
+    STRATEGY_LIST = (StrategyBuyAndSell, StrategyBuyAndHold)
+
+    def __init__(
+        self, days=1, strategy=2, budget=1000000, seed=None, sample_interval=None,
+        memory_budget=None, object_budget=None, thread_budget=None):
+        self.days = days
+        self.strategy_number = int(strategy)
+        self.budget = float(budget)
+        self.seed = seed
+        self.sample_interval = self.SAMPLE_INTERVAL if sample_interval is None else int(sample_interval)
+        self.memory_budget = dict(self.MODULE_MEMORY_BUDGET) if memory_budget is None else memory_budget
+        self.object_budget = self.OBJECT_BUDGET if object_budget is None else object_budget
+        self.thread_budget = self.THREAD_BUDGET if thread_budget is None else thread_budget
+        self.package_folder = os.path.dirname(os.path.abspath(__file__))
+        self.samples = []
+
+    def run(self):
+        """
+        soak 시험을 실행하고 결과 보고서를 반환한다.
+
+        returns:
+        {
+            "created": 실행 시간,
+            "days": 가상 실행 일 수,
+            "tick_count": 실행한 틱 수,
+            "elapsed": 실행 시간(초),
+            "samples": [기록],
+            "growth": {"memory": {모듈: bytes/일}, "objects": 개/일, "threads": 증가 개수},
+            "failures": [예산을 넘은 항목 설명],
+            "passed": 실패 항목이 없으면 True
+        }
+        기록: {"tick", "day", "memory": {모듈: bytes}, "objects", "threads", "items": {항목: 개수}}
+        """
+        tick_count = int(self.days * self.MINUTES_PER_DAY)
+        exchange = LocalExchange(
+            markets=(self.MARKET,), volatility=0.0, history_minutes=5, rate_limits={},
+            krw_balance=self.budget * 10, seed=self.seed)
+        server = LocalExchangeServer(exchange)
+        server.start()
+        environ = {key: os.environ.get(key) for key in ("UPBIT_OPEN_API_SERVER_URL",)}
+        os.environ["UPBIT_OPEN_API_SERVER_URL"] = server.url
+
+        operator = None
+        previous_clock = None
+        tracemalloc.start()
+        start = time.perf_counter()
+        try:
+            info_list = SimulationDataProvider.make_synthetic_info_list(tick_count + 1, seed=self.seed)
+            # 주기적인 기록과 체결 확인 예약이 가상 시간으로 실행되도록 데이터 시간으로 움직이는 시계를 사용한다
+            previous_clock = Clock.set_clock(VirtualClock(SimulationDataProvider.get_timestamp(info_list[0])))
+            data_provider = _SoakDataProvider(info_list, exchange)
+            trader = UpbitTrader()
+            strategy = _RoundTripStrategy() if self.strategy_number == 2 else self.STRATEGY_LIST[self.strategy_number]()
+            operator = Operator()
+
+            with quiet(), open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                operator.initialize(data_provider, strategy, trader, Analyzer(), budget=self.budget)
+                first_info = data_provider.get_info()
+                operator.analyzer.make_start_point()
+                operator.strategy.warm_up([first_info])
+
+                while data_provider.is_finished() is False:
+                    operator.step()
+                    # 가상 시간이 주문 처리를 앞질러 주문이 대기 시간 초과로 버려지지 않도록 worker가 끝낼 때까지 기다린다
+                    if trader.worker.thread is not None and trader.worker.thread.is_alive():
+                        trader.worker.task_queue.join()
+                    if data_provider.index % self.sample_interval == 0:
+                        self._take_sample(data_provider.index, operator)
+
+                # 가상 시간을 1분 더 옮겨서 남은 체결 확인을 worker에 넘긴 뒤 stop에서 기다린다
+                Clock.sleep(60)
+                worker_alive = trader.worker.thread is not None and trader.worker.thread.is_alive()
+                # 예외로 종료된 worker는 남은 task를 처리하지 못하므로 stop에서 기다리지 않는다
+                if worker_alive:
+                    trader.worker.stop()
+                trader._stop_timer()
+
+        finally:
+            elapsed = time.perf_counter() - start
+            if previous_clock is not None:
+                Clock.set_clock(previous_clock)
+            tracemalloc.stop()
+            server.stop()
+            for key, value in environ.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+        growth, failures = self._check_budget()
+        if worker_alive is False:
+            failures.append("trader worker thread is terminated by an exception")
+        return {
+            "created": datetime.now().strftime(DateConverter.ISO_DATEFORMAT),
+            "days": self.days,
+            "strategy": strategy.name,
+            "tick_count": data_provider.index,
+            "elapsed": round(elapsed, 3),
+            "samples": self.samples,
+            "growth": growth,
+            "failures": failures,
+            "passed": len(failures) == 0}
+
+    def _take_sample(self, tick, operator):
+        gc.collect()
+        memory = {}
+        for stat in tracemalloc.take_snapshot().statistics("filename"):
+            component = self._get_component(stat.traceback[0].filename)
+            memory[component] = memory.get(component, 0) + stat.size
+
+        items = {f"analyzer.{name}": count for name, count in operator.analyzer.get_item_counts().items()}
+        items["strategy.data"] = len(operator.strategy.data)
+        items["strategy.result"] = len(operator.strategy.result)
+        items["trader.order_map"] = len(getattr(operator.trader, "order_map", {}))
+        self.samples.append({
+            "tick": tick,
+            "day": round(tick / self.MINUTES_PER_DAY, 4),
+            "memory": memory,
+            "objects": len(gc.get_objects()),
+            "threads": threading.active_count(),
+            "items": items})
+
+    def _get_component(self, filename):
+        """ TS 모듈은 모듈 이름, 그 밖의 파일은 <python> """
+        if os.path.dirname(os.path.abspath(filename)) == self.package_folder:
+            return os.path.splitext(os.path.basename(filename))[0]
+        return "<python>"
+
+    def _check_budget(self):
+        """ 첫 번째와 마지막 기록의 차이로 하루당 증가량을 계산하고 예산을 넘은 항목을 찾는다 """
+        growth = {"memory": {}, "objects": 0, "threads": 0}
+        failures = []
+        if len(self.samples) < 2:
+            failures.append("not enough samples, increase days or decrease sample_interval")
+            return growth, failures
+
+        first = self.samples[0]
+        last = self.samples[-1]
+        days = last["day"] - first["day"]
+        for component in sorted(set(first["memory"]) | set(last["memory"])):
+            per_day = (last["memory"].get(component, 0) - first["memory"].get(component, 0)) / days
+            growth["memory"][component] = round(per_day)
+            budget = self.memory_budget
+            if isinstance(budget, dict):
+                budget = budget.get(component, self.MEMORY_BUDGET)
+            if component not in self.IGNORED_COMPONENTS and per_day > budget:
+                failures.append(f"{component} memory grows {per_day:.0f} bytes/day > {budget}")
+
+        growth["objects"] = round((last["objects"] - first["objects"]) / days)
+        if growth["objects"] > self.object_budget:
+            failures.append(f"object count grows {growth['objects']}/day > {self.object_budget}")
+
+        growth["threads"] = last["threads"] - first["threads"]
+        if growth["threads"] > self.thread_budget:
+            failures.append(f"thread count grows {growth['threads']} > {self.thread_budget}")
+        return growth, failures
+
+
+class _SoakDataProvider(SimulationDataProvider):
+    """ 가상 데이터를 제공할 때마다 시험용 거래소 현재가와 QuoteCache를 같은 가격으로 옮기는 DataProvider """
+
+    def __init__(self, info_list, exchange):
+        super().__init__(info_list)
+        self.exchange = exchange
+
+    def get_info(self):
+        info = super().get_info()
+        if info is not None:
+            self.exchange.set_price(info["market"], info["closing_price"])
+            QuoteCache.put(info["market"], info["closing_price"])
+        return info
+
+
+class _RoundTripStrategy(StrategyBuyAndHold):
+    """
+    soak 시험용 전략, TRADE_INTERVAL 틱마다 예산 1/5 시장가 매수와 보유 수량 전량 매도를 번갈아 요청한다.
+    거래 루프가 주문 worker보다 빠르므로 요청한 주문의 체결 결과를 받기 전에는 다시 요청하지 않는다.
+    """
+
+    TRADE_INTERVAL = 10
+
+    def __init__(self):
+        super().__init__()
+        self.name = "RoundTrip"
+        self.tick = 0
+        self.amount = 0.0
+        self.pending_id = None
+
+    def get_request(self):
+        self.tick += 1
+        if self.tick % self.TRADE_INTERVAL != 0 or self.pending_id is not None or len(self.data) == 0:
+            return None
+
+        last = self.data[-1]
+        if self.amount > 0:
+            # 거래소 수량 표기 반올림으로 보유 수량보다 많이 팔지 않도록 내림
+            amount = int(self.amount * 1e7) / 1e7
+            request = TradingRequest(
+                id=f"soak-{self.tick}", type="sell", price=last["closing_price"], amount=amount,
+                date_time=last["date_time"])
+        else:
+            price = round(self.budget / 5)
+            request = TradingRequest(
+                id=f"soak-{self.tick}", type="buy", price=price, amount=round(price / last["closing_price"], 8),
+                date_time=last["date_time"])
+        self.pending_id = request["id"]
+        return [request]
+
+    def update_result(self, result):
+        super().update_result(result)
+        if result["state"] != "done":
+            return
+
+        if result["request"]["id"] == self.pending_id:
+            self.pending_id = None
+        if result["type"] == "buy":
+            self.amount = round(self.amount + float(result["amount"]), 8)
+        else:
+            self.amount = max(round(self.amount - float(result["amount"]), 8), 0.0)
+            if self.amount < 1e-7:
+                self.amount = 0.0
+
+
+def print_report(report):
+    first = report["samples"][0] if report["samples"] else None
+    last = report["samples"][-1] if report["samples"] else None
+    print(f"{report['strategy']} {report['days']} day(s), {report['tick_count']} ticks in {report['elapsed']}s")
+    for component, per_day in sorted(report["growth"]["memory"].items(), key=lambda item: -abs(item[1])):
+        print(f"{component:30} {per_day:14,} bytes/day")
+    print(f"{'objects':30} {report['growth']['objects']:14,} /day")
+    print(f"{'threads':30} {report['growth']['threads']:14,}")
+    if first is not None:
+        for name, count in last["items"].items():
+            print(f"{name:30} {first['items'].get(name, 0):>8} -> {count}")
+    for failure in report["failures"]:
+        print(f"FAIL {failure}")
+    print("PASSED" if report["passed"] else "FAILED")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m TS.soak_test")
+    parser.add_argument("--days", help="simulated days, one tick is one minute", type=float, default=1)
+    parser.add_argument("--strategy", help="0: buy and sell, 1: buy and hold, 2: round trip", type=int, default=2)
+    parser.add_argument("--budget", help="start budget", type=float, default=1000000)
+    parser.add_argument("--seed", help="synthetic data random seed", type=int, default=None)
+    parser.add_argument("--sample_interval", help="ticks between samples", type=int, default=None)
+    parser.add_argument("--memory_budget", help="memory growth budget per module (bytes/day)", type=int, default=None)
+    parser.add_argument("--object_budget", help="object count growth budget (count/day)", type=int, default=None)
+    parser.add_argument("--thread_budget", help="thread count growth budget", type=int, default=None)
+    parser.add_argument("--output", help="JSON file to save the result", default=None)
+    args = parser.parse_args(argv)
+
+    report = SoakTest(
+        days=args.days,
+        strategy=args.strategy,
+        budget=args.budget,
+        seed=args.seed,
+        sample_interval=args.sample_interval,
+        memory_budget=args.memory_budget,
+        object_budget=args.object_budget,
+        thread_budget=args.thread_budget).run()
+    print_report(report)
+
+    output = args.output
+    if output is None:
+        output = OUTPUT_FOLDER + f"soak-{datetime.now().strftime('%y%m%d.%H%M%S')}.json"
+    save_report(report, output)
+    print(f"saved to {output}")
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
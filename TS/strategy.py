@@ -1,12 +1,19 @@
+import copy
+
 from abc import ABCMeta, abstractmethod
+from .records import CandleInfo
 
 
 class Stratgy(metaclass=ABCMeta):
     """
     데이터를 받아서 정해진 전랙에 따라
     매매 판단을 하고 결과를 받아서 다음 판단에 반영하는 Strategy 추상 클래스
+
+    LEDGER_ATTRIBUTES: 복구를 위해 저장하는 전략의 상태 변수 목록
     """
 
+    LEDGER_ATTRIBUTES = ("is_initialized", "budget", "balance", "min_price", "hold", "last_buy_id", "waiting_requests")
+
     @abstractmethod
     def initialize(self, budget, min_price=100):
         """ 
@@ -61,4 +68,62 @@ class Stratgy(metaclass=ABCMeta):
             "msg": 거래 결과 메시지,
             "date_time": 거래 체결 시간
         }
-        """
\ No newline at end of file
+        """
+
+    def update_closed_candle(self, interval, info):
+        """
+        DataProvider가 직접 만든 캔들이 완성되면 호출된다. 여러 주기의 캔들을 사용하는 전략에서 구현한다.
+
+        interval: 캔들 주기(초)
+        info: 완성된 캔들의 거래 정보, update_trading_info와 같은 형식
+        """
+
+    def warm_up(self, info_list):
+        """
+        거래 시작 전에 과거 거래 정보를 한 번에 추가한다.
+        info_list: 오래된 순서의 거래 정보 리스트
+        """
+        for info in info_list:
+            self.update_trading_info(info)
+
+    def update_backfill(self, info_list):
+        """
+        실시간 조회가 실패해서 빠졌다가 나중에 채워진 과거 거래 정보를 시간 순서에 맞게 끼워 넣는다.
+        info_list: 오래된 순서의 거래 정보 리스트
+        """
+        if self.is_initialized is not True:
+            return
+
+        merged = sorted(list(self.data) + [CandleInfo.from_dict(info) for info in info_list],
+                        key=lambda info: info["date_time"])
+        self.data.clear()
+        self.data.extend(merged)
+
+    def get_ledger(self):
+        """
+        잔고, 보유 상태, 체결 대기 주문 등 크기가 작은 상태 변수를 반환
+        딕셔너리 안의 주문 결과는 변경할 수 없는 record이므로 딕셔너리만 복사한다.
+        """
+        return {
+            name: copy.copy(getattr(self, name))
+            for name in self.LEDGER_ATTRIBUTES if hasattr(self, name)}
+
+    def set_ledger(self, ledger):
+        """ get_ledger로 저장한 상태 변수를 복구 """
+        for name, value in ledger.items():
+            setattr(self, name, copy.copy(value))
+
+    def get_state(self):
+        """ 복구를 위한 전략의 전체 상태를 반환 """
+        return {
+            "ledger": self.get_ledger(),
+            "data": list(self.data),
+            "result": list(self.result)}
+
+    def set_state(self, state):
+        """ get_state로 저장한 상태를 복구 """
+        self.set_ledger(state["ledger"])
+        self.data.clear()
+        self.data.extend(state["data"])
+        self.result.clear()
+        self.result.extend(state["result"])
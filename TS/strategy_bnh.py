@@ -1,8 +1,6 @@
-import copy
-import time
-
-from datetime import datetime
 from urllib import request
+from .clock import Clock
+from .records import CandleInfo, TradingRequest, TradingResult
 from .strategy import Stratgy
 from .log_manager import LogManager
 
@@ -67,7 +65,7 @@ class StrategyBuyAndHold(Stratgy):
 
         if self.is_initialized is not True: 
             return
-        self.data.append(copy.deepcopy(info))
+        self.data.append(CandleInfo.from_dict(info))
 
     def get_request(self):
         """
@@ -86,8 +84,6 @@ class StrategyBuyAndHold(Stratgy):
             "date_time": 요청 생성 시간, 시뮬레이션에서는 데이터 시간
         }]
         """
-        signal = False
-
         if self.is_initialized is not True:
             return 
         
@@ -96,7 +92,7 @@ class StrategyBuyAndHold(Stratgy):
                 raise UserWarning("Data is empty")
 
             last_closing_price = self.data[-1]["closing_price"]
-            now_time = datetime.now().strftime(self.ISO_DATEFORMAT)
+            now_time = Clock.now_string()
 
             if self.is_simulation:
                 now_time = self.data[-1]["date_time"]
@@ -112,12 +108,12 @@ class StrategyBuyAndHold(Stratgy):
             amount = round(target_price / last_closing_price, 4) 
             
             # 신규 주문 정보 생성
-            trading_request = {
-                "id": str(round(time.time(), 3)),
-                "type": "buy",
-                "price": target_price,
-                "amount": amount,
-                "date_time": now_time}
+            trading_request = TradingRequest(
+                id=str(round(Clock.time(), 3)),
+                type="buy",
+                price=target_price,
+                amount=amount,
+                date_time=now_time)
 
             if self.min_price > target_price:
                 raise UserWarning("Total value is smaller than min price")
@@ -137,17 +133,16 @@ class StrategyBuyAndHold(Stratgy):
 
                 # 체결 대기인 이전 주문부터 최종 요청 리스트에 추가 (리스트 순대로 주문)
                 final_requests.append(
-                    {
-                        "id": request_id,
-                        "type": "cancel",
-                        "price": 0,
-                        "amount": 0,
-                        "date_time": now_time
-                    })
+                    TradingRequest(
+                        id=request_id,
+                        type="cancel",
+                        price=0,
+                        amount=0,
+                        date_time=now_time))
 
             # 신규 주문 최종 요청 리스트에 추가
             final_requests.append(trading_request)
-            return final_requests, signal
+            return final_requests
     
 
         except (ValueError, KeyError) as msg:
@@ -161,13 +156,12 @@ class StrategyBuyAndHold(Stratgy):
             # 시뮬에서는 싱크를 맞추기 위해 항상 주문 생성
             if self.is_simulation:
                 return [
-                    {
-                        "id": str(round(time.time(), 3)),
-                        "type": "buy",
-                        "price": 0,
-                        "amount": 0,
-                        "date_time": now_time
-                    }]
+                    TradingRequest(
+                        id=str(round(Clock.time(), 3)),
+                        type="buy",
+                        price=0,
+                        amount=0,
+                        date_time=now_time)]
             return None
 
             
@@ -194,6 +188,7 @@ class StrategyBuyAndHold(Stratgy):
             return
     
         try:
+            result = TradingResult.from_dict(result)
             request = result["request"]
 
             # 특정 주문이 대기 상태인 경우 대기 주문 딕셔너리에 추가하고 종료
@@ -219,7 +214,7 @@ class StrategyBuyAndHold(Stratgy):
             self.logger.info(f"price: {result['price']}, amount: {result['amount']}")
             self.logger.info(f"total: {total}, balance: {self.balance}")
             self.logger.info("================================================")
-            self.result.append(copy.deepcopy(result))
+            self.result.append(result)
 
         except (AttributeError, TypeError) as msg:
             self.logger.error(msg)
\ No newline at end of file
@@ -1,10 +1,9 @@
-import copy
-import time
-
 from collections import deque
-from datetime import datetime, timedelta
 from urllib import request
+from .clock import Clock
+from .date_converter import DateConverter
 from .upbit_trader import UpbitTrader
+from .records import CandleInfo, TradingRequest, TradingResult
 from .strategy import Stratgy
 from .log_manager import LogManager
 
@@ -72,7 +71,16 @@ class StrategyBuyAndSell(Stratgy):
 
         if self.is_initialized is not True: 
             return
-        self.data.append(copy.deepcopy(info))
+        self.data.append(CandleInfo.from_dict(info))
+
+    def warm_up(self, info_list):
+        """
+        과거 종목 데이터를 한 번에 추가
+        info_list: 오래된 순서의 종목 데이터 리스트
+        """
+        if self.is_initialized is not True:
+            return
+        self.data.extend(CandleInfo.from_dict(info) for info in info_list)
 
     def get_request(self):
         """
@@ -99,20 +107,21 @@ class StrategyBuyAndSell(Stratgy):
             if len(self.data) == 0 or self.data[-1] is None:
                 raise UserWarning("Data is empty")
             last_closing_price = self.data[-1]["closing_price"]
-            now_time = datetime.now().strftime(self.ISO_DATEFORMAT)
-            delta = timedelta(minutes=5)
+            now_time = Clock.now_string()
+            now_timestamp = DateConverter.now_timestamp()
+            delta = 5 * 60
 
             # 매수 주문
             if (last_closing_price == mean_price):
                 if self.hold is False and self.hold != "ready":
                     price = self.balance
                     amount = round(price / last_closing_price, 8)
-                    trading_request = {
-                        "id": str(round(time.time(), 3)),
-                        "type": "buy",
-                        "price": price,
-                        "amount": amount,
-                        "date_time": now_time}
+                    trading_request = TradingRequest(
+                        id=str(round(Clock.time(), 3)),
+                        type="buy",
+                        price=price,
+                        amount=amount,
+                        date_time=now_time)
                     self.hold = "ready"
 
             # 매도 주문 
@@ -122,17 +131,16 @@ class StrategyBuyAndSell(Stratgy):
                     for result in self.result:
                         if result["request"]["id"] == self.last_buy_id:
                             if result["state"] in ["done", "cancel"]:
-                                if datetime.strptime(now_time, self.ISO_DATEFORMAT) \
-                                    - datetime.strptime(result["date_time"], self.ISO_DATEFORMAT) >= delta:
+                                if now_timestamp - DateConverter.to_timestamp(result["date_time"]) >= delta:
 
                                     amount = result["amount"]
                                     price = result["price"]
-                                    trading_request = {
-                                        "id": str(round(time.time(), 3)),
-                                        "type": "sell",
-                                        "price": price,
-                                        "amount": amount,
-                                        "date_time": now_time}
+                                    trading_request = TradingRequest(
+                                        id=str(round(Clock.time(), 3)),
+                                        type="sell",
+                                        price=price,
+                                        amount=amount,
+                                        date_time=now_time)
                                     self.hold = "ready"
 
             # 신규 주문 생성 시점에서 여전히 체결 대기 상태인 이전 주문은 취소 주문으로 변경하여 추가
@@ -142,13 +150,12 @@ class StrategyBuyAndSell(Stratgy):
 
                 # 체결 대기인 이전 주문부터 최종 요청 리스트에 추가 (리스트 순대로 주문)
                 final_requests.append(
-                    {
-                        "id": request_id,
-                        "type": "cancel",
-                        "price": 0,
-                        "amount": 0,
-                        "date_time": now_time
-                    })
+                    TradingRequest(
+                        id=request_id,
+                        type="cancel",
+                        price=0,
+                        amount=0,
+                        date_time=now_time))
 
             # 신규 주문 최종 요청 리스트에 추가
             if trading_request is not None: 
@@ -195,6 +202,7 @@ class StrategyBuyAndSell(Stratgy):
             return
     
         try:
+            result = TradingResult.from_dict(result)
             request = result["request"]
 
             # 특정 주문이 대기 상태인 경우 대기 주문 딕셔너리에 추가하고 종료
@@ -220,7 +228,7 @@ class StrategyBuyAndSell(Stratgy):
             self.logger.info(f"price: {result['price']}, amount: {result['amount']}")
             self.logger.info(f"total: {total}, balance: {self.balance}")
             self.logger.info("================================================")
-            self.result.append(copy.deepcopy(result))
+            self.result.append(result)
 
         except (AttributeError, TypeError) as msg:
             self.logger.error(msg)
\ No newline at end of file
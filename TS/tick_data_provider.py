@@ -0,0 +1,103 @@
+import collections
+import os
+
+from .candle_aggregator import CandleAggregator
+from .clock import Clock
+from .data_provider import DataProvider
+from .log_manager import LogManager
+from .quote_cache import QuoteCache
+from .upbit_api import UpbitAPI
+
+
+class TickDataProvider(DataProvider):
+    """
+    업비트 체결 정보로 원하는 주기의 캔들을 직접 만들어 제공하는 DataProvider
+    체결 조회 한 번으로 여러 주기의 캔들을 함께 갱신하며, 캔들이 완성되면 bar_listener에 알린다.
+    UPBIT_OPEN_API_SERVER_URL 이 설정된 경우 해당 서버에서 데이터를 가져온다
+
+    intervals: 캔들 주기(초) 리스트, 첫 번째 주기의 진행 중인 캔들이 get_info의 결과
+    tick_count: 한 번에 조회할 최근 체결 개수, 조회 사이의 체결 수보다 커야 누락이 없다
+    bar_listener: 캔들이 완성되면 호출할 함수 bar_listener(interval, candle_info)
+    """
+
+    URL = "https://api.upbit.com/v1/trades/ticks"
+    TICKS_PATH = "/v1/trades/ticks"
+    MAX_TICK_COUNT = 500
+
+    def __init__(self, intervals=(60,), tick_count=100):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        server_url = os.environ.get("UPBIT_OPEN_API_SERVER_URL")
+        if server_url is not None:
+            self.URL = server_url + self.TICKS_PATH
+        self.interval = intervals[0]
+        self.intervals = intervals
+        self.query_string = {"market": "KRW-BTC", "count": min(tick_count, self.MAX_TICK_COUNT)}
+        self.upbit_api = UpbitAPI(access_key=0, secret_key=0, server_url=0, market=0)
+        self.bar_listener = None
+        self.last_closed = {}
+        self.seen_ids = collections.deque()
+        self.seen_id_set = set()
+        self.aggregator = CandleAggregator(self.query_string["market"], intervals, self._on_bar_closed)
+
+    def set_market(self, market="KRW-BTC"):
+        """ 마켓을 설정한다, 진행 중인 캔들은 버린다 """
+        self.query_string["market"] = market
+        self.aggregator = CandleAggregator(market, self.intervals, self._on_bar_closed)
+        self.last_closed.clear()
+        self.seen_ids.clear()
+        self.seen_id_set.clear()
+
+    def get_info(self):
+        """
+        최근 체결을 조회해서 캔들에 반영하고 기준 주기의 진행 중인 캔들 정보를 반환한다.
+        이번 주기에 체결이 없으면 마지막으로 완성된 캔들 정보를 반환한다.
+
+        returns: 거래 정보 info, DataProvider.get_info 참고
+        """
+        self.poll()
+        info = self.aggregator.get_bar(self.interval)
+        if info is None:
+            info = self.last_closed.get(self.interval)
+        if info is None:
+            raise UserWarning("No trade tick for candle")
+        return info
+
+    def get_bar(self, interval):
+        """ 주기의 진행 중인 캔들 정보, 없으면 None """
+        return self.aggregator.get_bar(interval)
+
+    def poll(self):
+        """
+        최근 tick_count 개의 체결 중 처음 보는 체결만 오래된 순서로 반영하고 끝난 주기의 캔들을 완성한다.
+        """
+        ticks = self.upbit_api.get_data_from_server(url=self.URL, params=self.query_string)
+        new_ticks = [tick for tick in reversed(ticks) if tick["sequential_id"] not in self.seen_id_set]
+        if len(self.seen_ids) > 0 and len(new_ticks) == len(ticks):
+            self.logger.warning(f"trade ticks may be missed, increase tick_count {self.query_string['count']}")
+
+        for tick in new_ticks:
+            self.put_tick(tick)
+        if len(ticks) > 0:
+            QuoteCache.put(self.query_string["market"], ticks[0]["trade_price"])
+        self.aggregator.close_until(Clock.time())
+
+    def put_tick(self, tick):
+        """
+        체결 하나를 캔들에 반영한다. REST 체결 응답과 웹소켓 trade 메시지 모두 지원
+        """
+        sequential_id = tick["sequential_id"]
+        if sequential_id in self.seen_id_set:
+            return
+
+        self.seen_ids.append(sequential_id)
+        self.seen_id_set.add(sequential_id)
+        if len(self.seen_ids) > self.query_string["count"] * 2:
+            self.seen_id_set.discard(self.seen_ids.popleft())
+
+        timestamp = tick.get("trade_timestamp", tick["timestamp"]) / 1000
+        self.aggregator.put_tick(timestamp, tick["trade_price"], tick["trade_volume"])
+
+    def _on_bar_closed(self, interval, candle_info):
+        self.last_closed[interval] = candle_info
+        if self.bar_listener is not None:
+            self.bar_listener(interval, candle_info)
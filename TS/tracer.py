@@ -0,0 +1,308 @@
+import bisect
+import os
+import threading
+import time
+
+
+class LatencyHistogram:
+    """
+    지연 시간(초) 분포를 고정 구간으로 집계하는 히스토그램
+
+    buckets: 구간 상한 값 리스트, 마지막 구간 이후는 +Inf 구간
+    counts: 구간별 개수
+    count: 전체 개수
+    total: 전체 합
+    max: 최대 값
+    """
+
+    BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+    def __init__(self, buckets=None):
+        self.buckets = tuple(self.BUCKETS if buckets is None else buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        """ 값을 추가한다 """
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, ratio):
+        """
+        ratio(0~1) 위치 값이 속한 구간의 상한 값을 반환, 최대 값보다 크면 최대 값
+        """
+        with self.lock:
+            if self.count == 0:
+                return 0.0
+
+            target = ratio * self.count
+            accumulated = 0
+            for index, count in enumerate(self.counts):
+                accumulated += count
+                if accumulated >= target and count > 0:
+                    if index < len(self.buckets):
+                        return min(self.buckets[index], self.max)
+                    return self.max
+            return self.max
+
+    def to_dict(self):
+        """
+        집계 결과 반환
+
+        returns:
+        {
+            "count": 개수,
+            "mean": 평균,
+            "p50", "p90", "p99": 백분위 구간 상한,
+            "max": 최대 값
+        }
+        """
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count > 0 else 0.0,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+            "max": self.max}
+
+
+class TraceContext:
+    """
+    하나의 캔들에서 시작해서 주문 결과 콜백까지 이어지는 추적 정보
+
+    trace_id: 추적 id
+    start: 추적 시작 시간 (perf_counter)
+    marks: 단계 시작 시간 딕셔너리
+    spans: (단계, 소요 시간) 리스트
+    """
+
+    __slots__ = ("trace_id", "start", "marks", "spans")
+
+    def __init__(self, trace_id):
+        self.trace_id = trace_id
+        self.start = time.perf_counter()
+        self.marks = {"start": self.start}
+        self.spans = []
+
+
+class _Span:
+    """ with 블록의 소요 시간을 단계별 히스토그램에 기록 """
+
+    __slots__ = ("stage", "context", "start")
+
+    def __init__(self, stage, context):
+        self.stage = stage
+        self.context = context
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        Tracer.observe(self.stage, time.perf_counter() - self.start, self.context)
+        return False
+
+
+class _NullSpan:
+    """ 추적이 꺼져 있을 때 사용하는 아무 일도 하지 않는 span """
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+class _Activation:
+    """ with 블록 동안 현재 스레드의 추적 정보를 설정 """
+
+    __slots__ = ("context", "previous")
+
+    def __init__(self, context):
+        self.context = context
+        self.previous = None
+
+    def __enter__(self):
+        self.previous = getattr(Tracer.local, "context", None)
+        Tracer.local.context = self.context
+        return self.context
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        Tracer.local.context = self.previous
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    캔들 수신부터 주문 체결 콜백까지 단계별 지연 시간을 추적하는 클래스
+
+    캔들마다 TraceContext를 만들고, 주문 요청 id에 연결해서
+    Operator -> UpbitTrader -> UpbitAPI -> 결과 콜백까지 전달한다.
+    단계별 소요 시간은 LatencyHistogram으로 집계된다.
+    TS_TRACE=1 환경 변수 또는 Tracer.enable()로 켤 수 있으며, 꺼져 있으면 아무것도 기록하지 않는다.
+
+    단계:
+        fetch: 데이터 조회
+        strategy: 전략의 데이터 갱신
+        signal: 전략의 주문 생성
+        analyzer: 분석용 데이터 저장
+        queue: Worker 큐 대기
+        jwt: JWT 토큰 생성
+        http.<name>: 거래소 API 호출
+        tick_to_order: 캔들 조회 시작부터 주문 접수 완료까지
+        fill_wait: 주문 접수 완료부터 체결 확인까지 (결과 확인 타이머 포함)
+        callback: 결과 콜백 처리
+        tick_to_fill: 캔들 조회 시작부터 체결 콜백까지
+    """
+
+    MAX_TRACES = 10000
+
+    enabled = os.environ.get("TS_TRACE", "0") == "1"
+    histograms = {}
+    traces = {}
+    local = threading.local()
+    lock = threading.Lock()
+    trace_count = 0
+
+    @classmethod
+    def enable(cls, is_enabled=True):
+        """ 추적을 켜거나 끈다 """
+        cls.enabled = is_enabled
+
+    @classmethod
+    def reset(cls):
+        """ 집계된 결과와 추적 정보를 모두 지운다 """
+        with cls.lock:
+            cls.histograms = {}
+            cls.traces = {}
+
+    @classmethod
+    def start_trace(cls):
+        """ 새로운 추적을 시작한다. 꺼져 있으면 None """
+        if cls.enabled is False:
+            return None
+
+        with cls.lock:
+            cls.trace_count += 1
+            return TraceContext(cls.trace_count)
+
+    @classmethod
+    def span(cls, stage, context=None):
+        """
+        with 블록의 소요 시간을 stage 단계로 기록하는 context manager
+        context가 없으면 현재 스레드에 설정된 추적 정보를 사용한다.
+        """
+        if cls.enabled is False:
+            return _NULL_SPAN
+        if context is None:
+            context = getattr(cls.local, "context", None)
+        return _Span(stage, context)
+
+    @classmethod
+    def activate(cls, context):
+        """ with 블록 동안 현재 스레드의 추적 정보를 context로 설정하는 context manager """
+        if cls.enabled is False:
+            return _NULL_SPAN
+        return _Activation(context)
+
+    @classmethod
+    def current(cls):
+        """ 현재 스레드에 설정된 추적 정보 """
+        if cls.enabled is False:
+            return None
+        return getattr(cls.local, "context", None)
+
+    @classmethod
+    def bind(cls, request_id, context):
+        """ 주문 요청 id에 추적 정보를 연결한다 """
+        if context is None:
+            return
+
+        with cls.lock:
+            cls.traces[request_id] = context
+            # 결과를 받지 못한 추적 정보가 계속 쌓이지 않도록 오래된 것부터 삭제
+            while len(cls.traces) > cls.MAX_TRACES:
+                del cls.traces[next(iter(cls.traces))]
+
+    @classmethod
+    def get(cls, request_id):
+        """ 주문 요청 id에 연결된 추적 정보, 없으면 None """
+        if cls.enabled is False:
+            return None
+        return cls.traces.get(request_id)
+
+    @classmethod
+    def discard(cls, request_id):
+        """ 주문 요청 id에 연결된 추적 정보를 기록 없이 삭제 """
+        if cls.enabled is False:
+            return
+        with cls.lock:
+            cls.traces.pop(request_id, None)
+
+    @classmethod
+    def mark(cls, context, name):
+        """ 추적 정보에 현재 시간을 name으로 기록 """
+        if context is None:
+            return
+        context.marks[name] = time.perf_counter()
+
+    @classmethod
+    def observe_since(cls, context, stage, mark_name):
+        """ mark_name 으로 기록된 시간부터 현재까지를 stage 단계로 기록 """
+        if context is None or mark_name not in context.marks:
+            return
+        cls.observe(stage, time.perf_counter() - context.marks[mark_name], context)
+
+    @classmethod
+    def finish(cls, request_id):
+        """ 추적을 끝내고 시작부터 현재까지를 tick_to_fill 단계로 기록 """
+        if cls.enabled is False:
+            return
+        with cls.lock:
+            context = cls.traces.pop(request_id, None)
+        cls.observe_since(context, "tick_to_fill", "start")
+
+    @classmethod
+    def observe(cls, stage, seconds, context=None):
+        """ stage 단계의 소요 시간을 기록 """
+        histogram = cls.histograms.get(stage)
+        if histogram is None:
+            with cls.lock:
+                histogram = cls.histograms.setdefault(stage, LatencyHistogram())
+        histogram.observe(seconds)
+
+        if context is not None:
+            context.spans.append((stage, seconds))
+
+    @classmethod
+    def get_report(cls):
+        """
+        단계별 지연 시간 집계 결과
+
+        returns: {단계: LatencyHistogram.to_dict()}
+        """
+        return {stage: histogram.to_dict() for stage, histogram in list(cls.histograms.items())}
+
+    @classmethod
+    def format_report(cls):
+        """ 단계별 지연 시간 집계 결과를 표 형태의 문자열로 반환 """
+        lines = [f"{'stage':24} {'count':>8} {'mean(ms)':>10} {'p50(ms)':>10} {'p90(ms)':>10} {'p99(ms)':>10} {'max(ms)':>10}"]
+        for stage, item in sorted(cls.get_report().items()):
+            lines.append(
+                f"{stage:24} {item['count']:8} {item['mean'] * 1000:10.2f} {item['p50'] * 1000:10.2f} "
+                f"{item['p90'] * 1000:10.2f} {item['p99'] * 1000:10.2f} {item['max'] * 1000:10.2f}")
+        return "\n".join(lines)
@@ -0,0 +1,230 @@
+import argparse
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+from .date_converter import DateConverter
+from .log_manager import LogManager
+from .records import Record
+
+
+class TradeJournal:
+    """
+    거래 요청, 주문 상태 변화, 체결, 잔고 변화를 SQLite(WAL)에 기록하는 거래 일지
+
+    기록 요청은 큐에 넣기만 하고 별도의 쓰기 스레드가 모아서 한 번에 commit 한다.
+    batch_size 개가 모이거나 commit_interval 초가 지나면 commit 하며,
+    request_id, uuid, 시간으로 조회할 수 있도록 인덱스를 만든다.
+
+    kind:
+        request: 전략이 만든 거래 요청
+        order: 거래소에 접수된 주문 (uuid 포함)
+        result: 체결 또는 취소 완료 결과
+        balance: 체결 후 잔고와 보유 수량
+    """
+
+    DEFAULT_FILENAME = "output/journal.db"
+    COMMIT_INTERVAL = 0.5
+    BATCH_SIZE = 500
+    COLUMNS = ("timestamp", "kind", "request_id", "uuid", "type", "state", "price", "amount", "balance", "date_time", "data")
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS journal ("
+        "seq INTEGER PRIMARY KEY AUTOINCREMENT, timestamp REAL NOT NULL, kind TEXT NOT NULL, "
+        "request_id TEXT, uuid TEXT, type TEXT, state TEXT, price REAL, amount REAL, balance REAL, "
+        "date_time TEXT, data TEXT)",
+        "CREATE INDEX IF NOT EXISTS journal_request_id ON journal (request_id)",
+        "CREATE INDEX IF NOT EXISTS journal_uuid ON journal (uuid)",
+        "CREATE INDEX IF NOT EXISTS journal_timestamp ON journal (timestamp)",
+    )
+
+    def __init__(self, filename=None, commit_interval=None, batch_size=None):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.filename = self.DEFAULT_FILENAME if filename is None else filename
+        self.commit_interval = self.COMMIT_INTERVAL if commit_interval is None else commit_interval
+        self.batch_size = self.BATCH_SIZE if batch_size is None else batch_size
+        self.queue = queue.Queue()
+        self.thread = None
+
+        folder = os.path.dirname(self.filename)
+        if folder and os.path.isdir(folder) is False:
+            os.makedirs(folder)
+
+        connection = self._connect()
+        for statement in self.SCHEMA:
+            connection.execute(statement)
+        connection.commit()
+        connection.close()
+
+    def start(self):
+        """ 쓰기 스레드를 시작한다 """
+        if self.thread is not None:
+            return
+
+        self.thread = threading.Thread(target=self._write_loop, name="TradeJournal-Writer", daemon=True)
+        self.thread.start()
+
+    def close(self):
+        """ 남은 기록을 모두 쓰고 쓰기 스레드를 종료한다 """
+        if self.thread is None:
+            return
+
+        self.queue.put(None)
+        self.thread.join()
+        self.thread = None
+
+    def flush(self, timeout=None):
+        """ 지금까지 요청된 기록이 commit 될 때까지 기다린다 """
+        if self.thread is None:
+            return False
+
+        event = threading.Event()
+        self.queue.put(event)
+        return event.wait(timeout)
+
+    def record_request(self, request):
+        """ 전략이 만든 거래 요청을 기록 """
+        self._put("request", request, request_id=request["id"], type=request["type"],
+                  price=request.get("price"), amount=request.get("amount"), date_time=request.get("date_time"))
+
+    def record_order(self, request_id, order_uuid, result):
+        """ 거래소에 접수된 주문을 기록 """
+        self._put("order", result, request_id=request_id, uuid=order_uuid, type=result["type"],
+                  state=result["state"], price=result.get("price"), amount=result.get("amount"))
+
+    def record_result(self, result):
+        """ 체결 또는 취소 완료 결과를 기록 """
+        self._put("result", result, request_id=result["request"]["id"], uuid=result.get("uuid"),
+                  type=result["type"], state=result["state"], price=result.get("price"),
+                  amount=result.get("amount"), date_time=result.get("date_time"))
+
+    def record_balance(self, balance, asset, request_id=None):
+        """ 잔고와 보유 자산 (평균 매입 가격, 수량) 변화를 기록 """
+        self._put("balance", {"balance": balance, "asset": asset}, request_id=request_id,
+                  balance=balance, amount=asset[1] if asset is not None else None)
+
+    def query(self, request_id=None, order_uuid=None, start=None, end=None, kind=None, limit=None):
+        """
+        조건에 맞는 기록을 시간 순서로 반환한다.
+
+        start, end: epoch 초 범위 (end 미포함)
+        returns: [{컬럼 이름: 값}], data 컬럼은 딕셔너리로 변환
+        """
+        conditions = []
+        params = []
+        for column, value in (("request_id", request_id), ("uuid", order_uuid), ("kind", kind)):
+            if value is not None:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        if start is not None:
+            conditions.append("timestamp >= ?")
+            params.append(start)
+        if end is not None:
+            conditions.append("timestamp < ?")
+            params.append(end)
+
+        sql = "SELECT seq, " + ", ".join(self.COLUMNS) + " FROM journal"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY seq"
+        if limit is not None:
+            sql += f" LIMIT {int(limit)}"
+
+        connection = self._connect()
+        connection.row_factory = sqlite3.Row
+        try:
+            rows = []
+            for row in connection.execute(sql, params):
+                item = dict(row)
+                item["data"] = json.loads(item["data"]) if item["data"] is not None else None
+                rows.append(item)
+            return rows
+        finally:
+            connection.close()
+
+    def _put(self, kind, data, **columns):
+        columns["timestamp"] = time.time()
+        columns["kind"] = kind
+        columns["data"] = data
+        self.queue.put(columns)
+
+    def _connect(self):
+        connection = sqlite3.connect(self.filename, timeout=10)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _write_loop(self):
+        connection = self._connect()
+        is_running = True
+        while is_running:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.commit_interval
+
+            # batch_size 만큼 모이거나 commit_interval 이 지날 때까지 모아서 한 번에 commit
+            while batch[-1] is not None and len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            rows = [self._to_row(item) for item in batch if isinstance(item, dict)]
+            if rows:
+                try:
+                    placeholders = ", ".join("?" for _ in self.COLUMNS)
+                    connection.executemany(
+                        f"INSERT INTO journal ({', '.join(self.COLUMNS)}) VALUES ({placeholders})", rows)
+                    connection.commit()
+                except sqlite3.Error as msg:
+                    self.logger.error(f"journal write fail {msg}")
+
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+                elif item is None:
+                    is_running = False
+        connection.close()
+
+    def _to_row(self, columns):
+        columns["data"] = json.dumps(columns["data"], default=_to_json, ensure_ascii=False)
+        return tuple(columns.get(name) for name in self.COLUMNS)
+
+
+def _to_json(value):
+    if isinstance(value, Record):
+        return value.to_dict()
+    return str(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m TS.trade_journal")
+    parser.add_argument("--filename", help="journal database file", default=TradeJournal.DEFAULT_FILENAME)
+    parser.add_argument("--request_id", help="request id", default=None)
+    parser.add_argument("--uuid", help="order uuid", default=None)
+    parser.add_argument("--kind", help="request, order, result, balance", default=None)
+    parser.add_argument("--start", help="start time (KST, Ex. 2022-10-01T09:00:00)", default=None)
+    parser.add_argument("--end", help="end time (KST, Ex. 2022-10-02T09:00:00)", default=None)
+    parser.add_argument("--limit", help="max row count", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    journal = TradeJournal(args.filename)
+    rows = journal.query(
+        request_id=args.request_id,
+        order_uuid=args.uuid,
+        start=DateConverter.to_timestamp(args.start) if args.start else None,
+        end=DateConverter.to_timestamp(args.end) if args.end else None,
+        kind=args.kind,
+        limit=args.limit)
+    for row in rows:
+        print(json.dumps(row, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -43,9 +43,12 @@ class Trader(metaclass=ABCMeta):
         """
 
     @abstractmethod
-    def cancel_all_requests(self):
+    def cancel_all_requests(self, timeout=None):
         """
         모든 거래 요청을 취소한다. 
+        timeout 초 안에 끝내지 못한 요청은 취소하지 않고 남겨둔다.
+
+        returns: 취소하지 못한 요청 id 리스트
         """
 
     @abstractmethod
@@ -63,3 +66,19 @@ class Trader(metaclass=ABCMeta):
             }
         """
 
+    def get_state(self):
+        """
+        복구를 위한 상태를 반환한다.
+        상태를 저장하지 않는 Trader는 None을 반환한다.
+        """
+        return None
+
+    def set_state(self, state):
+        """
+        get_state로 저장한 상태를 복구한다.
+        """
+
+    def reconcile_orders(self, callback):
+        """
+        복구된 체결 대기 주문을 거래소 상태와 맞추고 결과를 callback으로 전달한다.
+        """
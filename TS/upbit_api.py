@@ -1,3 +1,4 @@
+import re
 import uuid
 import threading
 import hashlib
@@ -8,18 +9,28 @@ from datetime import datetime
 from urllib import request, response
 from urllib.parse import urlencode
 from urllib.parse import unquote
+from urllib.parse import urlparse
 from dotenv import load_dotenv
 from .log_manager import LogManager
 from .date_converter import DateConverter
+from .metrics import MetricsRegistry
+from .quote_cache import QuoteCache
+from .tracer import Tracer
 
 class UpbitAPI:
 
+    REMAINING_REQ_PATTERN = re.compile(r"group=([\w-]+);.*sec=(\d+)")
+
     def __init__(self, access_key, secret_key, server_url, market):
         self.ACCESS_KEY = access_key
         self.SECRET_KEY = secret_key
         self.SERVER_URL = server_url
         self.market = market
         self.logger = LogManager.get_logger(__class__.__name__)
+        self.call_counter = MetricsRegistry.counter("ts_api_calls_total", "Upbit API calls per endpoint")
+        self.error_counter = MetricsRegistry.counter("ts_api_errors_total", "Upbit API errors per endpoint")
+        self.rate_limit_gauge = MetricsRegistry.gauge(
+            "ts_api_rate_limit_remaining", "Remaining requests in the current second per rate limit group")
     
 
     def send_order(self, market, is_buy, price=None, volume=None):
@@ -69,25 +80,30 @@ class UpbitAPI:
 
         # 주문
         try:
-            response = requests.post(self.SERVER_URL + "/v1/orders", params=query_string, headers=headers)
+            with Tracer.span("http.send_order"):
+                response = requests.post(self.SERVER_URL + "/v1/orders", params=query_string, headers=headers)
+            self._update_api_metrics("POST /v1/orders", response)
             response.raise_for_status()
             result = response.json()
 
         except ValueError:
             self.logger.error("Invalid data from server")
+            self.error_counter.inc(endpoint="POST /v1/orders")
             return None
         except requests.exceptions.HTTPError as msg:
             self.logger.error(msg)
             return None
         except requests.exceptions.RequestException as msg:
             self.logger.error(msg)
+            self.error_counter.inc(endpoint="POST /v1/orders")
             return None
         return result
 
 
-    def cancel_order(self, request_uuid):
+    def cancel_order(self, request_uuid, timeout=None):
         """
         개별 취소 주문 접수
+        timeout: 응답 대기 최대 시간(초), 없으면 제한 없음
 
         response:
             uuid: 주문 아이디 string
@@ -116,18 +132,23 @@ class UpbitAPI:
         headers = {"Authorization": authorize_token}
 
         try:
-            response = requests.delete(self.SERVER_URL + "/v1/order", params=query_string, headers=headers)
+            with Tracer.span("http.cancel_order"):
+                response = requests.delete(
+                    self.SERVER_URL + "/v1/order", params=query_string, headers=headers, timeout=timeout)
+            self._update_api_metrics("DELETE /v1/order", response)
             response.raise_for_status()
             result = response.json()
         
         except ValueError:
             self.logger.error("Invalid data from server")
+            self.error_counter.inc(endpoint="DELETE /v1/order")
             return None
         except requests.exceptions.HTTPError as msg:
             self.logger.error(msg)
             return None
         except requests.exceptions.RequestException as msg:
             self.logger.error(msg)
+            self.error_counter.inc(endpoint="DELETE /v1/order")
             return None
         return result
 
@@ -136,19 +157,24 @@ class UpbitAPI:
         """ 
         서버에서 데이터 로드
         """
+        endpoint = self._get_endpoint("GET", url)
         try:
-            response = requests.get(url=url, params=params)
+            with Tracer.span("http.get_data_from_server"):
+                response = requests.get(url=url, params=params)
+            self._update_api_metrics(endpoint, response)
             response.raise_for_status()
             return response.json()
         
         except ValueError as error:
             self.logger.error("Invalid data from server")
+            self.error_counter.inc(endpoint=endpoint)
             raise UserWarning("Fail get data from server") from error
         except requests.exceptions.HTTPError as error:
             self.logger.error(error)
             raise UserWarning("Fail get data from server") from error
         except requests.exceptions.RequestException as error:
             self.logger.error(error)
+            self.error_counter.inc(endpoint=endpoint)
             raise UserWarning("Fail get data from server") from error
 
     def get_order_list(self, uuids, is_done_state):
@@ -197,7 +223,8 @@ class UpbitAPI:
         authorize_token = f"Bearer {jwt_token}"
         headers = {"Authorization": authorize_token}
 
-        order_list = self._request_get(self.SERVER_URL + "/v1/orders", params=query_string, headers=headers)
+        with Tracer.span("http.get_order_list"):
+            order_list = self._request_get(self.SERVER_URL + "/v1/orders", params=query_string, headers=headers)
         return order_list
 
 
@@ -235,7 +262,8 @@ class UpbitAPI:
         authorization = 'Bearer {}'.format(jwt_token)
         headers = {'Authorization': authorization}
 
-        order_one = self._request_get(self.SERVER_URL + "/v1/order", params=params, headers=headers)
+        with Tracer.span("http.get_order_one"):
+            order_one = self._request_get(self.SERVER_URL + "/v1/order", params=params, headers=headers)
         return order_one
 
 
@@ -244,7 +272,75 @@ class UpbitAPI:
         최근 체결 정보 조회 
         """
         querystring = {"market": self.market, "count": "1"}
-        return self._request_get(self.SERVER_URL + "/v1/trades/ticks/", params=querystring)
+        with Tracer.span("http.get_trade_tick"):
+            return self._request_get(self.SERVER_URL + "/v1/trades/ticks/", params=querystring)
+
+    def get_accounts(self):
+        """
+        보유 자산 목록 조회, 실패하면 None
+
+        [{'currency': 'KRW',
+        'balance': '1000000.0',
+        'locked': '0.0',
+        'avg_buy_price': '0',
+        'avg_buy_price_modified': False,
+        'unit_currency': 'KRW'}]
+        """
+        jwt_token = self._create_jwt_token(self.ACCESS_KEY, self.SECRET_KEY)
+        headers = {"Authorization": f"Bearer {jwt_token}"}
+
+        with Tracer.span("http.get_accounts"):
+            return self._request_get(self.SERVER_URL + "/v1/accounts", headers=headers)
+
+    def get_open_orders(self):
+        """
+        마켓의 체결 대기 주문 목록 조회, 실패하면 None
+        응답 형식은 get_order_list와 같다.
+        """
+        query_string = f"market={self.market}&states[]=wait&states[]=watch".encode()
+        jwt_token = self._create_jwt_token(self.ACCESS_KEY, self.SECRET_KEY, query_string)
+        headers = {"Authorization": f"Bearer {jwt_token}"}
+
+        with Tracer.span("http.get_open_orders"):
+            return self._request_get(self.SERVER_URL + "/v1/orders", params=query_string, headers=headers)
+
+    def get_latest_price(self):
+        """
+        최근 체결 가격, QuoteCache의 가격이 유효하면 거래소에 조회하지 않는다.
+        조회에 실패하면 None
+        """
+        return QuoteCache.get_or_fetch(self.market, self._fetch_latest_price)
+
+    def get_tickers(self, markets):
+        """
+        여러 종목의 현재가 정보를 한 번에 조회, 실패하면 None
+
+        [{'market': 'KRW-BTC', 'trade_price': 27198000.0, 'trade_volume': 0.0003, 'timestamp': 1664344317000, ...}]
+        """
+        querystring = {"markets": ",".join(markets)}
+        with Tracer.span("http.get_tickers"):
+            return self._request_get(self.SERVER_URL + "/v1/ticker", params=querystring)
+
+    def get_latest_prices(self, markets):
+        """
+        종목별 최근 체결 가격 딕셔너리, QuoteCache에 유효한 가격이 없는 종목만 한 번에 조회한다.
+        조회에 실패한 종목은 None
+        """
+        prices = {market: QuoteCache.get(market) for market in markets}
+        missing = [market for market, price in prices.items() if price is None]
+        if len(missing) == 0:
+            return prices
+
+        for ticker in self.get_tickers(missing) or []:
+            QuoteCache.put(ticker["market"], ticker["trade_price"])
+            prices[ticker["market"]] = float(ticker["trade_price"])
+        return prices
+
+    def _fetch_latest_price(self):
+        latest = self.get_trade_tick()
+        if not latest:
+            return None
+        return latest[0]["trade_price"]
 
     
 
@@ -289,45 +385,70 @@ class UpbitAPI:
         """
         JWT 토큰 생성 
         """
-        payload={"access_key": a_key, "nonce": str(uuid.uuid4())}
+        with Tracer.span("jwt"):
+            payload={"access_key": a_key, "nonce": str(uuid.uuid4())}
 
-        if query_string is not None:
-            msg = hashlib.sha512()
-            msg.update(query_string)
-            query_hash = msg.hexdigest()
-            payload["query_hash"] = query_hash
-            payload["query_hash_alg"] = "SHA512"
-        return jwt.encode(payload, s_key)
+            if query_string is not None:
+                msg = hashlib.sha512()
+                msg.update(query_string)
+                query_hash = msg.hexdigest()
+                payload["query_hash"] = query_hash
+                payload["query_hash_alg"] = "SHA512"
+            return jwt.encode(payload, s_key)
 
     def _request_get(self, url, headers=None, params=None):
+        endpoint = self._get_endpoint("GET", url)
         try:
             if params is not None:
                 response = requests.get(url, params=params, headers=headers)
             else:
                 response = requests.get(url, headers=headers)
             
+            self._update_api_metrics(endpoint, response)
             response.raise_for_status()
             result = response.json()
         
         except ValueError:
             self.logger.error("Invalid data from server")
+            self.error_counter.inc(endpoint=endpoint)
             return None
         except requests.exceptions.HTTPError as msg:
             self.logger.error(msg)
             return None
         except requests.exceptions.RequestException as msg:
             self.logger.error(msg)
+            self.error_counter.inc(endpoint=endpoint)
             return None
         return result
+
+    def _update_api_metrics(self, endpoint, response):
+        """
+        API 호출 수, 오류 응답 수, 응답 헤더의 남은 요청 수(Remaining-Req)를 지표에 반영
+        """
+        self.call_counter.inc(endpoint=endpoint)
+        if response.status_code >= 400:
+            self.error_counter.inc(endpoint=endpoint)
+
+        remaining = response.headers.get("Remaining-Req")
+        if remaining is None:
+            return
+
+        matched = self.REMAINING_REQ_PATTERN.search(remaining)
+        if matched is not None:
+            self.rate_limit_gauge.set(int(matched.group(2)), group=matched.group(1))
+
+    @staticmethod
+    def _get_endpoint(method, url):
+        return f"{method} {urlparse(url).path.rstrip('/')}"
     
     def _optimize_price(self, price, is_buy):
-        latest = self.get_trade_tick()
+        latest = self.get_latest_price()
 
         if latest is None:
             return price
         
-        if (is_buy is True and latest[0]["trade_price"] < price) or (
-            is_buy is False and latest[0]["trade_price"] > price):
-            return latest[0]["trade_price"]
+        if (is_buy is True and latest < price) or (
+            is_buy is False and latest > price):
+            return latest
         return price
 
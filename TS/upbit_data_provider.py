@@ -1,10 +1,14 @@
+import os
 import requests
 import pandas as pd 
 
 from urllib import response
 from .date_converter import DateConverter
 from .data_provider import DataProvider
+from .gap_filler import GapFiller
 from .log_manager import LogManager
+from .quote_cache import QuoteCache
+from .records import CandleInfo
 from .upbit_api import UpbitAPI
 
 
@@ -12,12 +16,25 @@ class UpbitDataProvider(DataProvider):
     """
     업비트 거래소의 실시간 거래 데이터를 제공하는 클래스
     업비트 open api를 사용, 별도의 가입, 인증, token 없이 사용 가능
+    UPBIT_OPEN_API_SERVER_URL 이 설정된 경우 해당 서버에서 데이터를 가져온다
+
+    candle_cache: 과거 캔들 조회에 사용할 CandleCache, 없으면 매번 서버에서 조회한다
+    backfill: True이면 실시간 캔들 사이의 빈 구간을 별도 스레드에서 조회해서 채운다
+    backfill_listener: 채운 캔들 리스트를 오래된 순서로 받을 함수, get_info를 호출한 스레드에서 호출된다
     """
 
     URL = "https://api.upbit.com/v1/candles/minutes/1"
+    CANDLE_PATH = "/v1/candles/minutes/1"
+    MAX_COUNT_PER_REQUEST = 200
     
-    def __init__(self):
+    def __init__(self, candle_cache=None, backfill=True):
         self.logger = LogManager.get_logger(__class__.__name__)
+        self.candle_cache = candle_cache
+        self.gap_filler = GapFiller(self._get_gap_candles) if backfill else None
+        self.backfill_listener = None
+        server_url = os.environ.get("UPBIT_OPEN_API_SERVER_URL")
+        if server_url is not None:
+            self.URL = server_url + self.CANDLE_PATH
         self.query_string = {"market": "KRW-BTC", "count": 1}
         self.upbit_api = UpbitAPI(access_key=0, secret_key=0, server_url=0, market=0)
     
@@ -40,11 +57,66 @@ class UpbitDataProvider(DataProvider):
             "closing_price": 마지막 거래 가격
             "acc_price": 단위 시간내 누적 거래 금액
             "acc_volume": 단위 시간내 누적 거래 양
+            "timestamp": 정보의 기준 시간 epoch 초
         } 
         """
 
+        if self.gap_filler is not None:
+            self.__deliver_backfill()
+
         data = self.__get_data_from_server()
-        return self.__create_candle_info(data[0])
+        info = self.__create_candle_info(data[0])
+        if info is not None:
+            QuoteCache.put(info["market"], info["closing_price"])
+            if self.candle_cache is not None:
+                self.candle_cache.put_candle(self.query_string["market"], info)
+            if self.gap_filler is not None:
+                self.gap_filler.check(info)
+        return info
+
+    def stop(self):
+        """ 빈 구간을 채우는 스레드를 종료한다 """
+        if self.gap_filler is not None:
+            self.gap_filler.stop()
+
+    def get_pyramid(self):
+        """
+        5분, 15분, 1시간, 1일 캔들을 조회할 수 있는 CandlePyramid를 반환한다.
+        candle_cache에 저장된 캔들로 만들고 이후 get_info, get_history로 받은 캔들을 반영한다.
+        candle_cache가 없으면 None
+        """
+        if self.candle_cache is None:
+            return None
+        return self.candle_cache.get_pyramid(self.query_string["market"])
+
+    def get_history(self, count):
+        """
+        현재 진행 중인 캔들을 제외한 최근 count 개의 1분 캔들 정보를 오래된 순서로 반환한다.
+        candle_cache가 있으면 저장된 캔들 이후만 조회하고 결과를 다시 저장한다.
+        조회 중 실패하면 그때까지 받은 캔들만 사용한다.
+        """
+        market = self.query_string["market"]
+        end = DateConverter.now_timestamp() // 60 * 60
+        cached = [] if self.candle_cache is None else self.candle_cache.load(market)
+        last_cached = cached[-1]["timestamp"] if len(cached) > 0 else end - 60 * (count + 1)
+        remaining = min(count, (end - last_cached) // 60 - 1)
+
+        fetched = self.__get_candles(market, end, last_cached, remaining)
+        history = cached + fetched
+        if self.candle_cache is not None and len(fetched) > 0:
+            history = self.candle_cache.save(market, history)
+        self.logger.info(f"history is loaded {len(fetched)} from server, {len(cached)} from cache")
+        return history[-count:]
+
+    def get_info_list(self, from_dash_to):
+        """
+        날짜를 입력으로 받아서 해당 기간의 1분 캔들 정보를 오래된 순서로 반환
+        기간이 길어도 나눠서 조회하며, 조회 중 실패하면 그때까지 받은 캔들만 사용한다.
+        """
+        start, end, count = DateConverter.to_end_min(from_dash_to)
+        start = DateConverter.to_timestamp(start)
+        end = DateConverter.to_timestamp(end)
+        return self.__get_candles(self.query_string["market"], end, start - 60, count)
 
     def get_history_df(self, from_dash_to): 
         """
@@ -55,24 +127,74 @@ class UpbitDataProvider(DataProvider):
         self.query_string["count"] = count
         response = self.upbit_api.get_data_from_server(url=self.URL, params=self.query_string)
         response.reverse()
-        return pd.DataFrame(response)
+        history_df = pd.DataFrame(response)
+        if "candle_date_time_kst" in history_df:
+            history_df["timestamp"] = DateConverter.to_timestamp_array(history_df["candle_date_time_kst"])
+        return history_df
     
     def __create_candle_info(self, data):
         try:
-            return {
-                "market": data["market"],
-                "date_time": data["candle_date_time_kst"],
-                "opening_price": float(data["opening_price"]),
-                "high_price": float(data["high_price"]),
-                "low_price": float(data["low_price"]),
-                "closing_price": float(data["trade_price"]),
-                "acc_price": float(data["candle_acc_trade_price"]),
-                "acc_volume": float(data["candle_acc_trade_volume"]),
-            }
+            return CandleInfo(
+                market=data["market"],
+                date_time=data["candle_date_time_kst"],
+                opening_price=data["opening_price"],
+                high_price=data["high_price"],
+                low_price=data["low_price"],
+                closing_price=data["trade_price"],
+                acc_price=data["candle_acc_trade_price"],
+                acc_volume=data["candle_acc_trade_volume"],
+                timestamp=DateConverter.to_timestamp(data["candle_date_time_kst"]),
+            )
         
         except KeyError:
             self.logger.warning("Invalid data for candle info")
             return None
         
+    def __get_candles(self, market, end, since, count):
+        """
+        end(미포함) 이전, since(미포함) 이후의 캔들을 최대 count 개 오래된 순서로 반환
+        한 번에 최대 MAX_COUNT_PER_REQUEST 개씩 과거 방향으로 나눠서 조회한다.
+        """
+        fetched = []
+        remaining = count
+        while remaining > 0:
+            params = {
+                "market": market,
+                "count": min(remaining, self.MAX_COUNT_PER_REQUEST),
+                "to": DateConverter.from_timestamp(end, is_kst=False) + "Z"}
+            try:
+                data = self.upbit_api.get_data_from_server(url=self.URL, params=params)
+            except UserWarning as msg:
+                self.logger.warning(f"candles are loaded partially {msg}")
+                break
+
+            candles = [self.__create_candle_info(item) for item in data]
+            candles = [info for info in candles if info is not None and info["timestamp"] > since]
+            if len(candles) == 0:
+                break
+
+            fetched.extend(candles)
+            remaining -= len(candles)
+            end = candles[-1]["timestamp"]
+            if len(candles) < params["count"]:
+                break
+
+        fetched.reverse()
+        return fetched
+
+    def _get_gap_candles(self, end, since, count):
+        """ GapFiller에서 빈 구간의 캔들을 조회할 때 사용 """
+        return self.__get_candles(self.query_string["market"], end, since, count)
+
+    def __deliver_backfill(self):
+        # candle_cache와 CandlePyramid는 get_info를 호출하는 스레드에서만 변경한다
+        info_list = self.gap_filler.pop_candles()
+        if len(info_list) == 0:
+            return
+        if self.candle_cache is not None:
+            self.candle_cache.put_backfill(self.query_string["market"], info_list)
+        if self.backfill_listener is not None:
+            self.backfill_listener(info_list)
+
     def __get_data_from_server(self):
         return self.upbit_api.get_data_from_server(url=self.URL, params=self.query_string)
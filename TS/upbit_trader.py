@@ -1,19 +1,26 @@
 import os
-import copy
+import time
 import uuid
 import threading
 import hashlib
 import requests
 import jwt
 
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, wait
 from urllib.parse import urlencode
 from urllib.parse import unquote
 from urllib import request, response
 from dotenv import load_dotenv
 
 from .upbit_api import UpbitAPI
+from .clock import Clock
+from .date_converter import DateConverter
 from .log_manager import LogManager
+from .metrics import MetricsRegistry
+from .order_queue import OrderQueue
+from .quote_cache import QuoteCache
+from .records import AccountInfo, TradingResult
+from .tracer import Tracer
 from .trader import Trader
 from .worker import Worker
 
@@ -30,9 +37,17 @@ class UpbitTrader(Trader):
 
     order_map: 
     {
-        request[id]: {"uuid": response["uuid"], "callback": task["callback"], "result": result}
+        request[id]: {
+            "uuid": response["uuid"], "market": 종목, "callback": task["callback"], "result": result,
+            "next_check": 다음 체결 확인 시간 (Clock.monotonic 기준), "check_interval": 마지막 확인 간격(초)
+        }
     }
 
+    체결 확인은 주문마다 따로 예약한다. 시장가 주문은 MARKET_ORDER_CHECK_DELAY 뒤에 바로 확인하고,
+    지정가 주문은 RESULT_CHECKING_INTERVAL부터 체결되지 않을 때마다 간격을 CHECKING_BACKOFF 배씩
+    MAX_RESULT_CHECKING_INTERVAL까지 늘린다. 취소에 실패한 주문은 바로 다시 확인한다.
+    확인할 때는 예정 시간이 된 주문만 한 번에 조회한다.
+
     result:
     {
         uuid: 요청 정보
@@ -49,7 +64,15 @@ class UpbitTrader(Trader):
     MARKET_CURRENCY = "BTC"
     ISO_DATEFORMAT = "%Y-%m-%dT%H:%M:%S"
     COMMISSION_RATIO = 0.0005
-    RESULT_CHECKING_INTERVAL = 5
+    RESULT_CHECKING_INTERVAL = 1
+    MARKET_ORDER_CHECK_DELAY = 0.3
+    MAX_RESULT_CHECKING_INTERVAL = 30
+    CHECKING_BACKOFF = 2
+    CANCEL_WORKERS = 8
+    CANCEL_RATE = 8
+    CANCEL_TIMEOUT = 5
+    CANCEL_RETRY_COUNT = 2
+    ORDER_LIST_LIMIT = 100
 
     def __init__(self):
         self.logger = LogManager.get_logger(__class__.__name__)
@@ -57,17 +80,24 @@ class UpbitTrader(Trader):
         self.worker.start()
 
         self.timer = None
+        self.timer_due = None
+        self.order_queue = OrderQueue()
         self.order_map = {}
         self.asset = (0, 0)
         self.balance = None
         self.name = "Upbit"
         self.is_initialized = False
+        self.order_listener = None
+        self.account_reconciler = None
 
         self.ACCESS_KEY = os.environ.get("UPBIT_OPEN_API_ACCESS_KEY", "upbit_access_key")
         self.SECRET_KEY = os.environ.get("UPBIT_OPEN_API_SECRET_KEY", "upbit_secret_key")
         self.SERVER_URL = os.environ.get("UPBIT_OPEN_API_SERVER_URL", "upbit_server_url")
 
         self.upbit_api = UpbitAPI(self.ACCESS_KEY, self.SECRET_KEY, self.SERVER_URL, self.MARKET)
+        self.fill_counter = MetricsRegistry.counter("ts_fills_total", "Filled orders per side")
+        self.fill_rate = MetricsRegistry.rate("ts_fills_per_minute", "Filled orders in the last minute", per=60)
+        self.check_counter = MetricsRegistry.counter("ts_order_checks_total", "Order status checks by outcome")
 
     def initialize(self, budget):
         self.balance = budget
@@ -76,12 +106,26 @@ class UpbitTrader(Trader):
     def send_request(self, request_list, callback):
         """
         거래 요청을 처리한다. 
+        요청은 OrderQueue에 넣고 worker가 차례대로 꺼내서 주문하므로 대기 중인 같은 방향의 주문은 교체되고
+        중복 취소 요청과 오래 기다린 주문은 버려진다. queue가 가득 차면 UserWarning이 발생한다.
         """
         if self.is_initialized == False:
             raise UserWarning("Upbit Trader is not initialized")
 
         for request in request_list:
-            self.worker.post_task({"runnable": self._execute_order, "request": request, "callback": callback})
+            if request["type"] != "cancel":
+                Tracer.mark(Tracer.get(request["id"]), "queued")
+            self.order_queue.put(request, callback, self._get_market(request))
+            self.worker.post_task({"runnable": self._execute_next_order})
+
+    def _execute_next_order(self, task):
+        """ OrderQueue에서 다음 요청을 꺼내서 주문, 교체되거나 버려져서 없으면 아무것도 하지 않는다 """
+        del task
+        item = self.order_queue.get()
+        if item is None:
+            return
+        request, callback = item
+        self._execute_order({"request": request, "callback": callback})
     
     def cancel_request(self, request_id):
         """
@@ -97,25 +141,189 @@ class UpbitTrader(Trader):
         order = self.order_map[request_id]
         del self.order_map[request_id]
 
-        # 취소 주문 후 response 받아오기
-        result = order["result"]
-        response = self.upbit_api.cancel_order(order["uuid"]) 
+        # 취소 주문 후 최종 체결 가격으로 결과 생성, 실패하면 계속 체결 대기
+        result = self._cancel_order(order)
+        if result is None:
+            # 이미 체결되어 취소하지 못했을 수 있으므로 바로 다시 확인
+            self.order_map[request_id] = order
+            self._check_now([order])
+            return
+        self._call_callback(order["callback"], result)
+
+    def cancel_all_requests(self, timeout=None):
+        """
+        모든 거래 요청을 취소한다.
+        체결되지 않고 대기중인 모든 거래 요청을 최대 CANCEL_WORKERS 개씩 동시에 취소한다.
+        거래소 주문 요청 제한을 넘지 않도록 초당 CANCEL_RATE 개까지만 요청하고,
+        실패한 요청은 CANCEL_RETRY_COUNT 번까지 1초 뒤에 다시 요청하며,
+        timeout(기본 CANCEL_TIMEOUT)초가 지나면 남은 요청은 취소하지 않는다.
+
+        아직 거래소에 보내지 않은 요청은 보내지 않고 버린다.
+        취소는 worker에서 실행하고 끝날 때까지 기다린다. 진행 중인 주문이 끝난 뒤에 취소할 주문을 정하므로
+        빠지는 주문이 없고, 결과 콜백은 체결 확인과 같이 worker 스레드에서 요청 순서대로 전달된다.
+        취소하지 못한 주문은 바로 체결 확인까지 한 뒤 반환하므로 worker는 이 함수가 끝난 뒤에 멈춰야 한다.
+
+        returns: 취소하지 못하고 체결 대기 중인 요청 id 리스트
+        """
+        dropped = self.order_queue.clear()
+        if len(dropped) > 0:
+            self.logger.info(f"drop {len(dropped)} requests waiting in the order queue")
+
+        thread = self.worker.thread
+        if thread is None or thread is threading.current_thread():
+            return self._cancel_all(timeout)
+
+        task = {"runnable": self._cancel_all_task, "timeout": timeout, "done": threading.Event(), "remaining": None}
+        self.worker.post_task(task)
+        # 예외로 종료된 worker는 task를 실행하지 못하므로 살아 있는 동안만 기다린다
+        while task["done"].wait(1) is False:
+            if thread.is_alive() is False:
+                self.logger.error("trader worker is terminated before canceling orders")
+                return list(self.order_map)
+        return task["remaining"]
+
+    def _cancel_all_task(self, task):
+        try:
+            task["remaining"] = self._cancel_all(task["timeout"])
+        finally:
+            task["done"].set()
+
+    def _cancel_all(self, timeout):
+        orders = list(self.order_map.items())
+        if len(orders) == 0:
+            return []
+
+        timeout = self.CANCEL_TIMEOUT if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+
+        def cancel(index, order):
+            # index 번째 요청은 start + index / CANCEL_RATE 이후에 보낸다
+            delay = start + index / self.CANCEL_RATE - time.monotonic()
+            if time.monotonic() + max(delay, 0) >= deadline:
+                return None
+            if delay > 0:
+                time.sleep(delay)
+
+            # 요청 제한 초과 등으로 실패하면 제한이 풀린 뒤 다시 요청
+            for retry in range(self.CANCEL_RETRY_COUNT + 1):
+                if retry > 0:
+                    time.sleep(1)
+                remaining_time = deadline - time.monotonic()
+                if remaining_time <= 0:
+                    return None
+                result = self._cancel_order(order, timeout=remaining_time)
+                if result is not None:
+                    return result
+            return None
+
+        # 취소 요청은 남은 시간을 timeout으로 보내므로 deadline 직후에 모두 끝난다.
+        # 진행 중인 취소가 끝날 때까지 기다려야 deadline 이후에 성공한 취소도 결과를 전달할 수 있다.
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.CANCEL_WORKERS, len(orders)), thread_name_prefix="UpbitTrader-Cancel")
+        futures = [
+            (executor.submit(cancel, index, order), request_id) for index, (request_id, order) in enumerate(orders)]
+        wait([future for future, _ in futures], timeout=max(deadline - time.monotonic(), 0))
+        executor.shutdown(wait=True, cancel_futures=True)
+
+        remaining = []
+        for future, request_id in futures:
+            result = None
+            if future.cancelled() is False and future.exception() is None:
+                result = future.result()
+            order = self.order_map.get(request_id)
+            if order is None:
+                continue
+            if result is None:
+                remaining.append(order)
+                continue
+
+            del self.order_map[request_id]
+            self._call_callback(order["callback"], result)
+
+        if len(remaining) > 0:
+            self.logger.error(f"{len(remaining)} orders are not canceled in {timeout}s {[order['uuid'] for order in remaining]}")
+            # 이미 체결되어 취소하지 못했을 수 있으므로 바로 확인
+            now = Clock.monotonic()
+            for order in remaining:
+                order["next_check"] = now
+            self._get_order_result(None)
+        self.logger.info(f"cancel all {len(orders)} orders in {time.monotonic() - start:.2f}s")
+        return [request_id for request_id, _ in orders if request_id in self.order_map]
+
+    def _cancel_order(self, order, timeout=None):
+        """ 주문을 취소하고 최종 체결 가격, 수량으로 결과를 만든다. 실패하면 None """
+        response = self.upbit_api.cancel_order(order["uuid"], timeout)
         self.logger.debug(f"Canceled order {response}")
+        if response is None:
+            return None
 
         # 최종 체결 가격, 수량으로 업데이트 (체결 된게 없으면 0)
-        result["price"] = float(response["price"]) if response["price"] is not None else 0 
-        result["date_time"] = response["created_at"].replace("+09:00", "")
-        result["state"] = "done"
-        self._call_callback(order["callback"], result)
+        return order["result"]._replace(
+            price=float(response["price"]) if response["price"] is not None else 0,
+            date_time=response["created_at"].replace("+09:00", ""),
+            state="done")
 
-    def cancel_all_requests(self):
+    def get_state(self):
         """
-        모든 거래 요청을 취소한다.
-        체결되지 않고 대기중인 모든 거래 요청을 취소한다.
+        복구를 위한 상태를 반환한다. 콜백은 저장하지 않는다.
+
+        returns:
+            {
+                balance: 계좌 현금 잔고
+                asset: (평균 매입 가격, 수량)
+                order_map: {request[id]: {"uuid": 주문 uuid, "result": result}}
+            }
+        """
+        return {
+            "balance": self.balance,
+            "asset": self.asset,
+            "order_map": {
+                request_id: {"uuid": order["uuid"], "result": order["result"]}
+                for request_id, order in list(self.order_map.items())}}
+
+    def set_state(self, state):
+        """ get_state로 저장한 상태를 복구 """
+        self.balance = state["balance"]
+        self.asset = tuple(state["asset"])
+        now = Clock.monotonic()
+        self.order_map = {
+            request_id: {
+                "uuid": order["uuid"], "callback": None, "result": TradingResult.from_dict(order["result"]),
+                "next_check": now, "check_interval": self.RESULT_CHECKING_INTERVAL}
+            for request_id, order in state["order_map"].items()}
+
+    def reconcile_orders(self, callback):
+        """
+        복구된 체결 대기 주문에 callback을 연결하고 바로 거래소에 결과를 조회한다.
+        """
+        for order in self.order_map.values():
+            order["callback"] = callback
+
+        if len(self.order_map) > 0:
+            self.logger.info(f"reconcile {len(self.order_map)} restored orders")
+            self.worker.post_task({"runnable": self._get_order_result})
+
+    def set_account_reconciler(self, account_reconciler):
+        """
+        거래소 계좌를 조회하는 AccountReconciler를 설정하고 로컬 장부를 비교 대상으로 연결한다.
+        설정되면 주문 전에 거래소의 주문 가능 금액, 수량도 확인한다.
         """
-        orders = copy.deepcopy(self.order_map)
-        for request_id in orders.keys():
-            self.cancel_request(request_id)
+        self.account_reconciler = account_reconciler
+        account_reconciler.ledger_func = self.get_ledger
+
+    def get_ledger(self):
+        """ 거래소와 비교할 로컬 장부, 현금 잔고와 보유 자산, 체결 대기 주문 uuid """
+        return {
+            "balance": self.balance,
+            "asset": self.asset,
+            "uuids": [order["uuid"] for order in list(self.order_map.values())]}
+
+    def get_account_snapshot(self):
+        """ AccountReconciler가 마지막으로 조회한 거래소 계좌 AccountSnapshot, 없으면 None """
+        if self.account_reconciler is None:
+            return None
+        return self.account_reconciler.snapshot
 
     def get_account_info(self):
         """
@@ -126,16 +334,22 @@ class UpbitTrader(Trader):
                 asset: 자산 목록, 마켓이름을 키값으로 갖고 (평균 매입 가격, 수량)을 갖는 딕셔너리
                 quote: 종목별 현재 가격 딕셔너리
                 date_time: 현재 시간
+                timestamp: 현재 시간 epoch 초
             }
+        현재가 조회에 실패하면 마지막으로 받은 가격을 사용하고, 그마저 없으면 UserWarning이 발생한다.
         """
-        trade_info = self.upbit_api.get_trade_tick() # 최근 체결 정보
-        result = {
-            "balance": self.balance,
-            "asset": {self.MARKET_CURRENCY: self.asset},
-            "quote": {},
-            "date_time": datetime.now().strftime(self.ISO_DATEFORMAT)} 
+        latest_price = self.upbit_api.get_latest_price() # 최근 체결 가격, QuoteCache 우선
+        if latest_price is None:
+            latest_price = QuoteCache.get(self.MARKET, max_age=float("inf"))
+        if latest_price is None:
+            raise UserWarning(f"quote of {self.MARKET} is not available")
+        result = AccountInfo(
+            balance=self.balance,
+            asset={self.MARKET_CURRENCY: self.asset},
+            quote={self.MARKET_CURRENCY: float(latest_price)},
+            date_time=Clock.now_string(),
+            timestamp=DateConverter.now_timestamp())
         
-        result["quote"][self.MARKET_CURRENCY] = float(trade_info[0]["trade_price"])
         self.logger.debug(f"account info | banance: {result['balance']} | {result['asset']} | {result['quote']}")
         return result
 
@@ -148,58 +362,100 @@ class UpbitTrader(Trader):
         if request["type"] == "cancel":
             self.cancel_request(request["id"])
             return
+
+        trace = Tracer.get(request["id"])
+        Tracer.observe_since(trace, "queue", "queued")
+        market = self._get_market(request)
+        asset = self._get_asset(market)
         # price 0
         if request["price"] == 0:
             self.logger.warning("Invalid price request, zero price is not supported now")
+            Tracer.discard(request["id"])
             return
         # 매수 시 잔고가 부족하다면
         if is_buy and float(request["price"]) * float(request["amount"]) > self.balance:
             self.logger.warning("Invalid price request. Balance is too small!")
+            Tracer.discard(request["id"])
             task["callback"]("error")
             return
         # 매도 시 보유 수량이 부족하다면
-        if is_buy is False and float(request["amount"]) > self.asset[1]:
-            self.logger.warning(f"Invalid price request. RQ:{request['amount']} > MY: {self.asset[1]}")
+        if is_buy is False and float(request["amount"]) > asset[1]:
+            self.logger.warning(f"Invalid price request. RQ:{request['amount']} > MY: {asset[1]}")
+            Tracer.discard(request["id"])
             task["callback"]("error")
             return
 
+        # 거래소에서 조회한 주문 가능 금액, 수량이 부족하다면
+        snapshot = self.get_account_snapshot()
+        if snapshot is not None:
+            available = snapshot.asset.get(market.split("-")[1], (0, 0, 0))[1]
+            if (is_buy and float(request["price"]) > snapshot.balance) or (
+                is_buy is False and float(request["amount"]) > available):
+                self.logger.warning(f"Invalid request. exchange account v{snapshot.version} is not enough")
+                Tracer.discard(request["id"])
+                task["callback"]("error")
+                return
+
         # 주문 요청
-        if is_buy:
-            response = self.upbit_api.send_order(self.MARKET, is_buy, price=request["price"], volume=None) 
-        else:
-            response = self.upbit_api.send_order(self.MARKET, is_buy, price=None, volume=request["amount"]) 
+        with Tracer.activate(trace):
+            if is_buy:
+                response = self.upbit_api.send_order(market, is_buy, price=request["price"], volume=None) 
+            else:
+                response = self.upbit_api.send_order(market, is_buy, price=None, volume=request["amount"]) 
 
         if response is None:
+            Tracer.discard(request["id"])
             task["callback"]("error")
             return
+
+        Tracer.observe_since(trace, "tick_to_order", "start")
+        Tracer.mark(trace, "ordered")
         
         # 주문 정보 저장 해놓기 (체결 결과 및 취소 주문을 위해서)
-        result = {
-            "uuid": response["uuid"], 
-            "state": "requested", "request": request, 
-            "type": request["type"],
-            "price": request["price"],
-             "amount": request["amount"],
-            "msg": "success"
-            }
+        result = TradingResult(
+            uuid=response["uuid"], 
+            state="requested", request=request, 
+            type=request["type"],
+            price=request["price"],
+            amount=request["amount"],
+            msg="success")
+        # 시장가 주문은 바로 체결되므로 짧은 간격으로 먼저 확인
+        check_interval = self.RESULT_CHECKING_INTERVAL
+        if response.get("ord_type", "limit") != "limit":
+            check_interval = self.MARKET_ORDER_CHECK_DELAY
         self.order_map[request["id"]] = {
             "uuid": response["uuid"],
+            "market": market,
             "callback": task["callback"],
-            "result": result
+            "result": result,
+            "next_check": Clock.monotonic() + check_interval,
+            "check_interval": check_interval
             }
+        if self.order_listener is not None:
+            self.order_listener(request["id"], response["uuid"], result)
+        if self.account_reconciler is not None:
+            self.account_reconciler.notify()
 
         self._start_timer()
 
     def _start_timer(self):
-        """ 일정 시간 이후 주문 상태 테스트 추가 후 """
-        if self.timer is not None:
+        """ 가장 이른 주문 확인 시간에 체결 확인 작업을 예약, 더 이르게 예약되어 있으면 그대로 둔다 """
+        orders = list(self.order_map.values())
+        if len(orders) == 0:
             return
-        
+
+        next_check = min(order.get("next_check", 0) for order in orders)
+        if self.timer is not None and self.timer_due <= next_check:
+            return
+        self._stop_timer()
+
         def post_get_result_task():
             self.worker.post_task({"runnable": self._get_order_result})
         
-        self.timer = threading.Timer(self.RESULT_CHECKING_INTERVAL, post_get_result_task)
-        self.timer.start()
+        # 같은 trader의 체결 확인 예약은 하나로 합친다
+        self.timer_due = next_check
+        self.timer = Clock.call_later(
+            max(next_check - Clock.monotonic(), 0), post_get_result_task, key=("order_result", id(self)))
 
     def _stop_timer(self):
         if self.timer is None:
@@ -207,6 +463,16 @@ class UpbitTrader(Trader):
 
         self.timer.cancel()
         self.timer = None
+        self.timer_due = None
+
+    def _check_now(self, orders):
+        """ 주문들을 다음 체결 확인에 바로 포함시킨다 """
+        now = Clock.monotonic()
+        for order in orders:
+            order["next_check"] = now
+            order["check_interval"] = self.RESULT_CHECKING_INTERVAL
+        self._stop_timer()
+        self._start_timer()
 
     def _get_order_result(self, task):
         """
@@ -214,64 +480,87 @@ class UpbitTrader(Trader):
         넣은 주문들에 대한 결과 생성
         """
         del task
-        uuids = []
-        # Interval 동안 넣은 주문의 uuid를 order_map에서 가져오기
-        for request_id, order in self.order_map.items():
-            uuids.append(order["uuid"])
-        
-        if len(uuids) == 0:
+        # 확인 예정 시간이 된 주문의 uuid를 order_map에서 가져오기
+        now = Clock.monotonic()
+        due_orders = [
+            (request_id, order) for request_id, order in list(self.order_map.items())
+            if order.get("next_check", 0) <= now]
+        if len(due_orders) == 0:
+            self._stop_timer()
+            self._start_timer()
             return
         
-        # 해당 uuid에서 [done, cancel] 주문들 조회
+        # 해당 uuid에서 [done, cancel] 주문들을 종목과 관계없이 ORDER_LIST_LIMIT 개씩 조회
         # 시장가 매수 주문의 경우 잔량이 남으면 (소수점 문제로) cancel로 처리될 수도 있음
-        order_results = self.upbit_api.get_order_list(uuids, is_done_state=True)
-        if order_results is None:
-            return
-
-        waiting_request = {}
-        self.logger.debug(f"waiting order count: {len(self.order_map)}")
-        for request_id, request in self.order_map.items():
+        uuids = [order["uuid"] for _, order in due_orders]
+        done_uuids = set()
+        for start in range(0, len(uuids), self.ORDER_LIST_LIMIT):
+            order_results = self.upbit_api.get_order_list(
+                uuids[start:start + self.ORDER_LIST_LIMIT], is_done_state=True)
+            if order_results is None:
+                done_uuids = None
+                break
+            done_uuids.update(order_result["uuid"] for order_result in order_results)
+
+        self.logger.debug(f"waiting order count: {len(self.order_map)}, checking {len(due_orders)}")
+        for request_id, request in due_orders:
             # 주문이 주문 내역에서 조회된 경우: 체결 완료 
-            is_done = False
-            for order_result in order_results:
-                if request["uuid"] == order_result["uuid"]:
-                    order_final = self.upbit_api.get_order_one(request["uuid"])
-
-                    result = request["result"]
-                    result["date_time"] = order_final["created_at"].replace("+09:00", "")
-                    # 최종 체결 가격, 수량으로 업데이트
-                
-                    result["price"] = float(order_final["trades"][0]['price'])
-                    result["amount"] = float(order_final["trades"][0]['volume'])
-                    result["state"] = "done"
-                    self._call_callback(request["callback"], result)
-                    is_done = True
+            if done_uuids is not None and request["uuid"] in done_uuids:
+                order_final = self.upbit_api.get_order_one(request["uuid"])
+
+                # 최종 체결 가격, 수량으로 업데이트
+                result = request["result"]._replace(
+                    date_time=order_final["created_at"].replace("+09:00", ""),
+                    price=float(order_final["trades"][0]['price']),
+                    amount=float(order_final["trades"][0]['volume']),
+                    state="done")
+                # 취소로 먼저 결과가 전달된 주문은 다시 전달하지 않는다
+                if self.order_map.pop(request_id, None) is None:
+                    continue
+                self.check_counter.inc(outcome="done")
+                self._call_callback(request["callback"], result, filled=True)
+                continue
             
-            # 주문이 주문 내역에서 조회되지 않는 경우: 체결 대기
-            if is_done is False:
-                self.logger.debug(f"waiting order {request}")
-                waiting_request[request_id] = request
+            # 주문이 주문 내역에서 조회되지 않거나 조회에 실패한 경우: 체결 대기, 확인 간격을 늘린다
+            self.logger.debug(f"waiting order {request}")
+            self.check_counter.inc(outcome="waiting")
+            interval = request.get("check_interval", self.RESULT_CHECKING_INTERVAL) * self.CHECKING_BACKOFF
+            request["check_interval"] = min(interval, self.MAX_RESULT_CHECKING_INTERVAL)
+            request["next_check"] = now + request["check_interval"]
                 
-        self.order_map = waiting_request
         self.logger.debug(f"After resulting, waiting order count: {len(self.order_map)}")
         self._stop_timer()
-        if len(self.order_map) > 0:
-            self._start_timer()
+        self._start_timer()
+
+    def _get_market(self, request):
+        """ 요청을 주문할 종목 """
+        return self.MARKET
 
-    def _call_callback(self, callback, result):
+    def _get_asset(self, market):
+        """ 종목의 (평균 매입 가격, 수량) """
+        return self.asset
+
+    def _set_asset(self, market, asset):
+        self.asset = asset
+
+    def _call_callback(self, callback, result, filled=False):
         """
         result 받아서 self.asset, self.balance 업데이트하고
         콜백으로 결과 전달
+
+        filled: 체결 확인으로 만든 결과인지 여부, 취소로 만든 결과는 체결 지표에 세지 않는다
         """
         old_balance = self.balance
         result_value = float(result["price"]) * float(result["amount"])
         fee = result_value * self.COMMISSION_RATIO
+        market = self._get_market(result["request"])
+        asset = self._get_asset(market)
 
         # 매수 체결 주문의 경우 
         if result["state"] == "done" and result["type"] == "buy":
-            old_value = self.asset[0] * self.asset[1]
+            old_value = asset[0] * asset[1]
             new_value = old_value + result_value
-            new_amount = self.asset[1] + float(result["amount"])
+            new_amount = asset[1] + float(result["amount"])
             new_amount = round(new_amount, 8)
             
             if new_amount == 0:
@@ -279,23 +568,35 @@ class UpbitTrader(Trader):
             else:
                 avr_price = new_value / new_amount
             
-            self.asset = (avr_price, new_amount)
+            self._set_asset(market, (avr_price, new_amount))
             self.balance -= round(result_value + fee)
 
         # 매도 체결 주문의 경우
         elif result["state"] == "done" and result["type"] == "sell":
-            old_avr_price = self.asset[0]
-            new_amount = self.asset[1] - float(result["amount"])
+            old_avr_price = asset[0]
+            new_amount = asset[1] - float(result["amount"])
             new_amount = round(new_amount, 8)
 
             if new_amount == 0:
                 old_avr_price = 0
             
-            self.asset = (old_avr_price, new_amount)
+            self._set_asset(market, (old_avr_price, new_amount))
             self.balance += round(result_value - fee)
         
         print(f"잔고 변화: {old_balance} -> {self.balance}")
-        callback(result)
+        if filled:
+            self.fill_counter.inc(side=result["type"])
+            self.fill_rate.mark()
+        if result["state"] == "done":
+            if self.account_reconciler is not None:
+                self.account_reconciler.notify()
+
+        request_id = result["request"]["id"]
+        trace = Tracer.get(request_id)
+        Tracer.observe_since(trace, "fill_wait", "ordered")
+        with Tracer.span("callback", trace):
+            callback(result)
+        Tracer.finish(request_id)
 
 
 